@@ -0,0 +1,45 @@
+"""
+Compare the time taken to simulate quantum volume model circuits with a pyQuil
+NumpyWavefunctionSimulator and with
+:py:func:`forest.benchmarking.quantum_volume.simulate_qv_model_circuits`.
+
+Usage::
+
+    python benchmarks/quantum_volume.py [max_width] [num_circuits]
+"""
+import sys
+import time
+
+import numpy as np
+from pyquil.simulation import NumpyWavefunctionSimulator
+
+from forest.benchmarking.quantum_volume import QV_SIMULATOR_BATCH_AMPLITUDES, \
+    generate_abstract_qv_circuit, simulate_qv_model_circuits, _model_circuit_probabilities
+
+
+def main(max_width: int = 20, num_circuits: int = 10):
+    np.random.seed(0)
+    print(f'seconds per circuit, averaged over {num_circuits} circuits')
+    print(f'{"width":>5} {"wfn_sim":>10} {"qv_sim":>10} {"speedup":>8}')
+    for width in range(4, max_width + 1, 2):
+        circuits = [generate_abstract_qv_circuit(width) for _ in range(num_circuits)]
+
+        wfn_sim = NumpyWavefunctionSimulator(width)
+        start = time.perf_counter()
+        for permutations, gates in circuits:
+            _model_circuit_probabilities(wfn_sim, permutations, gates)
+        wfn_time = (time.perf_counter() - start) / num_circuits
+
+        batch_size = max(1, QV_SIMULATOR_BATCH_AMPLITUDES // 2 ** width)
+        start = time.perf_counter()
+        for idx in range(0, num_circuits, batch_size):
+            batch = circuits[idx:idx + batch_size]
+            simulate_qv_model_circuits(np.asarray([perms for perms, _ in batch]),
+                                       np.asarray([gates for _, gates in batch]))
+        qv_time = (time.perf_counter() - start) / num_circuits
+
+        print(f'{width:>5} {wfn_time:10.4f} {qv_time:10.4f} {wfn_time / qv_time:8.1f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
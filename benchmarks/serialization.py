@@ -0,0 +1,57 @@
+"""
+Compare the JSON and NPZ formats of :py:mod:`forest.benchmarking.observable_estimation` for the
+results of a process tomography experiment.
+
+Usage::
+
+    python benchmarks/serialization.py [num_qubits]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from pyquil import Program
+
+from forest.benchmarking.observable_estimation import ExperimentResult, ExperimentSetting, \
+    to_json, read_json, to_npz, read_npz
+from forest.benchmarking.tomography import generate_process_tomography_experiment
+
+
+def read_json_results(fn):
+    """read_json returns the results as dicts; convert them to ExperimentResults."""
+    return [ExperimentResult(setting=ExperimentSetting.from_str(res['setting']),
+                             expectation=res['expectation'], std_err=res['std_err'],
+                             total_counts=res['total_counts'])
+            for res in read_json(fn)]
+
+
+def main(num_qubits: int = 3):
+    qubits = list(range(num_qubits))
+    expt = generate_process_tomography_experiment(Program(), qubits, in_basis='pauli')
+    rs = np.random.RandomState(0)
+    results = [ExperimentResult(setting=setting, expectation=rs.uniform(-1, 1),
+                                std_err=rs.uniform(0, .1), total_counts=1000)
+               for group in expt for setting in group]
+    print(f'{len(results)} results of {num_qubits} qubit process tomography')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, write, read in [('json', to_json, read_json_results),
+                                  ('npz', to_npz, read_npz)]:
+            start = time.perf_counter()
+            fn = write(os.path.join(tmp_dir, 'results.' + name), results)
+            write_time = time.perf_counter() - start
+            start = time.perf_counter()
+            read(fn)
+            read_time = time.perf_counter() - start
+            print(f'{name:>5}: write {write_time:7.3f} s, read {read_time:7.3f} s, '
+                  f'{os.path.getsize(fn) / 1e6:7.2f} MB')
+
+        start = time.perf_counter()
+        read_npz(os.path.join(tmp_dir, 'results.npz'), qubit_groups=[qubits[:1]])
+        print(f'  npz: read the results on qubit {qubits[0]} {time.perf_counter() - start:7.3f} s')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
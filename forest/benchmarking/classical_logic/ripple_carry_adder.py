@@ -28,6 +28,8 @@ from scipy.spatial.distance import hamming
 from tqdm import tqdm
 
 from forest.benchmarking.classical_logic.primitives import *
+from forest.benchmarking.observable_estimation import ShotStore
+from forest.benchmarking.compilation import ExecutableCache
 from forest.benchmarking.utils import bit_array_to_int, int_to_bit_array, bitstring_prep, \
     parameterized_bitstring_prep
 
@@ -250,7 +252,9 @@ def get_n_bit_adder_results(qc: QuantumComputer, n_bits: int,
                                                       int]] = None,
                             qubits: Optional[Sequence[int]] = None, in_x_basis: bool = False,
                             num_shots: int = 100, use_param_program: bool = False,
-                            use_active_reset: bool = True, show_progress_bar: bool = False) \
+                            use_active_reset: bool = True, show_progress_bar: bool = False,
+                            executable_cache: ExecutableCache = None,
+                            shot_store: ShotStore = None) \
         -> Sequence[Sequence[Sequence[int]]]:
     """
     Convenient wrapper for collecting the results of addition for every possible pair of n_bits
@@ -268,6 +272,11 @@ def get_n_bit_adder_results(qc: QuantumComputer, n_bits: int,
     :param use_active_reset: whether or not to use active reset. Doing so will speed up execution
         on a QPU.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
+    :param shot_store: if provided, the outputs of each addition are also appended to this
+        :py:class:`~forest.benchmarking.observable_estimation.ShotStore`, with the summand bits
+        stored as metadata.
     :return: A list of n_shots many outputs for each possible summation of two n_bit long summands,
         listed in increasing numerical order where the label is the 2n bit number represented by
         num = a_bits | b_bits for the addition of a + b.
@@ -300,8 +309,11 @@ def get_n_bit_adder_results(qc: QuantumComputer, n_bits: int,
 
         prog = reset_prog + add_prog
         prog.wrap_in_numshots_loop(num_shots)
-        nat_quil = qc.compiler.quil_to_native_quil(prog)
-        exe = qc.compiler.native_quil_to_executable(nat_quil)
+        if executable_cache is not None:
+            exe = executable_cache.compile(qc, prog)
+        else:
+            nat_quil = qc.compiler.quil_to_native_quil(prog)
+            exe = qc.compiler.native_quil_to_executable(nat_quil)
 
         memory_map = {}
         if use_param_program:
@@ -309,6 +321,10 @@ def get_n_bit_adder_results(qc: QuantumComputer, n_bits: int,
 
         # Run it on the QPU or QVM
         results = qc.run(exe, memory_map).get_register_map().get('ro')
+        if shot_store is not None:
+            # ro[0] holds the z_ancilla and ro[1:] register_b, most significant bit first
+            shot_store.append(results, [registers[3]] + list(registers[1])[::-1],
+                              bits=[int(bit) for bit in bits])
         all_results.append(results)
 
     return all_results
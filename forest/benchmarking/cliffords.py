@@ -0,0 +1,555 @@
+"""
+A local representation of Cliffords by stabilizer tableaux, and of the one and two qubit Clifford
+groups.
+
+A Clifford C is represented by its tableau, the images C P C^dagger of the 2n generators
+X_0, ..., X_{n-1}, Z_0, ..., Z_{n-1} of the n qubit Pauli group. A Pauli is represented by the bits
+(x, z) and a phase p in Z_4 of the operator i^p X^x Z^z, where qubit j is acted on by
+X^{x_j} Z^{z_j}. The tableau is then a 2n by 2n symplectic matrix over GF(2), whose row g holds the
+bits of the image of generator g, along with the 2n phases of the images.
+
+The one and two qubit groups are enumerated by a breadth first search over the gates of the RB
+gateset, so that each element comes with a short native gate decomposition. The group is built
+once and stored in a cache directory, along with the inverse of each element. This allows
+randomized benchmarking sequences to be generated, and Paulis to be conjugated by Cliffords,
+without calls to a BenchmarkConnection.
+"""
+import os
+import tempfile
+import warnings
+import zipfile
+from functools import lru_cache
+from math import pi
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from pyquil.api import BenchmarkConnection
+from pyquil.gates import CZ, RX, RZ
+from pyquil.paulis import PauliTerm
+from pyquil.quil import Program
+from pyquil.quilbase import Gate
+from pyquil.simulation.tools import program_unitary
+
+# the directory in which the Clifford groups are stored once built
+CLIFFORD_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'forest-benchmarking')
+# groups with at most this many elements also store a table of every composition
+MAX_COMPOSITION_TABLE_SIZE = 1024
+# the number of distinct gates whose tableaux are held in memory
+GATE_TABLEAU_CACHE_SIZE = 256
+
+_CACHE_FORMAT_VERSION = 1
+
+Tableau = Tuple[np.ndarray, np.ndarray]
+
+
+def identity_tableau(num_qubits: int) -> Tableau:
+    """
+    The tableau of the identity on num_qubits qubits.
+
+    :param num_qubits: the number of qubits.
+    :return: the symplectic matrix and phases of the identity.
+    """
+    return np.eye(2 * num_qubits, dtype=np.uint8), np.zeros(2 * num_qubits, dtype=np.uint8)
+
+
+def conjugate_paulis(tableau: Tableau, pauli_bits: np.ndarray,
+                     pauli_phases: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Conjugate a batch of Paulis by the Clifford with the given tableau.
+
+    The bits of the images are the product of the bits with the symplectic matrix, mod 2. The
+    phases follow from writing each Pauli as the ordered product of the generators it contains:
+    the image is the ordered product of their images, and reordering
+    (X^a Z^b)(X^c Z^d) = (-1)^{b.c} X^{a+c} Z^{b+d} contributes a sign which is a quadratic form
+    in the bits.
+
+    :param tableau: the symplectic matrix and phases of a Clifford C on n qubits.
+    :param pauli_bits: an array of shape (m, 2n) holding the (x, z) bits of each Pauli P.
+    :param pauli_phases: an array of shape (m,) holding the phase in Z_4 of each Pauli.
+    :return: the bits and phases of each C P C^dagger.
+    """
+    symplectic, phases = tableau
+    num_qubits = symplectic.shape[0] // 2
+    symplectic = symplectic.astype(np.int64)
+    pauli_bits = np.asarray(pauli_bits, dtype=np.int64)
+
+    out_bits = pauli_bits @ symplectic % 2
+    # entry (g, h) is the sign picked up when the image of generator h is multiplied onto that of
+    # an earlier generator g
+    reorder = np.triu(symplectic[:, num_qubits:] @ symplectic[:, :num_qubits].T, k=1) % 2
+    signs = np.sum((pauli_bits @ reorder) * pauli_bits, axis=1) % 2
+    out_phases = np.asarray(pauli_phases, dtype=np.int64) + pauli_bits @ phases + 2 * signs
+    return out_bits.astype(np.uint8), (out_phases % 4).astype(np.uint8)
+
+
+def compose_tableaux(first: Tableau, second: Tableau) -> Tableau:
+    """
+    The tableau of the Clifford which applies first and then second.
+
+    :param first: the tableau of the Clifford applied first.
+    :param second: the tableau of the Clifford applied second.
+    :return: the tableau of the composition.
+    """
+    return conjugate_paulis(second, *first)
+
+
+def inverse_tableau(tableau: Tableau) -> Tableau:
+    """
+    The tableau of the inverse of the given Clifford.
+
+    :param tableau: the tableau of a Clifford.
+    :return: the tableau of its inverse.
+    """
+    symplectic, _ = tableau
+    num_qubits = symplectic.shape[0] // 2
+    omega = np.roll(np.eye(2 * num_qubits, dtype=np.int64), num_qubits, axis=1)
+    inv_symplectic = (omega @ symplectic.T.astype(np.int64) @ omega % 2).astype(np.uint8)
+    # start from the Hermitian image of each generator and correct the signs so that composing
+    # with the tableau gives the identity
+    x_dot_z = np.sum(inv_symplectic[:, :num_qubits] & inv_symplectic[:, num_qubits:], axis=1)
+    candidate = (inv_symplectic, (x_dot_z % 4).astype(np.uint8))
+    _, signs = compose_tableaux(candidate, tableau)
+    return inv_symplectic, ((candidate[1] + signs) % 4).astype(np.uint8)
+
+
+@lru_cache(maxsize=4)
+def _pauli_basis_matrices(num_qubits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The bits and matrices of each X^x Z^z on num_qubits qubits, with qubit 0 the rightmost tensor
+    factor as in pyQuil.
+    """
+    single = [np.eye(2), np.array([[0, 1], [1, 0]]), np.diag([1, -1])]
+    bits = np.array([[(idx >> k) & 1 for k in range(2 * num_qubits)]
+                     for idx in range(4 ** num_qubits)], dtype=np.uint8)
+    matrices = []
+    for row in bits:
+        matrix = np.ones((1, 1))
+        for qubit in reversed(range(num_qubits)):
+            factor = np.eye(2)
+            if row[qubit]:
+                factor = factor @ single[1]
+            if row[num_qubits + qubit]:
+                factor = factor @ single[2]
+            matrix = np.kron(matrix, factor)
+        matrices.append(matrix)
+    matrices = np.asarray(matrices)
+    matrices.setflags(write=False)
+    return bits, matrices
+
+
+def tableau_from_unitary(unitary: np.ndarray) -> Tableau:
+    """
+    The tableau of a Clifford unitary.
+
+    :param unitary: a Clifford unitary on n qubits, with qubit 0 the rightmost tensor factor as in
+        pyQuil.
+    :return: the symplectic matrix and phases of the Clifford.
+    """
+    dim = unitary.shape[0]
+    num_qubits = dim.bit_length() - 1
+    bits, matrices = _pauli_basis_matrices(num_qubits)
+    generators = [2 ** gen for gen in range(2 * num_qubits)]
+
+    symplectic = np.zeros((2 * num_qubits, 2 * num_qubits), dtype=np.uint8)
+    phases = np.zeros(2 * num_qubits, dtype=np.uint8)
+    for gen, gen_idx in enumerate(generators):
+        image = unitary @ matrices[gen_idx] @ unitary.conj().T
+        # the coefficient of the image on each element of the (orthogonal) basis
+        coeffs = np.einsum('pij,ij->p', matrices.conj(), image) / dim
+        idx = int(np.argmax(np.abs(coeffs)))
+        if not np.isclose(abs(coeffs[idx]), 1):
+            raise ValueError("The unitary is not a Clifford.")
+        symplectic[gen] = bits[idx]
+        phases[gen] = int(np.round(np.angle(coeffs[idx]) / (pi / 2))) % 4
+    return symplectic, phases
+
+
+@lru_cache(maxsize=GATE_TABLEAU_CACHE_SIZE)
+def _gate_tableau(gate_str: str, num_qubits: int) -> Tableau:
+    """
+    The tableau of a single gate, given as the Quil of the gate acting on qubits 0, ..., k - 1.
+    """
+    symplectic, phases = tableau_from_unitary(program_unitary(Program(gate_str), num_qubits))
+    symplectic.setflags(write=False)
+    phases.setflags(write=False)
+    return symplectic, phases
+
+
+def program_tableau(program: Program, qubits: Sequence[int]) -> Tableau:
+    """
+    The tableau of a Clifford program acting on the given qubits.
+
+    The tableau of each distinct gate is found once from its unitary. The program is then
+    compiled gate by gate: each gate conjugates the images of the generators on its own qubits.
+
+    :param program: a program of Clifford gates.
+    :param qubits: the qubits of the tableau, which must include those of the program. Qubit
+        qubits[j] is represented by the generators X_j and Z_j.
+    :return: the symplectic matrix and phases of the program.
+    """
+    num_qubits = len(qubits)
+    positions = {qubit: position for position, qubit in enumerate(qubits)}
+    symplectic, phases = identity_tableau(num_qubits)
+    for instr in program.instructions:
+        if not isinstance(instr, Gate) or any(qubit.index not in positions
+                                              for qubit in instr.qubits):
+            raise ValueError(f"Cannot find the tableau of the instruction {instr}.")
+        # the gate acting on qubits 0, ..., k - 1
+        gate = Gate(instr.name, instr.params, list(range(len(instr.qubits))))
+        gate.modifiers = list(instr.modifiers)
+        gate_tableau = _gate_tableau(gate.out(), len(instr.qubits))
+
+        gate_positions = [positions[qubit.index] for qubit in instr.qubits]
+        columns = gate_positions + [num_qubits + position for position in gate_positions]
+        gate_bits, gate_phases = conjugate_paulis(gate_tableau, symplectic[:, columns],
+                                                  np.zeros(2 * num_qubits, dtype=np.uint8))
+        symplectic[:, columns] = gate_bits
+        phases = (phases + gate_phases) % 4
+    return symplectic, phases
+
+
+def _pauli_term_to_bits(pauli: PauliTerm, qubits: Sequence[int]) -> Tuple[np.ndarray, int]:
+    """
+    The bits and phase of the Pauli operator of the term, without its coefficient.
+    """
+    num_qubits = len(qubits)
+    bits = np.zeros(2 * num_qubits, dtype=np.uint8)
+    phase = 0
+    for qubit, op in pauli.operations_as_set():
+        position = qubits.index(qubit)
+        bits[position] = op in 'XY'
+        bits[num_qubits + position] = op in 'YZ'
+        # Y = i X Z
+        phase += op == 'Y'
+    return bits, phase % 4
+
+
+def _bits_to_pauli_term(bits: np.ndarray, phase: int, qubits: Sequence[int],
+                        coefficient: complex = 1.) -> PauliTerm:
+    """
+    The PauliTerm of the Hermitian Pauli operator i^phase X^x Z^z times the coefficient.
+    """
+    num_qubits = len(qubits)
+    ops = []
+    for position, qubit in enumerate(qubits):
+        op = {(0, 0): 'I', (1, 0): 'X', (1, 1): 'Y', (0, 1): 'Z'}[
+            (int(bits[position]), int(bits[num_qubits + position]))]
+        if op != 'I':
+            ops.append((op, qubit))
+    # X^x Z^z = i^{-#Y} times the product of the Pauli matrices
+    sign_phase = (int(phase) - sum(op == 'Y' for op, _ in ops)) % 4
+    return PauliTerm.from_list(ops, coefficient * 1j ** sign_phase)
+
+
+def apply_clifford_to_paulis(program: Program, paulis: Sequence[PauliTerm],
+                             benchmarker: Optional[BenchmarkConnection] = None) -> List[PauliTerm]:
+    """
+    Conjugate each pauli by the Clifford program, returning each C P C^dagger.
+
+    The program is compiled into a tableau once, with :py:func:`program_tableau`, and all of the
+    paulis are then conjugated at once with :py:func:`conjugate_paulis`. If the program cannot be
+    compiled, e.g. because it contains an instruction which is not a Clifford gate, each pauli is
+    conjugated by the benchmarker instead.
+
+    :param program: a program of Clifford gates.
+    :param paulis: the PauliTerms to conjugate.
+    :param benchmarker: an optional BenchmarkConnection used when the program cannot be compiled.
+    :return: the conjugated PauliTerms, including the coefficient of each input.
+    """
+    qubits = sorted(set(program.get_qubit_indices()).union(
+        *[pauli.get_qubits() for pauli in paulis]))
+    try:
+        tableau = program_tableau(program, qubits)
+    except ValueError:
+        if benchmarker is None:
+            raise
+        return [benchmarker.apply_clifford_to_pauli(program, pauli) for pauli in paulis]
+
+    if len(paulis) == 0:
+        return []
+    bits, phases = zip(*[_pauli_term_to_bits(pauli, qubits) for pauli in paulis])
+    out_bits, out_phases = conjugate_paulis(tableau, np.asarray(bits), np.asarray(phases))
+    return [_bits_to_pauli_term(pauli_bits, phase, qubits, pauli.coefficient)
+            for pauli_bits, phase, pauli in zip(out_bits, out_phases, paulis)]
+
+
+def apply_clifford_to_pauli(program: Program, pauli: PauliTerm,
+                            benchmarker: Optional[BenchmarkConnection] = None) -> PauliTerm:
+    """
+    Conjugate the pauli by the Clifford program, returning C P C^dagger.
+
+    See :py:func:`apply_clifford_to_paulis`, which should be preferred when conjugating many
+    Paulis by the same program.
+
+    :param program: a program of Clifford gates.
+    :param pauli: the PauliTerm to conjugate.
+    :param benchmarker: an optional BenchmarkConnection used when the program cannot be compiled.
+    :return: the conjugated PauliTerm, including the coefficient of the input.
+    """
+    return apply_clifford_to_paulis(program, [pauli], benchmarker)[0]
+
+
+def _generating_gates(num_qubits: int) -> List[Gate]:
+    """
+    The gates of the RB gateset on qubits 0, ..., num_qubits - 1 that generate the Clifford group,
+    omitting the duplicate RX(-pi) and RZ(-pi).
+    """
+    gates = [gate(angle, qubit) for qubit in range(num_qubits)
+             for angle in [-pi / 2, pi / 2, pi] for gate in [RX, RZ]]
+    if num_qubits == 2:
+        gates.append(CZ(0, 1))
+    return gates
+
+
+def _tableau_key(tableau: Tableau) -> bytes:
+    symplectic, phases = tableau
+    return symplectic.astype(np.uint8).tobytes() + phases.astype(np.uint8).tobytes()
+
+
+class CliffordGroup:
+    """
+    The Clifford group on one or two qubits, modulo global phase.
+
+    Each element is identified by its index, in the order it was found by a breadth first search
+    over the generating gates, so that element 0 is the identity. Each element carries its
+    tableau, a decomposition into the gates of the RB gateset (see
+    :py:func:`~forest.benchmarking.randomized_benchmarking.get_rb_gateset`), and the index of its
+    inverse. Use :py:func:`get_clifford_group` to get the group, which is built once and then
+    loaded from disk.
+    """
+
+    def __init__(self, num_qubits: int, symplectics: np.ndarray, phases: np.ndarray,
+                 words: List[List[int]], inverses: np.ndarray):
+        """
+        :param num_qubits: the number of qubits.
+        :param symplectics: an array of shape (N, 2n, 2n) of the symplectic matrix of each element.
+        :param phases: an array of shape (N, 2n) of the phases of each element.
+        :param words: the indices into the generating gates of the decomposition of each element.
+        :param inverses: the index of the inverse of each element.
+        """
+        self.num_qubits = num_qubits
+        self.symplectics = symplectics
+        self.phases = phases
+        self.words = words
+        self.inverses = inverses
+        self.gates = _generating_gates(num_qubits)
+        self._indices = {_tableau_key(tableau): idx
+                         for idx, tableau in enumerate(zip(symplectics, phases))}
+        self._composition_table = None
+        if len(self) <= MAX_COMPOSITION_TABLE_SIZE:
+            self._composition_table = np.array([[self._compose_tableaux(first, second)
+                                                 for second in range(len(self))]
+                                                for first in range(len(self))])
+
+    def __len__(self):
+        return len(self.words)
+
+    def tableau(self, element: int) -> Tableau:
+        """
+        :param element: the index of an element.
+        :return: the symplectic matrix and phases of the element.
+        """
+        return self.symplectics[element], self.phases[element]
+
+    def index(self, tableau: Tableau) -> int:
+        """
+        :param tableau: the tableau of a Clifford on num_qubits qubits.
+        :return: the index of the element with the given tableau.
+        """
+        return self._indices[_tableau_key(tableau)]
+
+    def index_of_program(self, program: Program, qubits: Sequence[int]) -> int:
+        """
+        :param program: a Clifford program acting on (a subset of) the qubits.
+        :param qubits: the qubits of the group, in order.
+        :return: the index of the element implemented by the program.
+        """
+        return self.index(program_tableau(program, qubits))
+
+    def _compose_tableaux(self, first: int, second: int) -> int:
+        return self.index(compose_tableaux(self.tableau(first), self.tableau(second)))
+
+    def compose(self, first: int, second: int) -> int:
+        """
+        :param first: the index of the element applied first.
+        :param second: the index of the element applied second.
+        :return: the index of the element which applies first and then second.
+        """
+        if self._composition_table is not None:
+            return int(self._composition_table[first, second])
+        return self._compose_tableaux(first, second)
+
+    def inverse(self, element: int) -> int:
+        """
+        :param element: the index of an element.
+        :return: the index of its inverse.
+        """
+        return int(self.inverses[element])
+
+    def program(self, element: int, qubits: Sequence[int]) -> Program:
+        """
+        :param element: the index of an element.
+        :param qubits: the qubits on which the element acts.
+        :return: a program of RB gateset gates implementing the element on the qubits.
+        """
+        program = Program()
+        for gate_idx in self.words[element]:
+            gate = self.gates[gate_idx]
+            program += Gate(gate.name, gate.params, [qubits[q.index] for q in gate.qubits])
+        return program
+
+    @classmethod
+    def build(cls, num_qubits: int) -> 'CliffordGroup':
+        """
+        Enumerate the group by a breadth first search over the generating gates, so that each
+        element is decomposed into as few gates as possible.
+
+        :param num_qubits: the number of qubits, 1 or 2.
+        :return: the Clifford group.
+        """
+        gate_tableaux = [program_tableau(Program(gate), list(range(num_qubits)))
+                         for gate in _generating_gates(num_qubits)]
+
+        size = 2 * num_qubits
+        identity = identity_tableau(num_qubits)
+        symplectics, phases = [identity[0]], [identity[1]]
+        words = [[]]
+        indices = {_tableau_key(identity): 0}
+        frontier = [0]
+        while frontier:
+            # the rows of the tableaux of the frontier, stacked into one batch of Paulis
+            frontier_bits = np.concatenate([symplectics[idx] for idx in frontier])
+            frontier_phases = np.concatenate([phases[idx] for idx in frontier])
+            new_frontier = []
+            for gate_idx, gate_tableau in enumerate(gate_tableaux):
+                # apply each frontier element and then the gate
+                new_bits, new_phases = conjugate_paulis(gate_tableau, frontier_bits,
+                                                        frontier_phases)
+                for parent, symplectic, phase in zip(frontier, new_bits.reshape(-1, size, size),
+                                                     new_phases.reshape(-1, size)):
+                    key = _tableau_key((symplectic, phase))
+                    if key not in indices:
+                        indices[key] = len(words)
+                        words.append(words[parent] + [gate_idx])
+                        symplectics.append(symplectic)
+                        phases.append(phase)
+                        new_frontier.append(indices[key])
+            frontier = new_frontier
+
+        symplectics = np.asarray(symplectics)
+        phases = np.asarray(phases)
+        inverses = np.array([indices[_tableau_key(inverse_tableau(tableau))]
+                             for tableau in zip(symplectics, phases)])
+        return cls(num_qubits, symplectics, phases, words, inverses)
+
+    def save(self, filename: str):
+        """
+        Store the group in an npz file, see :py:meth:`load`.
+
+        :param filename: the name of the file.
+        """
+        max_len = max(len(word) for word in self.words)
+        words = np.full((len(self), max_len), -1, dtype=np.int64)
+        for idx, word in enumerate(self.words):
+            words[idx, :len(word)] = word
+        np.savez_compressed(filename, num_qubits=self.num_qubits, symplectics=self.symplectics,
+                            phases=self.phases, words=words, inverses=self.inverses)
+
+    @classmethod
+    def load(cls, filename: str) -> 'CliffordGroup':
+        """
+        Load a group stored by :py:meth:`save`.
+
+        :param filename: the name of the file.
+        :return: the Clifford group.
+        """
+        with np.load(filename) as data:
+            words = [[int(gate_idx) for gate_idx in word if gate_idx >= 0]
+                     for word in data['words']]
+            return cls(int(data['num_qubits']), data['symplectics'], data['phases'], words,
+                       data['inverses'])
+
+
+@lru_cache(maxsize=2)
+def get_clifford_group(num_qubits: int, cache_dir: Optional[str] = CLIFFORD_CACHE_DIR) \
+        -> CliffordGroup:
+    """
+    The Clifford group on num_qubits qubits, loaded from cache_dir if it has been built before.
+
+    The one qubit group has 24 elements and takes milliseconds to build; the two qubit group has
+    11520 elements and takes a few seconds, after which it is stored in cache_dir.
+
+    :param num_qubits: the number of qubits, 1 or 2.
+    :param cache_dir: the directory in which the group is stored. If None the group is built
+        without being stored. A stored group that cannot be read is rebuilt and stored again.
+    :return: the Clifford group.
+    """
+    if num_qubits not in [1, 2]:
+        raise ValueError("The Clifford group is only available on one or two qubits.")
+
+    filename = None
+    if cache_dir is not None:
+        filename = os.path.join(cache_dir, f'clifford_group_{num_qubits}q_'
+                                           f'v{_CACHE_FORMAT_VERSION}.npz')
+        if os.path.exists(filename):
+            try:
+                return CliffordGroup.load(filename)
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+                warnings.warn(f"Could not load the Clifford group from {filename}, so it is "
+                              f"rebuilt: {e}")
+
+    group = CliffordGroup.build(num_qubits)
+    if filename is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # write to a unique file and then rename it, so that readers never see a partial file
+            with tempfile.NamedTemporaryFile(dir=cache_dir, suffix='.npz', delete=False) as f:
+                temp_name = f.name
+            try:
+                group.save(temp_name)
+                os.replace(temp_name, filename)
+            except BaseException:
+                os.remove(temp_name)
+                raise
+        except OSError as e:
+            warnings.warn(f"Could not store the Clifford group in {cache_dir}: {e}")
+    return group
+
+
+def generate_local_rb_sequence(qubits: Sequence[int], depth: int,
+                               interleaved_gate: Optional[Program] = None,
+                               random_seed: Optional[int] = None,
+                               cache_dir: Optional[str] = CLIFFORD_CACHE_DIR) -> List[Program]:
+    """
+    Generate a self-inverting randomized benchmarking sequence of depth Cliffords on one or two
+    qubits, without a BenchmarkConnection.
+
+    The first depth - 1 Cliffords are drawn uniformly at random and the last is the inverse of
+    their composition. If an interleaved_gate is given it is appended to each of the first
+    depth - 1 Cliffords, and included in the composition that is inverted.
+
+    :param qubits: the qubits on which the sequence acts.
+    :param depth: the total number of Cliffords in the sequence, including the inverse.
+    :param interleaved_gate: an optional Clifford program on (a subset of) the qubits, see [IRB]_
+    :param random_seed: a seed for the random choice of Cliffords.
+    :param cache_dir: the directory in which the Clifford group is stored, see
+        :py:func:`get_clifford_group`.
+    :return: a list of depth programs of RB gateset gates.
+    """
+    group = get_clifford_group(len(qubits), cache_dir)
+    rs = np.random.default_rng(random_seed)
+    interleaved = None
+    if interleaved_gate is not None:
+        interleaved = group.index_of_program(interleaved_gate, qubits)
+
+    programs = []
+    net = 0
+    for element in rs.integers(len(group), size=depth - 1):
+        net = group.compose(net, int(element))
+        program = group.program(int(element), qubits)
+        if interleaved is not None:
+            net = group.compose(net, interleaved)
+            program += interleaved_gate
+        programs.append(program)
+    programs.append(group.program(group.inverse(net), qubits))
+    return programs
@@ -1,12 +1,23 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
 from math import pi
 
 import numpy as np
-from typing import Tuple
+from typing import Tuple, Any, Optional
 
+from pyquil.api import QuantumComputer
 from pyquil.gates import RX, RZ, CZ, I, XY
 from pyquil.quil import Program
 from pyquil.quilbase import Gate
 
+log = logging.getLogger(__name__)
+
 
 # This function is taken from cirq. License: apache 2.
 def match_global_phase(a: np.ndarray,
@@ -260,3 +271,202 @@ def basic_compile(program: Program):
         'topological_swaps': 0,
     }
     return new_prog
+
+
+class ExecutableCache:
+    """
+    A cache of compiled executables keyed by the content of the program.
+
+    Acquisition routines often compile programs that are identical to ones compiled shortly
+    before, e.g. the calibration program for a given observable, or a fixed set of RB sequences
+    that is re-run on a schedule. Passing the same ExecutableCache to these routines means each
+    distinct program is only compiled once.
+
+    The key of each executable is a hash of the Quil text of the program, its number of shots,
+    the instruction set architecture (ISA) targeted by the qc's compiler, and the compilation
+    function used (so that e.g. programs compiled with :py:func:`basic_compile` are not confused
+    with those compiled by quilc). The most recently used executables are held in memory, up to
+    max_size of them. If a cache_dir is given, executables are additionally pickled to that
+    directory so that they can be reused across sessions; the least recently used files are
+    deleted once there are more than max_disk_entries.
+
+    .. warning::
+        Files in cache_dir are loaded with :py:mod:`pickle`, and unpickling data can execute
+        arbitrary code. Only use a cache_dir that is writable by you alone, never one shared with
+        other users or populated from an untrusted source.
+
+    The attributes hits, misses, and disk_hits count lookups of the cache. disk_hits are
+    included in the hits.
+    """
+
+    def __init__(self, max_size: int = 1024, cache_dir: Optional[str] = None,
+                 max_disk_entries: int = 10_000):
+        """
+        :param max_size: the maximum number of executables held in memory.
+        :param cache_dir: an optional directory in which to persist the executables. Its files
+            are unpickled, so it must not be writable by anyone untrusted.
+        :param max_disk_entries: the maximum number of executables persisted in cache_dir.
+        """
+        if max_size < 1:
+            raise ValueError('The cache must be able to hold at least one executable.')
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._executables = OrderedDict()
+        # executables may be compiled in a background thread, see estimate_observables
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._executables)
+
+    def __contains__(self, key):
+        return key in self._executables
+
+    def key(self, qc: QuantumComputer, program: Program, to_native_quil: bool = True) -> str:
+        """
+        The key under which the executable for the given program would be stored.
+
+        :param qc: the quantum computer whose compiler would compile the program.
+        :param program: the program to be compiled.
+        :param to_native_quil: whether compilation includes the quil_to_native_quil step.
+        :return: a hex digest identifying the compiled program.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(program.out().encode())
+        hasher.update(f'num_shots={program.num_shots}'.encode())
+        hasher.update(_compilation_target(qc).encode())
+        if to_native_quil:
+            native = qc.compiler.quil_to_native_quil
+            hasher.update(f'{getattr(native, "__module__", "")}.'
+                          f'{getattr(native, "__qualname__", type(native).__name__)}'.encode())
+        return hasher.hexdigest()
+
+    def compile(self, qc: QuantumComputer, program: Program, to_native_quil: bool = True) -> Any:
+        """
+        Get the executable for the given program, compiling it with the qc's compiler if it has
+        not been compiled before.
+
+        :param qc: the quantum computer whose compiler is used to compile the program.
+        :param program: the program to be compiled.
+        :param to_native_quil: if true, first compile the program to native quil with
+            qc.compiler.quil_to_native_quil, otherwise the program is assumed to be native quil
+            already, as for e.g. parametric programs.
+        :return: an executable for the program that can be passed to qc.run
+        """
+        key = self.key(qc, program, to_native_quil)
+        with self._lock:
+            if key in self._executables:
+                self.hits += 1
+                self._executables.move_to_end(key)
+                return self._executables[key]
+
+            executable = self._load(key)
+            if executable is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._insert(key, executable)
+                return executable
+
+            self.misses += 1
+
+        if to_native_quil:
+            program = qc.compiler.quil_to_native_quil(program)
+        executable = qc.compiler.native_quil_to_executable(program)
+
+        with self._lock:
+            self._insert(key, executable)
+            self._store(key, executable)
+        return executable
+
+    def clear(self, include_disk: bool = False):
+        """
+        Remove all executables from memory, and optionally from the cache_dir, and reset the
+        counters.
+        """
+        with self._lock:
+            self._executables.clear()
+            self.hits = self.misses = self.disk_hits = 0
+            if include_disk and self.cache_dir is not None:
+                for fn in self._disk_files():
+                    os.remove(fn)
+
+    def _insert(self, key, executable):
+        self._executables[key] = executable
+        self._executables.move_to_end(key)
+        while len(self._executables) > self.max_size:
+            self._executables.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def _disk_files(self):
+        return [os.path.join(self.cache_dir, fn) for fn in os.listdir(self.cache_dir)
+                if fn.endswith('.pkl')]
+
+    def _load(self, key):
+        if self.cache_dir is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                executable = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            log.warning(f'Ignoring unreadable cached executable {self._path(key)}: {e}')
+            return None
+        # mark as recently used for eviction from disk
+        os.utime(self._path(key))
+        return executable
+
+    def _store(self, key, executable):
+        if self.cache_dir is None:
+            return
+        try:
+            data = pickle.dumps(executable)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            log.warning(f'Executable could not be persisted to the cache directory: {e}')
+            return
+        # write to a unique temporary file first so that concurrent readers never see partial
+        # files and concurrent writers of the same executable do not share a file
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            f.write(data)
+        try:
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            os.remove(tmp_path)
+            log.warning(f'Executable could not be persisted to the cache directory: {e}')
+            return
+
+        files = self._disk_files()
+        if len(files) > self.max_disk_entries:
+            mtimes = {}
+            for fn in files:
+                try:
+                    mtimes[fn] = os.path.getmtime(fn)
+                except FileNotFoundError:
+                    # already removed by another process
+                    pass
+            files = sorted(mtimes, key=mtimes.get)
+            for fn in files[:len(files) - self.max_disk_entries]:
+                try:
+                    os.remove(fn)
+                except FileNotFoundError:
+                    pass
+
+
+def _compilation_target(qc: QuantumComputer) -> str:
+    """
+    A string description of the ISA targeted by the compiler of the given qc.
+    """
+    try:
+        isa = qc.compiler.quantum_processor.to_compiler_isa()
+    except (AttributeError, NotImplementedError):
+        # fall back to the name of the qc if its compiler has no processor with an ISA; any other
+        # error is raised rather than keying executables for a changed device by its name alone
+        return str(qc.name)
+    return json.dumps(isa.dict(), sort_keys=True, default=str)
@@ -1,14 +1,21 @@
 import functools
 import itertools
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
+from numpy.random import Generator
 
 from pyquil import Program
 from pyquil.api import BenchmarkConnection, QuantumComputer
-from forest.benchmarking.observable_estimation import ExperimentResult, ExperimentSetting, \
-    ObservablesExperiment, TensorProductState, estimate_observables, \
+from pyquil.quilbase import Gate
+from pyquil.simulation.tools import program_unitary
+from forest.benchmarking.cliffords import apply_clifford_to_paulis
+from forest.benchmarking.compilation import ExecutableCache
+from forest.benchmarking.observable_estimation import CalibrationCache, ExperimentResult, \
+    ExperimentSetting, ObservablesExperiment, TensorProductState, estimate_observables, \
     calibrate_observable_estimates, group_settings, _OneQState, zeros_state
+from forest.benchmarking.operator_tools.superoperator_transformations import \
+    kraus2pauli_liouville, operator2pauli_vector
 from forest.benchmarking.utils import str_to_pauli_term, all_traceless_pauli_z_terms
 
 
@@ -35,7 +42,8 @@ def generate_exhaustive_process_dfe_experiment(benchmarker: BenchmarkConnection,
             https://arxiv.org/abs/1104.4695
 
     :param benchmarker: object returned from pyquil.api.get_benchmarker() used to conjugate each
-        Pauli by the Clifford program
+        Pauli by the Clifford program if this cannot be done locally; see
+        :py:func:`~forest.benchmarking.cliffords.apply_clifford_to_paulis`
     :param program: A program comprised of Clifford group gates that defines the process for
         which we estimate the fidelity.
     :param qubits: The qubits to perform DFE on. This can be a superset of the qubits
@@ -45,10 +53,12 @@ def generate_exhaustive_process_dfe_experiment(benchmarker: BenchmarkConnection,
     """
     settings = []
     # generate all n-qubit pauli strings but skip the first all identity term
-    for pauli_labels in [''.join(x) for x in itertools.product('IXYZ', repeat=len(qubits))][1:]:
-        # calculate the appropriate output pauli from applying the ideal program to the Pauli
-        observable = benchmarker.apply_clifford_to_pauli(program,
-                                                         str_to_pauli_term(pauli_labels, qubits))
+    all_pauli_labels = [''.join(x) for x in itertools.product('IXYZ', repeat=len(qubits))][1:]
+    # calculate the appropriate output paulis from applying the ideal program to each Pauli
+    observables = apply_clifford_to_paulis(program, [str_to_pauli_term(pauli_labels, qubits)
+                                                     for pauli_labels in all_pauli_labels],
+                                           benchmarker)
+    for pauli_labels, observable in zip(all_pauli_labels, observables):
         # keep track of non-identity terms that may have a sign contribution
         non_identity_idx = [0 if label == 'I' else 1 for label in pauli_labels]
         # now replace the identities with Z terms, so they can be decomposed into Z eigenstates
@@ -77,7 +87,8 @@ def generate_exhaustive_state_dfe_experiment(benchmarker: BenchmarkConnection, p
     The algorithm is due to [DFE1]_ and [DFE2]_.
 
     :param benchmarker: object returned from pyquil.api.get_benchmarker() used to conjugate each
-        Pauli by the Clifford program
+        Pauli by the Clifford program if this cannot be done locally; see
+        :py:func:`~forest.benchmarking.cliffords.apply_clifford_to_paulis`
     :param program: A program comprised of Clifford group gates that constructs a state
         for which we estimate the fidelity.
     :param qubits: The qubits to perform DFE on. This can be a superset of the qubits
@@ -88,14 +99,61 @@ def generate_exhaustive_state_dfe_experiment(benchmarker: BenchmarkConnection, p
     # measure all of the traceless combinations of I and Z on the qubits conjugated by the ideal
     # Clifford state preparation program. The in_state is all the all zero state since this is
     # the assumed initialization of the state preparation.
-    settings = [ExperimentSetting(in_state=zeros_state(qubits),
-                                  observable=benchmarker.apply_clifford_to_pauli(program, iz_pauli))
-                for iz_pauli in all_traceless_pauli_z_terms(qubits)]
+    observables = apply_clifford_to_paulis(program, all_traceless_pauli_z_terms(qubits),
+                                           benchmarker)
+    settings = [ExperimentSetting(in_state=zeros_state(qubits), observable=observable)
+                for observable in observables]
     return ObservablesExperiment(settings, program=program)
 
 
+def _random_integers(rs: Optional[Generator], high: int, size: Tuple[int, ...]) -> np.ndarray:
+    """
+    Draw integers in [0, high) from rs, or from numpy's global random state if rs is None so that
+    seeding np.random makes the experiments reproducible.
+    """
+    if rs is None:
+        return np.random.randint(high, size=size)
+    return rs.integers(high, size=size)
+
+
+def _sample_non_identity_paulis(n_terms: int, num_qubits: int, labels: str,
+                                rs: Optional[Generator]) -> np.ndarray:
+    """
+    Sample n_terms rows of indices into labels, one per qubit, none of which are all 0, i.e.
+    all identity. All rows are drawn at once, and the all identity rows are redrawn in bulk.
+    """
+    pauli_idxs = _random_integers(rs, len(labels), (n_terms, num_qubits))
+    trivial = ~pauli_idxs.any(axis=1)
+    while trivial.any():
+        pauli_idxs[trivial] = _random_integers(rs, len(labels), (np.sum(trivial), num_qubits))
+        trivial = ~pauli_idxs.any(axis=1)
+    return pauli_idxs
+
+
+def _pauli_eigenstates(pauli_strs: Sequence[str], eigenstates: np.ndarray,
+                       qubits: Sequence[int]) -> Tuple[List[TensorProductState], np.ndarray]:
+    """
+    The tensor product eigenstates of each Pauli string, where the identities are replaced by Z,
+    along with the sign of the eigenvalue of each state for the original Pauli.
+
+    :param pauli_strs: the Pauli strings, with the j-th label acting on qubits[j]
+    :param eigenstates: an array of shape (len(pauli_strs), len(qubits)) holding the index of
+        the one qubit eigenstate on each qubit, 0 for the +1 eigenstate and 1 for the -1 eigenstate.
+    :param qubits: the qubits of the states
+    :return: the states and the array of ±1 signs
+    """
+    non_identity = np.array([[label != 'I' for label in pauli_str] for pauli_str in pauli_strs])
+    # only keep track of minus eigenstates associated to non-identity Paulis
+    signs = (-1) ** np.sum(eigenstates * non_identity, axis=1)
+    states = [TensorProductState(_OneQState('Z' if label == 'I' else label, int(s), q)
+                                 for label, s, q in zip(pauli_str, eigenstate, qubits))
+              for pauli_str, eigenstate in zip(pauli_strs, eigenstates)]
+    return states, signs
+
+
 def generate_monte_carlo_state_dfe_experiment(benchmarker: BenchmarkConnection, program: Program,
-                                              qubits: List[int], n_terms=200) \
+                                              qubits: List[int], n_terms=200,
+                                              rs: Optional[Generator] = None) \
         -> ObservablesExperiment:
     """
     Estimate state fidelity by sampled direct fidelity estimation.
@@ -112,25 +170,25 @@ def generate_monte_carlo_state_dfe_experiment(benchmarker: BenchmarkConnection,
     :param benchmarker: The `BenchmarkConnection` object used to design experiments
     :param n_terms: Number of randomly chosen observables to measure. This number should be a
         constant less than ``2**len(qubits)``, otherwise ``exhaustive_state_dfe`` is more efficient.
+    :param rs: Optional numpy random Generator used to sample the observables. If None,
+        numpy's global random state is used.
     :return: an ObservablesExperiment that constitutes a state DFE experiment.
     """
-    # pick n_terms different random combinations of I and Z on the qubits
-    rand_iz_paulis = np.random.choice(['I', 'Z'], size=(n_terms, len(qubits)))
+    # pick n_terms different random non-trivial combinations of I and Z on the qubits
+    iz_idxs = _sample_non_identity_paulis(n_terms, len(qubits), 'IZ', rs)
+    iz_paulis = [str_to_pauli_term(''.join(iz_pauli), qubits)
+                 for iz_pauli in np.array(['I', 'Z'])[iz_idxs]]
 
-    settings = []
-    for iz_pauli in rand_iz_paulis:
-        # sample a new state if this one is all identity
-        while 'Z' not in iz_pauli:
-            iz_pauli = np.random.choice(['I', 'Z'], size=len(qubits))
-        # conjugate the non-trivial iz Pauli by the ideal state prep program
-        obs = benchmarker.apply_clifford_to_pauli(program, str_to_pauli_term(''.join(iz_pauli)))
-        settings.append(ExperimentSetting(zeros_state(qubits), obs))
+    # conjugate the non-trivial iz Paulis by the ideal state prep program
+    settings = [ExperimentSetting(zeros_state(qubits), obs)
+                for obs in apply_clifford_to_paulis(program, iz_paulis, benchmarker)]
 
     return ObservablesExperiment(settings, program=program)
 
 
 def generate_monte_carlo_process_dfe_experiment(benchmarker: BenchmarkConnection, program: Program,
-                                                qubits: List[int], n_terms: int = 200) \
+                                                qubits: List[int], n_terms: int = 200,
+                                                rs: Optional[Generator] = None) \
         -> ObservablesExperiment:
     """
     Estimate process fidelity by randomly sampled direct fidelity estimation.
@@ -148,44 +206,145 @@ def generate_monte_carlo_process_dfe_experiment(benchmarker: BenchmarkConnection
     :param n_terms: Number of randomly chosen observables to measure. This number should be a
         constant less than ``2**len(qubits)``, otherwise ``exhaustive_process_dfe`` is more
         efficient.
+    :param rs: Optional numpy random Generator used to sample the Paulis and their eigenstates.
+        If None, numpy's global random state is used.
     :return: an ObservablesExperiment that constitutes a process DFE experiment.
     """
-    single_q_paulis = ['I', 'X', 'Y', 'Z']
-    # pick n_terms different random combinations of I, X, Y, Z on the qubits
-    rand_paulis = np.random.randint(len(single_q_paulis), size=(n_terms, len(qubits)))
+    # pick n_terms different random non-trivial combinations of I, X, Y, Z on the qubits
+    pauli_idxs = _sample_non_identity_paulis(n_terms, len(qubits), 'IXYZ', rs)
+    pauli_strs = [''.join(labels) for labels in np.array(['I', 'X', 'Y', 'Z'])[pauli_idxs]]
+    # randomly pick between ±1 eigenstates of each Pauli
+    eigenstates = _random_integers(rs, 2, pauli_idxs.shape)
+    in_states, signs = _pauli_eigenstates(pauli_strs, eigenstates, qubits)
+
+    # calculate the appropriate output paulis from applying the ideal program to each Pauli, and
+    # make each observable negative if its in_state is a negative eigenstate
+    observables = apply_clifford_to_paulis(program, [str_to_pauli_term(pauli_str, qubits)
+                                                     for pauli_str in pauli_strs], benchmarker)
+    settings = [ExperimentSetting(in_state=in_state, observable=observable * int(sign))
+                for in_state, observable, sign in zip(in_states, observables, signs)]
 
-    settings = []
-    for pauli_idxs in rand_paulis:
-        # sample a new state if this one is all identity
-        while sum(pauli_idxs) == 0:
-            pauli_idxs = np.random.randint(len(single_q_paulis), size=len(qubits))
-        # convert from indices to string
-        pauli_str = ''.join([single_q_paulis[idx] for idx in pauli_idxs])
-        # convert from string to PauliTerm on appropriate qubits
-        pauli = str_to_pauli_term(pauli_str, qubits)
-        # calculate the appropriate output pauli from applying the ideal program to the Pauli
-        observable = benchmarker.apply_clifford_to_pauli(program, pauli)
+    return ObservablesExperiment(settings, program=program)
 
-        # now replace the identities with Z terms, so they can be decomposed into Z eigenstates
-        state_labels = ['Z' if label == 'I' else label for label in pauli_str]
-
-        # randomly pick between ±1 eigenstates of each Pauli
-        eigenstate = np.random.randint(2, size=len(qubits))
-        in_state = TensorProductState(_OneQState(l, s, q) for l, s, q in zip(state_labels,
-                                                                             eigenstate, qubits))
-        # make the observable negative if the in_state is a negative eigenstate
-        # only keep track of minus eigenstates associated to non-identity Paulis, i.e. idx >= 1
-        sign_contribution = (-1) ** np.dot(eigenstate, [min(1, idx) for idx in pauli_idxs])
-        settings.append(ExperimentSetting(in_state=in_state,
-                                          observable=observable * sign_contribution))
 
+def _target_unitary(program: Program, qubits: Sequence[int]) -> np.ndarray:
+    """
+    The unitary of the program on the given qubits, with qubits[0] the rightmost tensor factor.
+    """
+    positions = {qubit: position for position, qubit in enumerate(qubits)}
+    relabeled = program.copy_everything_except_instructions()
+    for instr in program.instructions:
+        if not isinstance(instr, Gate) or any(qubit.index not in positions
+                                              for qubit in instr.qubits):
+            raise ValueError(f"Cannot find the unitary of the instruction {instr} on the qubits "
+                             f"{qubits}.")
+        gate = Gate(instr.name, instr.params, [positions[qubit.index] for qubit in instr.qubits])
+        gate.modifiers = list(instr.modifiers)
+        relabeled += gate
+    return program_unitary(relabeled, len(qubits))
+
+
+def _sample_pauli_weights(weights: np.ndarray, n_terms: int,
+                          rs: Optional[Generator]) -> np.ndarray:
+    """
+    Sample n_terms indices, other than the first (the identity), with probability proportional
+    to the square of their weight.
+    """
+    probs = np.abs(weights) ** 2
+    probs[0] = 0
+    return (np.random if rs is None else rs).choice(len(probs), size=n_terms,
+                                                    p=probs / np.sum(probs))
+
+
+def generate_importance_sampled_state_dfe_experiment(program: Program, qubits: List[int],
+                                                     n_terms: int = 200,
+                                                     rs: Optional[Generator] = None) \
+        -> ObservablesExperiment:
+    """
+    Estimate the state fidelity to an arbitrary pure state by importance sampled direct
+    fidelity estimation.
+
+    Following [DFE2]_, each non-identity Pauli P is sampled with probability proportional to
+    the square of its characteristic coefficient tr(ρ P) for the ideal state ρ, and its
+    observable is weighted by 1 / tr(ρ P). The expectation of each observable is then an
+    unbiased estimate of the fidelity conditioned on not sampling the identity, so that the
+    results can be analysed with :py:func:`estimate_dfe` exactly as for a Clifford state.
+
+    The ideal state is found by simulating the program, so this is limited to a handful of
+    qubits.
+
+    :param program: A program comprised of gates that constructs a state for which we estimate
+        the fidelity. This need not be a Clifford.
+    :param qubits: The qubits to perform DFE on. This can be a superset of the qubits
+        used in ``program``, in which case it is assumed the identity acts on these qubits.
+        Note that we assume qubits are initialized to the ``|0>`` state.
+    :param n_terms: Number of randomly chosen observables to measure.
+    :param rs: Optional numpy random Generator used to sample the observables. If None,
+        numpy's global random state is used.
+    :return: an ObservablesExperiment that constitutes a state DFE experiment.
+    """
+    state = _target_unitary(program, qubits)[:, [0]]
+    # tr(ρ P) for each Pauli P, where the i-th label of each Pauli acts on the i-th tensor factor
+    characteristic = (2 ** len(qubits) * operator2pauli_vector(state @ state.conj().T)).real
+    characteristic = characteristic.ravel()
+    labels = [''.join(x) for x in itertools.product('IXYZ', repeat=len(qubits))]
+
+    settings = [ExperimentSetting(zeros_state(qubits),
+                                  str_to_pauli_term(labels[idx], qubits[::-1])
+                                  * (1 / characteristic[idx]))
+                for idx in _sample_pauli_weights(characteristic, n_terms, rs)]
+    return ObservablesExperiment(settings, program=program)
+
+
+def generate_importance_sampled_process_dfe_experiment(program: Program, qubits: List[int],
+                                                       n_terms: int = 200,
+                                                       rs: Optional[Generator] = None) \
+        -> ObservablesExperiment:
+    """
+    Estimate the process fidelity to an arbitrary unitary by importance sampled direct fidelity
+    estimation.
+
+    Following [DFE2]_, each non-identity pair of an input Pauli P and an output Pauli Q is
+    sampled with probability proportional to the square of the Pauli transfer matrix element
+    R_QP = tr(Q U P U^dagger) / d of the ideal unitary U. An eigenstate of P is prepared with
+    random signs as in :py:func:`generate_monte_carlo_process_dfe_experiment`, and the
+    observable Q is weighted by 1 / R_QP, so that the results can be analysed with
+    :py:func:`estimate_dfe` exactly as for a Clifford process.
+
+    The Pauli transfer matrix is found by simulating the program, so this is limited to a
+    handful of qubits.
+
+    :param program: A program comprised of gates that defines the process for which we estimate
+        the fidelity. This need not be a Clifford.
+    :param qubits: The qubits to perform DFE on. This can be a superset of the qubits
+        used in ``program``, in which case it is assumed the identity acts on these qubits.
+    :param n_terms: Number of randomly chosen settings to measure.
+    :param rs: Optional numpy random Generator used to sample the Paulis and their eigenstates.
+        If None, numpy's global random state is used.
+    :return: an ObservablesExperiment that constitutes a process DFE experiment.
+    """
+    ptm = kraus2pauli_liouville(_target_unitary(program, qubits)).real
+    labels = [''.join(x) for x in itertools.product('IXYZ', repeat=len(qubits))]
+    out_idxs, in_idxs = np.divmod(_sample_pauli_weights(ptm.ravel(), n_terms, rs), len(labels))
+
+    # the labels act on the qubits in reverse order
+    in_states, signs = _pauli_eigenstates([labels[idx][::-1] for idx in in_idxs],
+                                          _random_integers(rs, 2, (n_terms, len(qubits))),
+                                          qubits)
+    settings = [ExperimentSetting(in_state=in_state,
+                                  observable=str_to_pauli_term(labels[out_idx], qubits[::-1])
+                                  * (sign / ptm[out_idx, in_idx]))
+                for in_state, sign, out_idx, in_idx in zip(in_states, signs, out_idxs, in_idxs)]
     return ObservablesExperiment(settings, program=program)
 
 
 def acquire_dfe_data(qc: QuantumComputer, expt: ObservablesExperiment, num_shots: int = 10_000,
                      active_reset: bool = False, symm_type: int = -1,
                      calibrate_observables: bool = True,
-                     show_progress_bar: bool = False) -> List[ExperimentResult]:
+                     show_progress_bar: bool = False,
+                     max_in_flight: int = 0,
+                     executable_cache: ExecutableCache = None,
+                     calibration_cache: CalibrationCache = None) -> List[ExperimentResult]:
     """
     Acquire data necessary for direct fidelity estimate (DFE).
 
@@ -208,15 +367,27 @@ def acquire_dfe_data(qc: QuantumComputer, expt: ObservablesExperiment, num_shots
         Likely, for the best (although slowest) results, symmetrization type should accommodate the
         maximum weight of any observable estimated.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param max_in_flight: if positive, programs are compiled up to this many programs ahead of
+        the one running on the qc; see
+        :py:func:`~forest.benchmarking.observable_estimation.estimate_observables`
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
+    :param calibration_cache: an optional cache of calibrations, shared across calls, from which
+        unexpired calibrations are reused. See
+        :py:class:`~forest.benchmarking.observable_estimation.CalibrationCache`
     :return: results from running the given DFE experiment. These can be passed to estimate_dfe
     """
     res = list(estimate_observables(qc, expt, num_shots=num_shots,
                                     symm_type=symm_type,
                                     active_reset=active_reset,
-                                    show_progress_bar=show_progress_bar))
+                                    show_progress_bar=show_progress_bar,
+                                    max_in_flight=max_in_flight,
+                                    executable_cache=executable_cache))
     if calibrate_observables:
         res = list(calibrate_observable_estimates(qc, res, num_shots=num_shots,
-                                                  symm_type=symm_type, active_reset=active_reset))
+                                                  symm_type=symm_type, active_reset=active_reset,
+                                                  executable_cache=executable_cache,
+                                                  calibration_cache=calibration_cache))
 
     return res
 
@@ -265,11 +436,30 @@ def estimate_dfe(results: List[ExperimentResult], kind: str) -> Tuple[float, flo
     :param kind: A string describing the kind of DFE data being analysed ('state' or 'process')
     :return: the estimate of the mean fidelity along with the associated standard err
     """
-    # identify the qubits being measured
-    qubits = list(functools.reduce(lambda x, y: set(x) | set(y),
-                                   [res.setting.observable.get_qubits() for res in results]))
+    # identify the qubits being prepared and measured
+    qubits = functools.reduce(lambda x, y: x | y,
+                              [set(res.setting.observable.get_qubits())
+                               | {oneq_state.qubit for oneq_state in res.setting.in_state}
+                               for res in results])
+
+    expectations = np.asarray([res.expectation for res in results])
+    std_errs = np.asarray([res.std_err for res in results])
+    return estimate_dfe_from_arrays(expectations, std_errs, len(qubits), kind)
+
+
+def estimate_dfe_from_arrays(expectations: np.ndarray, std_errs: np.ndarray, num_qubits: int,
+                             kind: str) -> Tuple[float, float]:
+    """
+    Estimate the fidelity from arrays of the expectations and standard errors of the sampled
+    (non-identity) DFE settings; see :py:func:`estimate_dfe`.
 
-    d = 2 ** len(qubits)
+    :param expectations: an array of the estimated expectation of each setting
+    :param std_errs: an array of the standard error of each expectation
+    :param num_qubits: the number of qubits the state or process acts on
+    :param kind: A string describing the kind of DFE data being analysed ('state' or 'process')
+    :return: the estimate of the mean fidelity along with the associated standard err
+    """
+    d = 2 ** num_qubits
 
     # The subtlety in estimating the fidelity from a set of expectations of Pauli operators is that
     # it is essential to include the expectation of the identity in the calculation -- without it
@@ -288,19 +478,20 @@ def estimate_dfe(results: List[ExperimentResult], kind: str) -> Tuple[float, flo
     # of non-trivial Paulis that are sampled must be weighted by (d-1)/d (for states) or (
     # d**2-1)/d**2 (for processes). Similarly, variance estimates must be scaled appropriately.
 
-    expectations = [res.expectation for res in results]
-    std_errs = np.asarray([res.std_err for res in results])
+    expectations = np.asarray(expectations, dtype=float)
+    std_errs = np.asarray(std_errs, dtype=float)
+    num_terms = len(expectations)
 
     if kind.lower() == 'state':
         # introduce bias due to measuring the identity
         mean_est = (d - 1) / d * np.mean(expectations) + 1.0 / d
-        var_est = (d - 1) ** 2 / d ** 2 * np.sum(std_errs ** 2) / len(expectations) ** 2
+        var_est = (d - 1) ** 2 / d ** 2 * np.sum(std_errs ** 2) / num_terms ** 2
     elif kind.lower() == 'process':
         # introduce bias due to measuring the identity
         p_mean = (d ** 2 - 1) / d ** 2 * np.mean(expectations) + 1.0 / d ** 2
         mean_est = (d ** 2 * p_mean + d) / (d ** 2 + d)
-        var_est = d ** 2 / (d + 1) ** 2 * (d ** 2 - 1) ** 2 / d ** 4 * np.sum(std_errs ** 2) / len(
-            expectations) ** 2
+        var_est = d ** 2 / (d + 1) ** 2 * (d ** 2 - 1) ** 2 / d ** 4 * np.sum(std_errs ** 2) \
+            / num_terms ** 2
     else:
         raise ValueError('Kind can only be \'state\' or \'process\'.')
 
@@ -311,7 +502,7 @@ def do_dfe(qc: QuantumComputer, benchmarker: BenchmarkConnection, program: Progr
            qubits: List[int], kind: str, mc_n_terms: int = None, num_shots: int = 1_000,
            active_reset: bool = False, group_tpb_settings: bool = False,
            symm_type: int = -1, calibrate_observables: bool = True,
-           show_progress_bar: bool = False) \
+           show_progress_bar: bool = False, rs: Optional[Generator] = None) \
         -> Tuple[Tuple[float, float], ObservablesExperiment, List[ExperimentResult]]:
     """
     A wrapper around experiment generation, data acquisition, and estimation that runs a DFE
@@ -350,6 +541,8 @@ def do_dfe(qc: QuantumComputer, benchmarker: BenchmarkConnection, program: Progr
         Likely, for the best (although slowest) results, symmetrization type should accommodate the
         maximum weight of any observable estimated.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param rs: Optional numpy random Generator used to sample the settings of Monte Carlo DFE.
+        If None, numpy's global random state is used.
     :return: The estimated fidelity of the state prepared by or process represented by the input
         ``program``, as implemented on the provided ``qc``, along with the standard error of the
         estimate. The experiment and corresponding results are also returned.
@@ -365,10 +558,10 @@ def do_dfe(qc: QuantumComputer, benchmarker: BenchmarkConnection, program: Progr
     else:
         if kind.lower() == 'state':
             expt = generate_monte_carlo_state_dfe_experiment(benchmarker, program, qubits,
-                                                             mc_n_terms)
+                                                             mc_n_terms, rs)
         else:
             expt = generate_monte_carlo_process_dfe_experiment(benchmarker, program, qubits,
-                                                               mc_n_terms)
+                                                               mc_n_terms, rs)
     if group_tpb_settings:
         expt = group_settings(expt)
 
@@ -2,17 +2,25 @@ import functools
 import itertools
 import json
 import logging
+import os
 import re
 import sys
+import tempfile
+import threading
+import time
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONEncoder
 from operator import mul
-from typing import List, Union, Iterable, Tuple, Dict, Callable, Sequence
+from typing import List, Union, Iterable, Iterator, Tuple, Dict, Callable, Sequence, Any, \
+    Optional
 from copy import copy
 from tqdm import tqdm
 
 import numpy as np
 from math import pi
+from scipy.linalg import hadamard
 from scipy.stats import beta
 import networkx as nx
 from networkx.algorithms.approximation.clique import clique_removal
@@ -22,13 +30,13 @@ from pyquil.gates import RX, RZ, MEASURE, RESET
 from pyquil.quilbase import Delay
 from pyquil.paulis import PauliTerm, sI, is_identity
 
-from forest.benchmarking.compilation import basic_compile, _RY
+from forest.benchmarking.compilation import basic_compile, _RY, ExecutableCache
 from forest.benchmarking.utils import transform_bit_moments_to_pauli
 
 if sys.version_info < (3, 7):
-    from pyquil.external.dataclasses import dataclass
+    from pyquil.external.dataclasses import dataclass, field
 else:
-    from dataclasses import dataclass
+    from dataclasses import dataclass, field
 
 log = logging.getLogger(__name__)
 
@@ -467,6 +475,51 @@ def _local_pauli_eig_meas(op, idx):
     raise ValueError(f'Unknown operation {op}')
 
 
+_SIC_POLAR_ANGLE = 2 * np.arccos(1 / np.sqrt(3))
+
+
+def _one_q_state_prep_angles(oneq_state: _OneQState) -> Tuple[float, float]:
+    """
+    The polar and azimuthal angles of the Bloch vector of a one qubit state, so that
+    _RY(polar) followed by RZ(azimuthal) prepares the same state as :py:func:`_one_q_state_prep`
+    """
+    label, index = oneq_state.label, oneq_state.index
+    if label == 'SIC':
+        if index == 0:
+            return 0., 0.
+        elif index == 1:
+            return _SIC_POLAR_ANGLE, 0.
+        elif index == 2:
+            return _SIC_POLAR_ANGLE, -2 * pi / 3
+        elif index == 3:
+            return _SIC_POLAR_ANGLE, 2 * pi / 3
+        raise ValueError(f'Bad SIC index: {index}')
+
+    if index not in [0, 1]:
+        raise ValueError(f'Bad Pauli index: {index}')
+    if label == 'X':
+        return (pi / 2, 0.) if index == 0 else (-pi / 2, 0.)
+    elif label == 'Y':
+        return (pi / 2, pi / 2) if index == 0 else (pi / 2, -pi / 2)
+    elif label == 'Z':
+        return (0., 0.) if index == 0 else (pi, 0.)
+    raise ValueError(f"Bad state label: {label}")
+
+
+def _local_pauli_eig_meas_angles(op) -> Tuple[float, float]:
+    """
+    The angles (azimuthal, polar) such that RZ(azimuthal) followed by _RY(polar) rotates the
+    eigenbasis of a Pauli operator to the Z eigenbasis, as in :py:func:`_local_pauli_eig_meas`
+    """
+    if op == 'X':
+        return 0., -pi / 2
+    elif op == 'Y':
+        return -pi / 2, -pi / 2
+    elif op == 'Z':
+        return 0., 0.
+    raise ValueError(f'Unknown operation {op}')
+
+
 def construct_tpb_graph(obs_expt: ObservablesExperiment):
     """
     Construct a graph where an edge signifies two settings are diagonal in a TPB.
@@ -481,17 +534,17 @@ def construct_tpb_graph(obs_expt: ObservablesExperiment):
         else:
             g.nodes[setting]['count'] += 1
 
-    for group1, group2 in itertools.combinations(obs_expt, r=2):
-        sett1 = group1[0]
-        sett2 = group2[0]
-
-        if sett1 == sett2:
+    # check each distinct setting against all later ones at once using the packed representation
+    settings = list(g.nodes)
+    packed = _PackedSettings.from_settings(settings)
+    for idx, sett1 in enumerate(settings[:-1]):
+        compatible = packed.compatible_with(idx, packed.x_bits[idx + 1:], packed.z_bits[idx + 1:],
+                                            packed.state_labels[idx + 1:])
+        compatible &= packed.consistent[idx + 1:]
+        if not packed.consistent[idx]:
             continue
-
-        max_weight_in = _max_weight_state([sett1.in_state, sett2.in_state])
-        max_weight_out = _max_weight_operator([sett1.observable, sett2.observable])
-        if max_weight_in is not None and max_weight_out is not None:
-            g.add_edge(sett1, sett2)
+        for jdx in np.flatnonzero(compatible):
+            g.add_edge(sett1, settings[idx + 1 + jdx])
 
     return g
 
@@ -561,53 +614,162 @@ def _max_weight_state(states: Iterable[TensorProductState]) -> Union[None, Tenso
     return TensorProductState(list(mapping.values()))
 
 
+# number of set bits in each possible byte, used to count the weight of packed bit masks
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class _PackedSettings:
+    """
+    A compact array representation of a sequence of ExperimentSettings, used to quickly decide
+    whether settings are diagonal in a shared tensor product basis.
+
+    Each qubit acted on by any of the settings is assigned a column. Observables are stored in the
+    symplectic representation as X and Z bit masks over these columns, packed eight qubits to a
+    byte with ``np.packbits``, so that e.g. Y on the column j sets bit j of both masks.
+    In-states are stored as an array of integer labels, one per column, where 0 indicates that no
+    state is specified on that qubit and every other value indexes a distinct (label, index) pair
+    of _OneQState.
+    """
+    x_bits: np.ndarray
+    z_bits: np.ndarray
+    state_labels: np.ndarray
+    # False for settings whose in_state specifies two different states on the same qubit
+    consistent: np.ndarray
+
+    @classmethod
+    def from_settings(cls, settings: Sequence[ExperimentSetting]) -> '_PackedSettings':
+        columns = {}  # type: Dict[int, int]
+        state_codes = {}  # type: Dict[Tuple[str, int], int]
+        for setting in settings:
+            for oneq_state in setting.in_state:
+                columns.setdefault(oneq_state.qubit, len(columns))
+                state_codes.setdefault((oneq_state.label, oneq_state.index), len(state_codes) + 1)
+            for q in setting.observable.get_qubits():
+                columns.setdefault(q, len(columns))
+
+        n_settings, n_columns = len(settings), max(len(columns), 1)
+        x_bits = np.zeros((n_settings, n_columns), dtype=bool)
+        z_bits = np.zeros((n_settings, n_columns), dtype=bool)
+        state_labels = np.zeros((n_settings, n_columns), dtype=np.uint16)
+        consistent = np.ones(n_settings, dtype=bool)
+        for idx, setting in enumerate(settings):
+            for q, op_str in setting.observable:
+                x_bits[idx, columns[q]] = op_str in 'XY'
+                z_bits[idx, columns[q]] = op_str in 'ZY'
+            for oneq_state in setting.in_state:
+                col = columns[oneq_state.qubit]
+                code = state_codes[(oneq_state.label, oneq_state.index)]
+                if state_labels[idx, col] not in (0, code):
+                    consistent[idx] = False
+                state_labels[idx, col] = code
+
+        return cls(np.packbits(x_bits, axis=1), np.packbits(z_bits, axis=1), state_labels,
+                   consistent)
+
+    def compatible_with(self, idx: int, x_bits: np.ndarray, z_bits: np.ndarray,
+                        state_labels: np.ndarray) -> np.ndarray:
+        """
+        Determine which rows of the given (possibly merged) packed observables and in-states
+        share a tensor product basis with the idx-th setting.
+
+        :return: a boolean array with one entry per row of the inputs
+        """
+        x, z, labels = self.x_bits[idx], self.z_bits[idx], self.state_labels[idx]
+        # observables conflict on any qubit where both act non-trivially but differently
+        op_conflicts = (x | z) & (x_bits | z_bits) & ((x ^ x_bits) | (z ^ z_bits))
+        # states conflict on any qubit where both are specified but differ
+        state_conflicts = (labels != 0) & (state_labels != 0) & (labels != state_labels)
+        return ~(op_conflicts.any(axis=1) | state_conflicts.any(axis=1))
+
+
 def _max_tpb_overlap(obs_expt: ObservablesExperiment):
     """
     Given an input ObservablesExperiment, provide a dictionary indicating which ExperimentSettings
     share a tensor product basis
 
+    Settings are greedily assigned to the first compatible bucket. Compatibility with every
+    bucket is checked at once on the bit-packed representation of the settings
+    (see :py:class:`_PackedSettings`); the diagonalizing ExperimentSetting of a bucket is only
+    constructed once all settings have been assigned.
+
     :param obs_expt: ObservablesExperiment, from which to group ExperimentSettings that share a tpb
         and can be run together
     :return: dictionary keyed with ExperimentSetting (specifying a tpb), and with each value being a
             list of ExperimentSettings (diagonal in that tpb)
     """
-    # initialize empty dictionary
-    diagonal_sets = {}
-    # loop through ExperimentSettings of the ObservablesExperiment
+    settings = []
     for expt_setting in obs_expt:
         # no need to group already grouped ObservablesExperiment
         assert len(expt_setting) == 1, 'already grouped?'
-        expt_setting = expt_setting[0]
-        # calculate max overlap of expt_setting with keys of diagonal_sets
-        # keep track of whether a shared tpb was found
-        found_tpb = False
-        # loop through dict items
-        for es, es_list in diagonal_sets.items():
-            trial_es_list = es_list + [expt_setting]
-            diag_in_term = _max_weight_state(expst.in_state for expst in trial_es_list)
-            diag_out_term = _max_weight_operator(expst.observable for expst in trial_es_list)
-            # max_weight_xxx returns None if the set of xxx's don't share a TPB, so the following
-            # conditional is True if expt_setting can be inserted into the current es_list.
-            if diag_in_term is not None and diag_out_term is not None:
-                found_tpb = True
-                assert len(diag_in_term) >= len(es.in_state), \
-                    "Highest weight in-state can't be smaller than the given in-state"
-                assert len(diag_out_term) >= len(es.observable), \
-                    "Highest weight out-PauliTerm can't be smaller than the given out-PauliTerm"
-
-                # update the diagonalizing basis (key of dict) if necessary
-                if len(diag_in_term) > len(es.in_state) or len(diag_out_term) > len(es.observable):
-                    del diagonal_sets[es]
-                    new_es = ExperimentSetting(diag_in_term, diag_out_term)
-                    diagonal_sets[new_es] = trial_es_list
-                else:
-                    diagonal_sets[es] = trial_es_list
-                break
-
-        if not found_tpb:
-            # made it through entire dict without finding any ExperimentSetting with shared tpb,
-            # so need to make a new item
-            diagonal_sets[expt_setting] = [expt_setting]
+        settings.append(expt_setting[0])
+
+    packed = _PackedSettings.from_settings(settings)
+
+    # the running max weight observable and in-state of each bucket, in packed form
+    bucket_x = np.zeros_like(packed.x_bits)
+    bucket_z = np.zeros_like(packed.z_bits)
+    bucket_states = np.zeros_like(packed.state_labels)
+    # buckets containing a self-inconsistent in-state can't accept any other setting
+    bucket_open = np.zeros(len(settings), dtype=bool)
+    # the weights of the in_state and observable of the setting used as key for each bucket
+    key_in_weight = np.zeros(len(settings), dtype=int)
+    key_out_weight = np.zeros(len(settings), dtype=int)
+    key_needs_update = []
+    members = []  # type: List[List[int]]
+    # the order of the buckets in the returned dict; a bucket is moved to the end whenever its
+    # key is replaced by a higher weight setting.
+    order = []  # type: List[int]
+
+    for idx, setting in enumerate(settings):
+        n_buckets = len(members)
+        candidates = []
+        if n_buckets > 0 and packed.consistent[idx]:
+            compatible = packed.compatible_with(idx, bucket_x[:n_buckets], bucket_z[:n_buckets],
+                                                bucket_states[:n_buckets])
+            compatible &= bucket_open[:n_buckets]
+            ordered = np.asarray(order)
+            candidates = ordered[compatible[ordered]]
+
+        if len(candidates) > 0:
+            bucket = candidates[0]
+            members[bucket].append(idx)
+            bucket_x[bucket] |= packed.x_bits[idx]
+            bucket_z[bucket] |= packed.z_bits[idx]
+            bucket_states[bucket] = np.where(bucket_states[bucket] == 0,
+                                             packed.state_labels[idx], bucket_states[bucket])
+
+            in_weight = np.count_nonzero(bucket_states[bucket])
+            out_weight = _POPCOUNT[bucket_x[bucket] | bucket_z[bucket]].sum()
+            # update the diagonalizing basis (key of dict) if necessary
+            if in_weight > key_in_weight[bucket] or out_weight > key_out_weight[bucket]:
+                key_in_weight[bucket], key_out_weight[bucket] = in_weight, out_weight
+                key_needs_update[bucket] = True
+                order.remove(bucket)
+                order.append(bucket)
+        else:
+            # no existing bucket shares a tpb, so need to make a new one
+            bucket = n_buckets
+            members.append([idx])
+            bucket_x[bucket] = packed.x_bits[idx]
+            bucket_z[bucket] = packed.z_bits[idx]
+            bucket_states[bucket] = packed.state_labels[idx]
+            bucket_open[bucket] = packed.consistent[idx]
+            key_in_weight[bucket] = len(setting.in_state)
+            key_out_weight[bucket] = len(setting.observable)
+            key_needs_update.append(False)
+            order.append(bucket)
+
+    diagonal_sets = {}
+    for bucket in order:
+        bucket_settings = [settings[idx] for idx in members[bucket]]
+        if key_needs_update[bucket]:
+            key = ExperimentSetting(
+                _max_weight_state(expst.in_state for expst in bucket_settings),
+                _max_weight_operator(expst.observable for expst in bucket_settings))
+        else:
+            key = bucket_settings[0]
+        diagonal_sets[key] = bucket_settings
 
     return diagonal_sets
 
@@ -700,6 +862,11 @@ class ExperimentResult:
     In the case of readout error calibration, we also include
     expectation, standard deviation and count for the calibration results, as well as the
     expectation and standard deviation for the corrected results.
+
+    Settings measured in the same group are estimated from the same shots, so their estimates are
+    correlated. The covariance of the uncorrected estimate of this setting with that of each
+    setting in its group, in the order of the group, is kept in covariance when the result is
+    estimated from shots, see :py:func:`shots_to_obs_moments_batch`. It is not serialized.
     """
 
     setting: ExperimentSetting
@@ -711,6 +878,7 @@ class ExperimentResult:
     calibration_expectation: Union[float, complex] = None
     calibration_std_err: Union[float, complex] = None
     calibration_counts: int = None
+    covariance: np.ndarray = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return f'{self.setting}: {self.expectation} +- {self.std_err}'
@@ -733,6 +901,198 @@ class ExperimentResult:
         }
 
 
+_PAULI_CODES = 'IXYZ'
+# the optional float fields of an ExperimentResult, stored with NaN in place of None
+_OPTIONAL_RESULT_FIELDS = ['std_err', 'raw_expectation', 'raw_std_err', 'calibration_expectation',
+                           'calibration_std_err']
+
+
+def to_npz(fn, obj: Union[ObservablesExperiment, Sequence[ExperimentResult]]):
+    """
+    Save an ObservablesExperiment or a list of ExperimentResults to a compressed, columnar NPZ
+    file. See :py:func:`read_npz`.
+
+    Rather than one string per setting as in :py:func:`to_json`, the settings are stored as
+    arrays: the qubit and Pauli code of each operator of each observable, the qubit, label and
+    index of each one-qubit state of each input state, and the coefficients of the observables.
+    The fields of the results are stored as arrays of numbers. This is much smaller and faster to
+    read and write for large experiments, e.g. process tomography of several qubits.
+    """
+    if isinstance(obj, ObservablesExperiment):
+        settings = [setting for group in obj for setting in group]
+        arrays = _settings_to_arrays(settings)
+        arrays['type'] = np.array('ObservablesExperiment')
+        arrays['program'] = np.array(obj.program.out())
+        arrays['group'] = np.repeat(np.arange(len(obj)), [len(group) for group in obj])
+    else:
+        results = list(obj)
+        arrays = _settings_to_arrays([result.setting for result in results])
+        arrays['type'] = np.array('ExperimentResults')
+        arrays['expectation'] = np.array([result.expectation for result in results])
+        arrays['total_counts'] = np.array([result.total_counts for result in results])
+        for field in _OPTIONAL_RESULT_FIELDS:
+            values = [getattr(result, field) for result in results]
+            if any(value is not None for value in values):
+                arrays[field] = np.array([np.nan if value is None else value for value in values])
+        calibration_counts = [result.calibration_counts for result in results]
+        if any(counts is not None for counts in calibration_counts):
+            arrays['calibration_counts'] = np.array([-1 if counts is None else counts
+                                                     for counts in calibration_counts])
+    if isinstance(fn, str) and not fn.endswith('.npz'):
+        # np.savez_compressed would add the extension itself
+        fn += '.npz'
+    np.savez_compressed(fn, **arrays)
+    return fn
+
+
+def read_npz(fn, qubit_groups: Sequence[Sequence[int]] = None) \
+        -> Union[ObservablesExperiment, List[ExperimentResult],
+                 Dict[Tuple[int, ...], Union[ObservablesExperiment, List[ExperimentResult]]]]:
+    """
+    Read an ObservablesExperiment or a list of ExperimentResults from an NPZ file written by
+    :py:func:`to_npz`.
+
+    If qubit_groups are given, only the settings whose observables act on a subset of the qubits
+    of some group are loaded, organized by group as in :py:func:`get_results_by_qubit_groups`.
+    Whether a setting belongs to a group is decided from the stored arrays, so settings outside
+    every group are never constructed.
+
+    :param fn: the file to read.
+    :param qubit_groups: optional groups of qubits for which to load the pertinent settings.
+    :return: the ObservablesExperiment or list of ExperimentResults, or, if qubit_groups are
+        given, a dictionary from each group (as a sorted tuple) to the ObservablesExperiment or
+        list of ExperimentResults of the settings on that group.
+    """
+    with np.load(fn) as npz:
+        data = {key: npz[key] for key in npz.files}
+    kind = str(data['type'])
+    num_settings = len(data['coefficient'])
+
+    if qubit_groups is None:
+        row_groups = {None: np.arange(num_settings)}
+    else:
+        op_qubits = data['qubits'][data['op_qubit']]
+        is_op = data['op_code'] > 0
+        row_groups = {}
+        for group in qubit_groups:
+            group = tuple(sorted(group))
+            in_group = np.isin(op_qubits, group) | ~is_op
+            row_groups[group] = np.flatnonzero(np.all(in_group, axis=1))
+
+    needed_rows = np.unique(np.concatenate(list(row_groups.values())))
+    settings = dict(zip(needed_rows, _settings_from_arrays(data, needed_rows)))
+
+    if kind == 'ObservablesExperiment':
+        program = Program(str(data['program']))
+
+        def build(rows):
+            groups = {}
+            for row in rows:
+                groups.setdefault(data['group'][row], []).append(settings[row])
+            return ObservablesExperiment(list(groups.values()), program=program)
+    else:
+        fields = _result_fields_from_arrays(data)
+
+        def build(rows):
+            return [ExperimentResult(setting=settings[row],
+                                     **{field: values[row] for field, values in fields.items()})
+                    for row in rows]
+
+    if qubit_groups is None:
+        return build(row_groups[None])
+    return {group: build(rows) for group, rows in row_groups.items()}
+
+
+def _settings_to_arrays(settings: Sequence[ExperimentSetting]) -> Dict[str, np.ndarray]:
+    """
+    Encode the settings as the arrays stored by :py:func:`to_npz`. Operators and one-qubit states
+    are stored in their original order, padded with code 0 (the identity, or no state), and
+    qubits are stored as indices into the array of all qubits.
+    """
+    observables = [list(setting.observable) for setting in settings]
+    in_states = [list(setting.in_state) for setting in settings]
+    qubits = sorted({q for ops in observables for q, _ in ops}
+                    | {state.qubit for states in in_states for state in states})
+    qubit_idx = {q: idx for idx, q in enumerate(qubits)}
+    labels = sorted({state.label for states in in_states for state in states})
+    label_idx = {label: idx for idx, label in enumerate(labels)}
+
+    max_ops = max([len(ops) for ops in observables], default=0)
+    op_qubit = np.zeros((len(settings), max_ops), dtype=np.int32)
+    op_code = np.zeros((len(settings), max_ops), dtype=np.uint8)
+    for row, ops in enumerate(observables):
+        for col, (q, op) in enumerate(ops):
+            op_qubit[row, col] = qubit_idx[q]
+            op_code[row, col] = _PAULI_CODES.index(op)
+
+    max_states = max([len(states) for states in in_states], default=0)
+    state_qubit = np.zeros((len(settings), max_states), dtype=np.int32)
+    state_label = np.zeros((len(settings), max_states), dtype=np.uint8)
+    state_index = np.zeros((len(settings), max_states), dtype=np.uint8)
+    for row, states in enumerate(in_states):
+        for col, state in enumerate(states):
+            state_qubit[row, col] = qubit_idx[state.qubit]
+            # label 0 marks padding
+            state_label[row, col] = label_idx[state.label] + 1
+            state_index[row, col] = state.index
+
+    return {'qubits': np.array(qubits, dtype=np.int64),
+            'coefficient': np.array([complex(setting.observable.coefficient)
+                                     for setting in settings]),
+            'op_qubit': op_qubit, 'op_code': op_code,
+            'state_labels': np.array(labels, dtype=str), 'state_qubit': state_qubit,
+            'state_label': state_label, 'state_index': state_index}
+
+
+def _settings_from_arrays(data: Dict[str, np.ndarray], rows: Sequence[int]) \
+        -> List[ExperimentSetting]:
+    """
+    Decode the settings in the given rows of the arrays written by :py:func:`_settings_to_arrays`.
+    """
+    qubits = data['qubits'].tolist()
+    labels = data['state_labels'].tolist()
+    op_qubits, op_codes = data['op_qubit'].tolist(), data['op_code'].tolist()
+    state_qubits = data['state_qubit'].tolist()
+    state_labels, state_indices = data['state_label'].tolist(), data['state_index'].tolist()
+    coefficients = data['coefficient'].tolist()
+
+    # many settings share an observable or an input state, so each is only constructed once
+    observables = {}
+    in_states = {}
+    settings = []
+    for row in rows:
+        obs_key = (tuple(op_qubits[row]), tuple(op_codes[row]), coefficients[row])
+        if obs_key not in observables:
+            ops = [(_PAULI_CODES[code], qubits[q]) for q, code in zip(*obs_key[:2]) if code > 0]
+            observables[obs_key] = PauliTerm.from_list(ops, obs_key[2])
+
+        state_key = (tuple(state_qubits[row]), tuple(state_labels[row]),
+                     tuple(state_indices[row]))
+        if state_key not in in_states:
+            in_states[state_key] = TensorProductState(
+                _OneQState(labels[label - 1], index, qubits[q])
+                for q, label, index in zip(*state_key) if label > 0)
+
+        settings.append(ExperimentSetting(in_states[state_key], observables[obs_key]))
+    return settings
+
+
+def _result_fields_from_arrays(data: Dict[str, np.ndarray]) -> Dict[str, List[Any]]:
+    """
+    Decode the fields, other than the setting, of the ExperimentResults written by
+    :py:func:`to_npz` as a list of values for each field.
+    """
+    fields = {'expectation': data['expectation'].tolist(),
+              'total_counts': data['total_counts'].tolist()}
+    for field in _OPTIONAL_RESULT_FIELDS:
+        if field in data:
+            fields[field] = [None if np.isnan(value) else value for value in data[field].tolist()]
+    if 'calibration_counts' in data:
+        fields['calibration_counts'] = [None if counts < 0 else counts
+                                        for counts in data['calibration_counts'].tolist()]
+    return fields
+
+
 def generate_experiment_programs(obs_expt: ObservablesExperiment, active_reset: bool = False,
                                  use_basic_compile: bool = True) \
         -> Tuple[List[Program], List[List[int]]]:
@@ -801,6 +1161,91 @@ def generate_experiment_programs(obs_expt: ObservablesExperiment, active_reset:
     return programs, meas_qubits
 
 
+def generate_parametric_experiment_program(obs_expt: ObservablesExperiment,
+                                           active_reset: bool = False,
+                                           use_basic_compile: bool = True) \
+        -> Tuple[Program, List[int], List[Dict[str, List[float]]]]:
+    """
+    Generate a single parametric program, along with a memory map for each group of settings,
+    which together can be used to estimate the observables in an ObservablesExperiment.
+
+    This is the parametric analog of :func:`generate_experiment_programs`. Rather than emitting a
+    distinct program for each group of settings, the state preparation and pre-measurement
+    rotations on each qubit are parameterized by angles held in the declared REAL memory regions
+    `prep_polar`, `prep_azimuthal`, `meas_azimuthal` and `meas_polar`. The program therefore
+    needs to be compiled only once, after which each group of settings is run by supplying the
+    corresponding memory map, similar to
+    :func:`~forest.benchmarking.utils.parameterized_bitstring_prep`.
+
+    Note that every qubit in the returned list of measured qubits is measured for every group of
+    settings, and that each prepared or measured qubit is acted on by a parameterized rotation
+    even when a group does not prepare or measure a non-trivial state on that qubit.
+
+    :param obs_expt: a single ObservablesExperiment with settings pre-grouped as desired.
+    :param active_reset: whether or not to begin the program by actively resetting.
+    :param use_basic_compile: whether or not to call basic_compile on the program after it is
+        created. See :func:`generate_experiment_programs`.
+    :return: a parametric program, the qubits that should be measured at the end of the
+        program, and a memory map for each group of settings in obs_expt.
+    """
+    prep_qubits = sorted({oneq_state.qubit for settings in obs_expt for setting in settings
+                          for oneq_state in setting.in_state})
+    meas_qubits = sorted({qubit for settings in obs_expt for setting in settings
+                          for qubit in setting.observable.get_qubits()})
+
+    program = Program()
+    if active_reset:
+        program += RESET()
+
+    if prep_qubits:
+        prep_polar = program.declare('prep_polar', 'REAL', len(prep_qubits))
+        prep_azimuthal = program.declare('prep_azimuthal', 'REAL', len(prep_qubits))
+        for idx, qubit in enumerate(prep_qubits):
+            program += _RY(prep_polar[idx], qubit)
+            program += RZ(prep_azimuthal[idx], qubit)
+
+    program += obs_expt.program
+
+    if meas_qubits:
+        meas_azimuthal = program.declare('meas_azimuthal', 'REAL', len(meas_qubits))
+        meas_polar = program.declare('meas_polar', 'REAL', len(meas_qubits))
+        for idx, qubit in enumerate(meas_qubits):
+            program += RZ(meas_azimuthal[idx], qubit)
+            program += _RY(meas_polar[idx], qubit)
+
+    if use_basic_compile:
+        program = basic_compile(program)
+
+    memory_maps = []
+    for settings in obs_expt:
+        max_weight_in_state = _max_weight_state(setting.in_state for setting in settings)
+        if max_weight_in_state is None:
+            raise ValueError('Input states are not compatible. Re-group the experiment settings '
+                             'so that groups of parallel settings have compatible input states.')
+        max_weight_out_op = _max_weight_operator(setting.observable for setting in settings)
+        if max_weight_out_op is None:
+            raise ValueError('Observables not compatible. Re-group the experiment settings '
+                             'so that groups of parallel settings have compatible observables.')
+
+        prep_angles = np.zeros((len(prep_qubits), 2))
+        for oneq_state in max_weight_in_state.states:
+            prep_angles[prep_qubits.index(oneq_state.qubit)] = _one_q_state_prep_angles(oneq_state)
+        meas_angles = np.zeros((len(meas_qubits), 2))
+        for qubit, op_str in max_weight_out_op:
+            meas_angles[meas_qubits.index(qubit)] = _local_pauli_eig_meas_angles(op_str)
+
+        memory_map = {}
+        if prep_qubits:
+            memory_map['prep_polar'] = prep_angles[:, 0].tolist()
+            memory_map['prep_azimuthal'] = prep_angles[:, 1].tolist()
+        if meas_qubits:
+            memory_map['meas_azimuthal'] = meas_angles[:, 0].tolist()
+            memory_map['meas_polar'] = meas_angles[:, 1].tolist()
+        memory_maps.append(memory_map)
+
+    return program, meas_qubits, memory_maps
+
+
 def shots_to_obs_moments(bitarray: np.ndarray, qubits: List[int], observable: PauliTerm,
                          use_beta_dist_unbiased_prior: bool = False) -> Tuple[float, float]:
     """
@@ -853,10 +1298,470 @@ def shots_to_obs_moments(bitarray: np.ndarray, qubits: List[int], observable: Pa
     return obs_mean, obs_var
 
 
+def shots_to_obs_moments_batch(bitarray: np.ndarray, qubits: List[int],
+                               observables: Sequence[PauliTerm],
+                               use_beta_dist_unbiased_prior: bool = False) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the means and variances of several observables, along with the covariance between
+    their estimates, from the same bitarray of results.
+
+    This gives the same means and variances as calling :py:func:`shots_to_obs_moments` for each
+    observable, but each shot is packed into bytes so that the parity of every observable on every
+    shot is found at once by masking the packed shots with the support of each observable.
+
+    Observables estimated from the same shots are correlated; e.g. Z0, Z1 and Z0Z1 estimated
+    from a group of settings sharing a TPB. The returned covariance accounts for this and can be
+    used to propagate errors through quantities that combine several of the observables.
+
+    :param bitarray: results from running `qc.run`, a 2D num_shots by num_qubits array.
+    :param qubits: list of qubits in order corresponding to the bitarray results.
+    :param observables: the observables whose moments are calculated from the shot data
+    :param use_beta_dist_unbiased_prior: if true then the means and variances are estimated from a
+        beta distribution that incorporates an unbiased Bayes prior. This precludes var = 0. The
+        off-diagonal entries of the returned covariance are the sample covariances in either case.
+    :return: tuple specifying (means, variances, covariance) where covariance[i, j] is the
+        covariance of the estimates of the means of observables i and j.
+    """
+    coeffs = np.array([complex(obs.coefficient) for obs in observables], dtype=complex)
+    if not np.allclose(coeffs.imag, 0):
+        raise ValueError(f"The coefficient of an observable should not be complex.")
+    coeffs = coeffs.real
+
+    # Identify classical register indices to select for each observable
+    masks = np.zeros((len(observables), len(qubits)), dtype=bool)
+    for mask, observable in zip(masks, observables):
+        obs_qubits = observable.get_qubits()
+        mask[:] = [q in obs_qubits for q in qubits]
+    is_identity = ~masks.any(axis=1)
+
+    if np.all(is_identity):
+        return coeffs, np.zeros(len(observables)), np.zeros((len(observables),) * 2)
+
+    assert bitarray.shape[1] == len(qubits), 'qubits should label each column of the bitarray'
+
+    # The parity of the selected bits is the xor of the parities of each selected byte
+    packed_shots = np.packbits(np.asarray(bitarray, dtype=bool), axis=1)
+    packed_masks = np.packbits(masks, axis=1)
+    parities = np.zeros((len(bitarray), len(observables)), dtype=np.uint8)
+    for shot_bytes, mask_bytes in zip(packed_shots.T, packed_masks.T):
+        parities ^= _POPCOUNT[np.bitwise_and.outer(shot_bytes, mask_bytes)].astype(np.uint8) & 1
+    # Transform parities to eigenvalues; ie (+1, -1)
+    obs_vals = coeffs * (1 - 2 * parities.astype(float))
+
+    obs_means = np.mean(obs_vals, axis=0)
+    deviations = obs_vals - obs_means
+    covariance = deviations.T @ deviations / len(bitarray) ** 2
+
+    if use_beta_dist_unbiased_prior:
+        # See shots_to_obs_moments; n_plus counts the shots with a +1 eigenvalue
+        n_plus = np.count_nonzero(parities == 0, axis=0)
+        n_minus = len(bitarray) - n_plus
+        bernoulli_mean = beta.mean(n_plus + 1, n_minus + 1)
+        bernoulli_var = beta.var(n_plus + 1, n_minus + 1)
+        obs_means, obs_vars = transform_bit_moments_to_pauli(bernoulli_mean, bernoulli_var)
+        obs_means = obs_means * coeffs
+        obs_vars = obs_vars * coeffs**2
+        np.fill_diagonal(covariance, obs_vars)
+    else:
+        obs_vars = np.diag(covariance).copy()
+
+    # identity terms are known exactly
+    obs_means[is_identity] = coeffs[is_identity]
+    obs_vars[is_identity] = 0
+    covariance[is_identity, :] = 0
+    covariance[:, is_identity] = 0
+
+    return obs_means, obs_vars, covariance
+
+
+def _results_from_shots(settings: Sequence[ExperimentSetting], bitarray: np.ndarray,
+                        meas_qubits: List[int], use_beta_dist_unbiased_prior: bool = False) \
+        -> List[ExperimentResult]:
+    """
+    Estimate each setting's observable from the shots of the program run for a group of settings.
+    """
+    # Obtain statistics for all observables in the group from result of experiment
+    obs_means, obs_vars, obs_cov = shots_to_obs_moments_batch(
+        bitarray, meas_qubits, [setting.observable for setting in settings],
+        use_beta_dist_unbiased_prior)
+
+    return [ExperimentResult(setting=setting,
+                             expectation=obs_mean.item(),
+                             std_err=np.sqrt(obs_var),
+                             total_counts=len(bitarray),
+                             covariance=cov_row)
+            for setting, obs_mean, obs_var, cov_row in zip(settings, obs_means, obs_vars, obs_cov)]
+
+
+@dataclass(frozen=True)
+class ShotRecord:
+    """
+    The shots of one run stored in a :py:class:`ShotStore`, along with the settings estimated
+    from them, if any, and any other metadata stored with them.
+    """
+    bitarray: np.ndarray
+    qubits: Tuple[int, ...]
+    settings: Tuple[ExperimentSetting, ...] = ()
+    metadata: Dict[str, Any] = None
+
+
+class ShotStore:
+    """
+    An append-only store of raw shot data on disk.
+
+    Estimation routines such as :py:func:`estimate_observables` reduce the shots of each run to
+    moments of the observables and discard them. Passing a ShotStore to these routines keeps the
+    raw shots, so that a large campaign can be re-analysed, e.g. with a different prior in
+    :py:func:`shots_to_obs_moments` or a new readout calibration, without re-running it and
+    without holding all of the shots in memory.
+
+    The shots of each run are bit-packed with ``np.packbits`` and appended to the file
+    ``path + '.bits'``. A line of JSON describing the run, i.e. its offset in that file, the
+    measured qubits, the settings estimated from the shots, and any other metadata, is appended to
+    ``path + '.jsonl'``. Records are read back through a read-only memory map of the bits file,
+    so only the requested shots are loaded. Opening a store whose files already exist appends to
+    them.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: the path of the store's files, without extension.
+        """
+        self.path = path
+        self.bits_path = path + '.bits'
+        self.index_path = path + '.jsonl'
+        self._index = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self._index = [json.loads(line) for line in f if line.strip()]
+        self._memmap = None
+        # shots may be stored in a background thread, see estimate_observables
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, idx: int) -> ShotRecord:
+        entry = self._index[idx]
+        num_bytes = entry['num_shots'] * entry['row_bytes']
+        with self._lock:
+            if self._memmap is None or len(self._memmap) < entry['offset'] + num_bytes:
+                self._memmap = np.memmap(self.bits_path, dtype=np.uint8, mode='r')
+            packed = self._memmap[entry['offset']:entry['offset'] + num_bytes]
+        bitarray = np.unpackbits(packed.reshape(entry['num_shots'], entry['row_bytes']), axis=1,
+                                 count=len(entry['qubits']))
+        return ShotRecord(bitarray=bitarray,
+                          qubits=tuple(entry['qubits']),
+                          settings=tuple(ExperimentSetting.from_str(s)
+                                         for s in entry['settings']),
+                          metadata=entry['metadata'])
+
+    def __iter__(self) -> Iterator[ShotRecord]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def append(self, bitarray: np.ndarray, qubits: Sequence[int],
+               settings: Sequence[ExperimentSetting] = (), **metadata) -> int:
+        """
+        Append the shots of one run to the store.
+
+        :param bitarray: the shots, a 2D num_shots by num_qubits array of bits.
+        :param qubits: the qubits labelling each column of the bitarray.
+        :param settings: the settings estimated from the shots, if any.
+        :param metadata: any other JSON serializable data describing the run.
+        :return: the index of the new record.
+        """
+        bitarray = np.asarray(bitarray)
+        if bitarray.ndim != 2 or bitarray.shape[1] != len(qubits):
+            raise ValueError('qubits should label each column of the bitarray')
+        packed = np.packbits(bitarray.astype(bool), axis=1)
+        with self._lock:
+            with open(self.bits_path, 'ab') as f:
+                offset = f.tell()
+                f.write(packed.tobytes())
+            entry = {'offset': offset, 'num_shots': len(bitarray), 'row_bytes': packed.shape[1],
+                     'qubits': [int(q) for q in qubits],
+                     'settings': [str(setting) for setting in settings],
+                     'metadata': metadata}
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+            self._index.append(entry)
+            return len(self._index) - 1
+
+    def results(self, use_beta_dist_unbiased_prior: bool = False) -> List[ExperimentResult]:
+        """
+        Re-estimate the observables of every stored setting from the stored shots.
+
+        Records are read one at a time, so the store may be larger than the available memory.
+
+        :param use_beta_dist_unbiased_prior: see :py:func:`shots_to_obs_moments`
+        :return: an ExperimentResult for each stored setting, in the order they were stored.
+        """
+        results = []
+        for record in self:
+            if record.settings:
+                results += _results_from_shots(record.settings, record.bitarray,
+                                               list(record.qubits), use_beta_dist_unbiased_prior)
+        return results
+
+
+def _next_power_of_2(x: int) -> int:
+    return 1 if x == 0 else 2 ** (x - 1).bit_length()
+
+
+def _symmetrization_flips(num_qubits: int, symm_type: int) -> Tuple[np.ndarray, int]:
+    """
+    The flips of the measured qubits made by `qc.run_symmetrized_readout`, and the minimum number
+    of trials it requires, for the given symm_type.
+
+    This follows pyquil's private implementation so that the programs, and hence the results,
+    are the same. For symm_type -1 every combination of flips is made; otherwise the rows of an
+    orthogonal array of strength symm_type, truncated to num_qubits columns, are used.
+
+    :param num_qubits: the number of measured qubits.
+    :param symm_type: the type of readout symmetrization, one of -1, 0, 1, 2, 3.
+    :return: a binary array whose rows indicate which qubits are flipped by each program, and
+        the minimum total number of trials.
+    """
+    if symm_type == -1:
+        flips = np.array(list(itertools.product([0, 1], repeat=num_qubits)), dtype=int)
+        min_trials = 2 ** num_qubits
+    elif symm_type in (0, 1):
+        flips = np.array([[0] * num_qubits, [1] * num_qubits][:symm_type + 1], dtype=int)
+        min_trials = 2
+    elif symm_type == 2:
+        # an OA(4 lam, 4 lam - 1, 2, 2) from the rows of a Hadamard matrix
+        four_lam = min(4 * lam for lam in range(1, 1024) if 4 * lam - 1 >= num_qubits)
+        flips = (1 - hadamard(_next_power_of_2(four_lam))[1:, :].T) // 2
+        min_trials = four_lam
+    elif symm_type == 3:
+        # an OA(2n, n, 2, 3) from a Hadamard matrix and its negation
+        had = hadamard(_next_power_of_2(num_qubits))
+        flips = (np.concatenate((had, -had)) + 1) // 2
+        min_trials = _next_power_of_2(2 * num_qubits)
+    else:
+        raise ValueError("symm_type must be one of the following ints [-1, 0, 1, 2, 3].")
+    return flips[:, :num_qubits], min_trials
+
+
+def _consolidate_symmetrization_outputs(outputs: Sequence[np.ndarray],
+                                        flip_arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Undo the flips made before measurement in each output and stack the outputs into one
+    bitarray of symmetrized results.
+    """
+    if len(outputs) != len(flip_arrays):
+        raise ValueError("The length of outputs must equal the length of flip_arrays")
+    return np.vstack([bitarray ^ flip_array for bitarray, flip_array in zip(outputs, flip_arrays)])
+
+
+def _compile_symmetrized_readout(qc: QuantumComputer, program: Program, num_shots: int,
+                                 symm_type: int, meas_qubits: List[int],
+                                 executable_cache: ExecutableCache = None) \
+        -> Tuple[List[Any], List[np.ndarray]]:
+    """
+    Compile, but do not run, the programs that `qc.run_symmetrized_readout` runs for the given
+    arguments.
+
+    :param executable_cache: if provided, executables are looked up in or added to this cache.
+    :return: the executables, each of which should be run once, along with the corresponding
+        arrays indicating which qubits are flipped by each executable.
+    """
+    flip_arrays, min_trials = _symmetrization_flips(len(meas_qubits), symm_type)
+    trials = num_shots
+    if trials < min_trials:
+        trials = min_trials
+        warnings.warn(f"Number of trials was too low, it is now {trials}.")
+    num_shots_per_prog = trials // len(flip_arrays)
+
+    if num_shots_per_prog * len(flip_arrays) < trials:
+        warnings.warn(f"The number of trials was modified from {trials} to "
+                      f"{num_shots_per_prog * len(flip_arrays)}. To be consistent with the "
+                      f"number of trials required by the type of readout symmetrization chosen.")
+
+    executables = []
+    for flip_array in flip_arrays:
+        prog = program.copy()
+        for q, flip in zip(meas_qubits, flip_array):
+            if flip:
+                prog += RX(pi, q)
+        ro = prog.declare('ro', 'BIT', len(meas_qubits))
+        for idx, q in enumerate(meas_qubits):
+            prog += MEASURE(q, ro[idx])
+        prog.wrap_in_numshots_loop(num_shots_per_prog)
+        if executable_cache is not None:
+            executables.append(executable_cache.compile(qc, prog))
+        else:
+            native_prog = qc.compiler.quil_to_native_quil(prog)
+            executables.append(qc.compiler.native_quil_to_executable(native_prog))
+
+    return executables, flip_arrays
+
+
+def _run_executables(qc: QuantumComputer, executables: Sequence[Any],
+                     memory_map: Dict[str, List[float]] = None) -> List[np.ndarray]:
+    """
+    Run each executable once on the qc, with the given memory_map if provided, and return the
+    readout data of each.
+    """
+    results = []
+    for executable in executables:
+        shot_values = qc.run(executable, memory_map).readout_data.get('ro')
+        if shot_values is None:
+            raise RuntimeError('Got no readout data from the quantum computer.')
+        results.append(shot_values)
+    return results
+
+
+def _run_symmetrized_readout(qc: QuantumComputer, program: Program, num_shots: int,
+                             symm_type: int, meas_qubits: List[int],
+                             executable_cache: ExecutableCache = None) -> np.ndarray:
+    """
+    Equivalent to `qc.run_symmetrized_readout`, but compiled executables are taken from the
+    executable_cache when one is provided.
+    """
+    if executable_cache is None:
+        return qc.run_symmetrized_readout(program, num_shots, symm_type, meas_qubits)
+
+    executables, flip_arrays = _compile_symmetrized_readout(qc, program, num_shots, symm_type,
+                                                            meas_qubits, executable_cache)
+    return _consolidate_symmetrization_outputs(_run_executables(qc, executables), flip_arrays)
+
+
+def _pipelined(items: Iterable[Any], prepare: Callable, execute: Callable, post_process: Callable,
+               max_in_flight: int = 1) -> Iterator[Any]:
+    """
+    Apply the stages prepare, execute, post_process to each item while overlapping the stages
+    of consecutive items.
+
+    execute(item, prepared) is always called in the calling thread, for one item at a time and
+    in the original order. Meanwhile, up to max_in_flight of the following items are prepared by
+    prepare(item) in a background thread and the previous item is handled by
+    post_process(item, executed) in another background thread. The outputs of post_process are
+    yielded in the original order of the items.
+
+    :param items: the items to pass through each stage.
+    :param prepare: the first stage, e.g. compilation of a program.
+    :param execute: the second stage, e.g. running an executable on a quantum computer.
+    :param post_process: the last stage, e.g. estimation of observables from shot data.
+    :param max_in_flight: the maximum number of items prepared ahead of the executing item.
+    :return: the output of post_process for each item, in order.
+    """
+    if max_in_flight < 1:
+        raise ValueError('max_in_flight must be at least 1.')
+
+    items = iter(items)
+    prepare_pool = ThreadPoolExecutor(max_workers=1)
+    post_process_pool = ThreadPoolExecutor(max_workers=1)
+    prepared = deque()
+    processing = None
+
+    def prepare_next():
+        for item in items:
+            prepared.append((item, prepare_pool.submit(prepare, item)))
+            break
+
+    try:
+        for _ in range(max_in_flight):
+            prepare_next()
+
+        while prepared:
+            item, prepare_future = prepared.popleft()
+            prepare_next()
+            executed = execute(item, prepare_future.result())
+            if processing is not None:
+                yield processing.result()
+            processing = post_process_pool.submit(post_process, item, executed)
+
+        if processing is not None:
+            yield processing.result()
+    finally:
+        # don't prepare any further items if the caller stops early or a stage raises
+        for _, prepare_future in prepared:
+            prepare_future.cancel()
+        prepare_pool.shutdown()
+        post_process_pool.shutdown()
+
+
+def _estimate_experiments_pipelined(qc: QuantumComputer,
+                                    experiments: Iterable[ObservablesExperiment],
+                                    num_shots: int = 500, symm_type: int = 0,
+                                    active_reset: bool = False, show_progress_bar: bool = False,
+                                    use_basic_compile: bool = True, max_in_flight: int = 1,
+                                    executable_cache: ExecutableCache = None,
+                                    use_parametric_program: bool = False,
+                                    shot_stores: Sequence[ShotStore] = None) \
+        -> Iterator[Tuple[int, List[ExperimentResult]]]:
+    """
+    Estimate the observables of each experiment as in :func:`estimate_observables`, but compile
+    and post-process the programs of all experiments in a pipeline around program execution.
+
+    See :func:`_pipelined`. The programs are run on the qc in the same order as by repeated calls
+    to estimate_observables.
+
+    :return: for each group of settings, in order, the index of its experiment in experiments
+        and the ExperimentResults of the settings in the group.
+    """
+    def items():
+        for expt_idx, obs_expt in enumerate(experiments):
+            if use_parametric_program:
+                program, meas_qs, memory_maps = generate_parametric_experiment_program(
+                    obs_expt, active_reset)
+                for memory_map, settings in zip(memory_maps, obs_expt):
+                    yield expt_idx, program, meas_qs, settings, memory_map
+            else:
+                programs, meas_qubits = generate_experiment_programs(obs_expt, active_reset)
+                for prog, meas_qs, settings in zip(programs, meas_qubits, obs_expt):
+                    yield expt_idx, prog, meas_qs, settings, None
+
+    # a parametric program is shared by all groups of an experiment and is only compiled once
+    last_compiled = [None, None]
+
+    def prepare(item):
+        _, prog, meas_qs, _, _ = item
+        if last_compiled[0] is prog:
+            return last_compiled[1]
+        last_compiled[0] = prog
+        if isinstance(qc.qam, QVM):
+            prog = prog.remove_quil_t_instructions()
+        last_compiled[1] = _compile_symmetrized_readout(qc, prog, num_shots, symm_type,
+                                                        meas_qs or [0], executable_cache)
+        return last_compiled[1]
+
+    def execute(item, prepared):
+        memory_map = item[4]
+        executables, flip_arrays = prepared
+        return _consolidate_symmetrization_outputs(_run_executables(qc, executables, memory_map),
+                                                   flip_arrays)
+
+    def post_process(item, bitarray):
+        expt_idx, _, meas_qs, settings, _ = item
+        if shot_stores is not None:
+            shot_stores[expt_idx].append(bitarray, meas_qs or [0], settings)
+        return expt_idx, _results_from_shots(settings, bitarray, meas_qs)
+
+    if use_basic_compile:
+        old_method = qc.compiler.quil_to_native_quil
+        # temporarily replace compiler.quil_to_native_quil with basic_compile
+        qc.compiler.quil_to_native_quil = basic_compile
+
+    try:
+        yield from tqdm(_pipelined(items(), prepare, execute, post_process, max_in_flight),
+                        disable=not show_progress_bar)
+    finally:
+        if use_basic_compile:
+            # revert to original
+            qc.compiler.quil_to_native_quil = old_method
+
+
 def estimate_observables(qc: QuantumComputer, obs_expt: ObservablesExperiment,
                          num_shots: int = 500, symm_type: int = 0,
                          active_reset: bool = False, show_progress_bar: bool = False,
-                         use_basic_compile: bool = True)\
+                         use_basic_compile: bool = True, max_in_flight: int = 0,
+                         executable_cache: ExecutableCache = None,
+                         use_parametric_program: bool = False,
+                         shot_store: ShotStore = None)\
         -> Iterable[ExperimentResult]:
     """
     Standard wrapper for estimating the observables in an `ObservablesExperiment`.
@@ -891,39 +1796,116 @@ def estimate_observables(qc: QuantumComputer, obs_expt: ObservablesExperiment,
     :param use_basic_compile: instead of using the qc.compiler standard quil_to_native_quil
         compilation step, which may optimize gates away, instead use only basic_compile which
         makes as few manual gate substitutions as possible.
+    :param max_in_flight: if positive, programs are compiled in a background thread up to this
+        many programs ahead of the program running on the qc, and the shot data of each program
+        is post-processed in the background while the next program runs. By default each program
+        is compiled, run, and post-processed in turn.
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
+    :param use_parametric_program: if true, a single parametric program is generated by
+        :func:`generate_parametric_experiment_program` and compiled only once, and each group of
+        settings is run by supplying a different memory map to the same executable.
+    :param shot_store: if provided, the raw shots of each group of settings are appended to this
+        :py:class:`ShotStore` so that they may be re-analysed later.
     :return: all of the ExperimentResults which hold an estimate of each observable of obs_expt
     """
+    if max_in_flight > 0:
+        shot_stores = [shot_store] if shot_store is not None else None
+        for _, results in _estimate_experiments_pipelined(qc, [obs_expt], num_shots, symm_type,
+                                                          active_reset, show_progress_bar,
+                                                          use_basic_compile, max_in_flight,
+                                                          executable_cache,
+                                                          use_parametric_program, shot_stores):
+            yield from results
+        return
+
     if use_basic_compile:
         old_method = qc.compiler.quil_to_native_quil
         # temporarily replace compiler.quil_to_native_quil with basic_compile
         qc.compiler.quil_to_native_quil = basic_compile
 
-    programs, meas_qubits = generate_experiment_programs(obs_expt, active_reset)
-    for prog, meas_qs, settings in zip(tqdm(programs, disable=not show_progress_bar), meas_qubits,
-                                       obs_expt):
+    if use_parametric_program:
+        program, meas_qs, memory_maps = generate_parametric_experiment_program(obs_expt,
+                                                                              active_reset)
         if isinstance(qc.qam, QVM):
-            prog = prog.remove_quil_t_instructions()
-
-        results = qc.run_symmetrized_readout(prog, num_shots, symm_type, meas_qs or [0])
-
-        for setting in settings:
-            observable = setting.observable
+            program = program.remove_quil_t_instructions()
+
+        executables, flip_arrays = _compile_symmetrized_readout(qc, program, num_shots, symm_type,
+                                                                meas_qs or [0], executable_cache)
+        for memory_map, settings in zip(tqdm(memory_maps, disable=not show_progress_bar),
+                                        obs_expt):
+            results = _consolidate_symmetrization_outputs(
+                _run_executables(qc, executables, memory_map), flip_arrays)
+            if shot_store is not None:
+                shot_store.append(results, meas_qs or [0], settings)
+
+            yield from _results_from_shots(settings, results, meas_qs)
+    else:
+        programs, meas_qubits = generate_experiment_programs(obs_expt, active_reset)
+        for prog, meas_qs, settings in zip(tqdm(programs, disable=not show_progress_bar),
+                                           meas_qubits, obs_expt):
+            if isinstance(qc.qam, QVM):
+                prog = prog.remove_quil_t_instructions()
 
-            # Obtain statistics from result of experiment
-            obs_mean, obs_var = shots_to_obs_moments(results, meas_qs, observable)
+            results = _run_symmetrized_readout(qc, prog, num_shots, symm_type, meas_qs or [0],
+                                               executable_cache)
+            if shot_store is not None:
+                shot_store.append(results, meas_qs or [0], settings)
 
-            yield ExperimentResult(
-                setting=setting,
-                expectation=obs_mean,
-                std_err=np.sqrt(obs_var),
-                total_counts=len(results),
-            )
+            yield from _results_from_shots(settings, results, meas_qs)
 
     if use_basic_compile:
         # revert to original
         qc.compiler.quil_to_native_quil = old_method
 
 
+def estimate_observables_of_experiments(qc: QuantumComputer,
+                                        experiments: Iterable[ObservablesExperiment],
+                                        num_shots: int = 500, symm_type: int = 0,
+                                        active_reset: bool = False,
+                                        show_progress_bar: bool = False,
+                                        use_basic_compile: bool = True, max_in_flight: int = 0,
+                                        executable_cache: ExecutableCache = None,
+                                        use_parametric_program: bool = False,
+                                        shot_stores: Sequence[ShotStore] = None) \
+        -> List[List[ExperimentResult]]:
+    """
+    Estimate the observables of each of a sequence of ObservablesExperiments.
+
+    This is equivalent to calling :func:`estimate_observables` on each experiment in turn, except
+    that when max_in_flight is positive the compilation and post-processing of the programs of
+    all experiments are pipelined around their execution, so that e.g. the next RB sequence is
+    compiled while the current one runs on the qc.
+
+    See :func:`estimate_observables` for a description of the other parameters.
+
+    :param shot_stores: if provided, a :py:class:`ShotStore` for each experiment, to which the raw
+        shots of that experiment are appended.
+    :return: a list of ExperimentResults for each ObservablesExperiment, in order.
+    """
+    experiments = list(experiments)
+    if shot_stores is not None and len(shot_stores) != len(experiments):
+        raise ValueError('There should be one shot store for each experiment.')
+
+    if max_in_flight <= 0:
+        return [list(estimate_observables(qc, expt, num_shots, symm_type, active_reset,
+                                          use_basic_compile=use_basic_compile,
+                                          executable_cache=executable_cache,
+                                          use_parametric_program=use_parametric_program,
+                                          shot_store=(shot_stores[expt_idx]
+                                                      if shot_stores is not None else None)))
+                for expt_idx, expt in enumerate(tqdm(experiments,
+                                                     disable=not show_progress_bar))]
+
+    results = [[] for _ in experiments]
+    for expt_idx, group_results in _estimate_experiments_pipelined(
+            qc, experiments, num_shots, symm_type, active_reset, show_progress_bar,
+            use_basic_compile, max_in_flight, executable_cache, use_parametric_program,
+            shot_stores):
+        results[expt_idx].extend(group_results)
+    return results
+
+
 def get_calibration_program(observable: PauliTerm, noisy_program: Program = None,
                             active_reset: bool = False) -> Program:
     """
@@ -961,10 +1943,151 @@ def get_calibration_program(observable: PauliTerm, noisy_program: Program = None
     return calibr_prog
 
 
+class CalibrationCache:
+    """
+    A store of the calibration expectations found by :py:func:`calibrate_observable_estimates`.
+
+    Readout calibrations drift slowly compared to the duration of a typical experiment, so
+    back-to-back experiments, e.g. tomography followed by DFE on the same qubits, can share the
+    calibration of any observable they have in common. Each calibration is keyed by the name of
+    the qc, the symm_type and calibration mode used, the noisy_program of a direct calibration or
+    the joint_group_size of a product calibration, and the operations of the observable (ignoring
+    its coefficient). Calibrations older than ttl seconds are treated as missing, so that only
+    stale entries are re-measured.
+
+    If a path is given, the calibrations are loaded from that JSON file, if it exists, and
+    :py:meth:`save` writes them back; calibrate_observable_estimates saves the cache once it has
+    added its calibrations, so that the cache is shared across sessions.
+
+    The attributes hits and misses count lookups of the cache; expired entries count as misses.
+    """
+
+    def __init__(self, ttl: float = 900., path: Optional[str] = None):
+        """
+        :param ttl: the time in seconds for which a calibration is reused.
+        :param path: an optional JSON file in which to persist the calibrations.
+        """
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # map from key to (expectation, variance, counts, timestamp)
+        self._calibrations = {}
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self._calibrations)
+
+    def __contains__(self, key):
+        return key in self._calibrations
+
+    @staticmethod
+    def key(qc: QuantumComputer, observable: PauliTerm, symm_type: int,
+            calibration_mode: str = 'direct', noisy_program: Program = None,
+            joint_group_size: int = 1) -> Tuple:
+        """
+        The key under which the calibration of the observable is stored.
+
+        :param qc: the quantum computer on which the calibration is run.
+        :param observable: the calibrated observable; its coefficient is ignored.
+        :param symm_type: the type of symmetrization used in the calibration.
+        :param calibration_mode: the calibration_mode of :py:func:`calibrate_observable_estimates`
+        :param noisy_program: the noisy_program of a direct calibration; ignored for 'product'.
+        :param joint_group_size: the joint_group_size of a product calibration; ignored for
+            'direct'.
+        :return: a hashable key.
+        """
+        if calibration_mode == 'direct':
+            noise = '' if noisy_program is None else noisy_program.out()
+            joint_group_size = 1
+        else:
+            noise = ''
+        return (qc.name, int(symm_type), calibration_mode, noise, int(joint_group_size),
+                tuple(sorted(observable.operations_as_set())))
+
+    def get(self, key: Tuple) -> Optional[Tuple[float, float, int]]:
+        """
+        Get the unexpired calibration stored under the key.
+
+        :param key: a key returned by :py:meth:`key`.
+        :return: the (expectation, variance, counts) of the calibration, or None if there is no
+            calibration younger than ttl seconds.
+        """
+        entry = self._calibrations.get(key)
+        if entry is None or time.time() - entry[3] >= self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[:3]
+
+    def put(self, key: Tuple, calibration: Tuple[float, float, int]):
+        """
+        Store a calibration, timestamped now. The cache is not written to its path until
+        :py:meth:`save` is called.
+
+        :param key: a key returned by :py:meth:`key`.
+        :param calibration: the (expectation, variance, counts) of the calibration.
+        """
+        expectation, variance, counts = calibration
+        self._calibrations[key] = (float(expectation), float(variance), int(counts), time.time())
+
+    def clear(self, include_disk: bool = False):
+        """
+        Remove all calibrations, and optionally the file at path, and reset the counters.
+        """
+        self._calibrations.clear()
+        self.hits = self.misses = 0
+        if include_disk and self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self):
+        """
+        Write the unexpired calibrations to the JSON file at path.
+        """
+        now = time.time()
+        entries = [{'qc_name': qc_name, 'symm_type': symm_type, 'calibration_mode': mode,
+                    'noise': noise, 'joint_group_size': joint_group_size,
+                    'operations': [list(op) for op in operations], 'expectation': expectation,
+                    'variance': variance, 'counts': counts, 'timestamp': timestamp}
+                   for (qc_name, symm_type, mode, noise, joint_group_size, operations),
+                       (expectation, variance, counts, timestamp)
+                   in self._calibrations.items() if now - timestamp < self.ttl]
+        # write to a unique temporary file first so that concurrent readers never see partial
+        # files and concurrent writers do not write to the same file
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(self.path)),
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            json.dump({'version': 1, 'calibrations': entries}, f)
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)['calibrations']
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f'Ignoring unreadable calibration cache {self.path}: {e}')
+            return
+        for entry in entries:
+            key = (entry['qc_name'], entry['symm_type'], entry['calibration_mode'],
+                   entry['noise'], entry['joint_group_size'],
+                   tuple(tuple(op) for op in entry['operations']))
+            self._calibrations[key] = (entry['expectation'], entry['variance'], entry['counts'],
+                                       entry['timestamp'])
+
+
 def calibrate_observable_estimates(qc: QuantumComputer, expt_results: List[ExperimentResult],
                                    num_shots: int = 500, symm_type: int = -1,
                                    noisy_program: Program = None, active_reset: bool = False,
-                                   show_progress_bar: bool = False) \
+                                   show_progress_bar: bool = False,
+                                   executable_cache: ExecutableCache = None,
+                                   calibration_mode: str = 'direct', joint_group_size: int = 1,
+                                   confusion_matrices: Dict[Tuple[int, ...], np.ndarray] = None,
+                                   calibration_cache: CalibrationCache = None) \
         -> Iterable[ExperimentResult]:
     """
     Calibrates the expectation and std_err of the input expt_results and updates those estimates.
@@ -977,6 +2100,18 @@ def calibrate_observable_estimates(qc: QuantumComputer, expt_results: List[Exper
     expectation is moved to raw_expectation and replaced with the old value scaled by the inverse
     calibration expectation.
 
+    With the default calibration_mode of 'direct', a calibration program is run for each unique
+    observable, which under exhaustive symmetrization takes 2^weight programs per observable.
+    With calibration_mode 'product', the joint confusion matrices of all groups of
+    joint_group_size qubits are instead estimated once by
+    :py:func:`~forest.benchmarking.readout.estimate_joint_confusion_in_set`, and the calibration
+    of every observable is derived from them by
+    :py:func:`~forest.benchmarking.readout.product_readout_calibration`. For single qubit groups
+    this takes 2 programs per qubit rather than exponentially many, but assumes that readout
+    errors are uncorrelated (beyond pairs, for groups of two) and neglects errors in the basis
+    change rotations. Direct calibration is used for any observable whose qubits were not
+    characterized, and comparing the two modes checks for correlated readout errors.
+
     :param qc: a quantum computer object on which to run the programs necessary to calibrate each
         result.
     :param expt_results: a list of results, each of which will be separately calibrated.
@@ -1000,24 +2135,100 @@ def calibrate_observable_estimates(qc: QuantumComputer, expt_results: List[Exper
     :param active_reset: whether or not to begin the program by actively resetting. If true,
         execution of each of the returned programs in a loop on the QPU will generally be faster.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param executable_cache: an optional cache of compiled executables; calibration programs found
+        in the cache are not recompiled.
+    :param calibration_mode: either 'direct' or 'product', as described above.
+    :param joint_group_size: the size of the groups of qubits whose joint confusion matrices are
+        estimated in the 'product' calibration_mode.
+    :param confusion_matrices: optional joint confusion matrices, estimated with num_shots shots
+        per bitstring, to use in the 'product' calibration_mode instead of estimating them.
+        Note that noisy_program is only used by direct calibration.
+    :param calibration_cache: an optional :py:class:`CalibrationCache`; observables with an
+        unexpired calibration in the cache are not re-measured, and new calibrations are added to
+        it and saved once all are made. Product calibrations derived from given
+        confusion_matrices are neither looked up in nor added to the cache.
     :return: a copy of the input results with updated estimates and calibration results.
     """
+    if calibration_mode not in ['direct', 'product']:
+        raise ValueError("The calibration_mode must be either 'direct' or 'product'.")
+
     observables = [copy(res.setting.observable) for res in expt_results]
     for obs in observables:
         obs.coefficient = complex(1.)
     observables = list(set(observables))  # get unique observables that will need to be calibrated
 
+    calibrations = {}
+    # calibrations derived from the caller's confusion matrices may not match the cached ones
+    use_cache = {'direct': calibration_cache is not None,
+                 'product': calibration_cache is not None and confusion_matrices is None}
+    # whether any calibration was added to the cache, which is then saved
+    recorded = [False]
+
+    def cache_key(obs: PauliTerm, mode: str) -> Tuple:
+        return CalibrationCache.key(qc, obs, symm_type, mode, noisy_program, joint_group_size)
+
+    def from_cache(observables_to_check: List[PauliTerm], mode: str) -> List[PauliTerm]:
+        """Fill in calibrations from the cache, returning the observables which were missed."""
+        if not use_cache[mode]:
+            return observables_to_check
+        missed = []
+        for obs in observables_to_check:
+            cal_data = calibration_cache.get(cache_key(obs, mode))
+            if cal_data is None:
+                missed.append(obs)
+            else:
+                calibrations[obs.operations_as_set()] = cal_data
+
+        return missed
+
+    def record(obs: PauliTerm, mode: str, cal_data: Tuple[float, float, int]):
+        calibrations[obs.operations_as_set()] = cal_data
+        if use_cache[mode]:
+            calibration_cache.put(cache_key(obs, mode), cal_data)
+            recorded[0] = True
+
+    if calibration_mode == 'product':
+        # avoid a circular import, since readout uses the ShotStore of this module
+        from forest.benchmarking.readout import estimate_joint_confusion_in_set, \
+            product_readout_calibration, readout_parity_fidelities
+
+        observables = from_cache(observables, 'product')
+        all_qubits = sorted(set().union(*[obs.get_qubits() for obs in observables]))
+        if confusion_matrices is None and len(all_qubits) > 0:
+            confusion_matrices = estimate_joint_confusion_in_set(
+                qc, all_qubits, num_shots, min(joint_group_size, len(all_qubits)),
+                use_active_reset=active_reset, show_progress_bar=show_progress_bar,
+                executable_cache=executable_cache)
+        confusion_matrices = confusion_matrices or {}
+        group_size = max([len(group) for group in confusion_matrices] + [0])
+        fidelities = readout_parity_fidelities(confusion_matrices, num_shots,
+                                               symmetrized=symm_type != 0)
+
+        direct_observables = []
+        for obs in observables:
+            try:
+                obs_mean, obs_var = product_readout_calibration(fidelities, obs.get_qubits())
+            except ValueError:
+                direct_observables.append(obs)
+                continue
+            record(obs, 'product', (obs_mean, obs_var, num_shots * 2 ** group_size))
+        observables = direct_observables
+
+    observables = from_cache(observables, 'direct')
     programs = [get_calibration_program(obs, noisy_program, active_reset) for obs in observables]
     meas_qubits = [obs.get_qubits() for obs in observables]
 
-    calibrations = {}
     for prog, meas_qs, obs in zip(tqdm(programs, disable=not show_progress_bar), meas_qubits,
                                   observables):
-        results = qc.run_symmetrized_readout(prog, num_shots, symm_type, meas_qs or [0])
+        results = _run_symmetrized_readout(qc, prog, num_shots, symm_type, meas_qs or [0],
+                                           executable_cache)
 
         # Obtain statistics from result of experiment
         obs_mean, obs_var = shots_to_obs_moments(results, meas_qs, obs)
-        calibrations[obs.operations_as_set()] = (obs_mean, obs_var, len(results))
+        record(obs, 'direct', (obs_mean, obs_var, len(results)))
+
+    if recorded[0] and calibration_cache.path is not None:
+        calibration_cache.save()
 
     for expt_result in expt_results:
         # TODO: allow weight > symm_type
@@ -1045,7 +2256,8 @@ def calibrate_observable_estimates(qc: QuantumComputer, expt_results: List[Exper
             raw_std_err=expt_result.std_err,
             calibration_expectation=obs_mean,
             calibration_std_err=np.sqrt(obs_var),
-            calibration_counts=counts
+            calibration_counts=counts,
+            covariance=expt_result.covariance
         )
 
 
@@ -14,7 +14,7 @@ import numpy as np
 from numpy import linalg as la
 from scipy.linalg import sqrtm
 from sympy.combinatorics import Permutation
-from numpy.random import RandomState
+from numpy.random import RandomState, Generator
 from forest.benchmarking.operator_tools.calculational import partial_trace
 
 
@@ -157,6 +157,116 @@ def rand_map_with_BCSZ_dist(dim: int, kraus_rank: int) -> np.ndarray:
     return Z.astype(np.complex128)
 
 
+def ginibre_matrices_complex(num: int, dim: int, k: int,
+                             rs: Optional[Generator] = None) -> np.ndarray:
+    """
+    Returns a stack of num dim by k matrices, each drawn from the complex Ginibre ensemble as in
+    :py:func:`ginibre_matrix_complex`.
+
+    :param num: The number of matrices.
+    :param dim: Hilbert space dimension.
+    :param k: Ultimately becomes the rank of a state.
+    :param rs: Optional numpy random Generator.
+    :return: Returns an array of shape (num, dim, k).
+    """
+    if rs is None:
+        rs = np.random.default_rng()
+    return rs.standard_normal((num, dim, k)) + 1j * rs.standard_normal((num, dim, k))
+
+
+def haar_rand_unitaries(num: int, dim: int, rs: Optional[Generator] = None) -> np.ndarray:
+    """
+    Returns a stack of num unitary operators drawn from the Haar measure as in
+    :py:func:`haar_rand_unitary`, using one batched QR decomposition.
+
+    :param num: The number of unitaries.
+    :param dim: Hilbert space dimension.
+    :param rs: Optional numpy random Generator.
+    :return: Returns an array of shape (num, dim, dim).
+    """
+    Z = ginibre_matrices_complex(num, dim, dim, rs)
+    Q, R = np.linalg.qr(Z)
+    diag = np.diagonal(R, axis1=-2, axis2=-1)
+    # multiply each column of Q by the phase of the corresponding diagonal entry of R
+    return Q * (diag / np.absolute(diag))[:, np.newaxis, :]
+
+
+def haar_rand_states(num: int, dim: int, rs: Optional[Generator] = None) -> np.ndarray:
+    """
+    Returns a stack of num random pure states drawn from the Haar measure as in
+    :py:func:`haar_rand_state`.
+
+    :param num: The number of states.
+    :param dim: Hilbert space dimension.
+    :param rs: Optional numpy random Generator.
+    :return: Returns an array of shape (num, dim, 1).
+    """
+    return haar_rand_unitaries(num, dim, rs)[:, :, :1]
+
+
+def ginibre_state_matrices(num: int, dim: int, rank: int,
+                           rs: Optional[Generator] = None) -> np.ndarray:
+    """
+    Returns a stack of num dim by dim positive semidefinite matrices of the given rank drawn from
+    the Ginibre ensemble as in :py:func:`ginibre_state_matrix`.
+
+    :param num: The number of states.
+    :param dim: Hilbert space dimension.
+    :param rank: The rank of each state.
+    :param rs: Optional numpy random Generator.
+    :return: Returns an array of shape (num, dim, dim).
+    """
+    if rank > dim:
+        raise ValueError("The rank of the state matrix cannot exceed the dimension.")
+    A = ginibre_matrices_complex(num, dim, rank, rs)
+    M = A @ A.conj().transpose(0, 2, 1)
+    return M / np.trace(M, axis1=1, axis2=2)[:, np.newaxis, np.newaxis]
+
+
+def bures_measure_state_matrices(num: int, dim: int, rs: Optional[Generator] = None) -> np.ndarray:
+    """
+    Returns a stack of num dim by dim positive semidefinite matrices drawn from the Bures measure
+    as in :py:func:`bures_measure_state_matrix`.
+
+    :param num: The number of states.
+    :param dim: Hilbert space dimension.
+    :param rs: Optional numpy random Generator.
+    :return: Returns an array of shape (num, dim, dim).
+    """
+    if rs is None:
+        rs = np.random.default_rng()
+    A = ginibre_matrices_complex(num, dim, dim, rs)
+    IU = np.eye(dim) + haar_rand_unitaries(num, dim, rs)
+    M = A @ A.conj().transpose(0, 2, 1)
+    P = IU @ M @ IU.conj().transpose(0, 2, 1)
+    return P / np.trace(P, axis1=1, axis2=2)[:, np.newaxis, np.newaxis]
+
+
+def rand_maps_with_BCSZ_dist(num: int, dim: int, kraus_rank: int,
+                             rs: Optional[Generator] = None) -> np.ndarray:
+    """
+    Returns a stack of num dim^2 by dim^2 Choi matrices of channels drawn from the BCSZ
+    distribution with Kraus rank K as in :py:func:`rand_map_with_BCSZ_dist`.
+
+    The inverse square root of each reduced state is found with a batched eigendecomposition.
+
+    :param num: The number of channels.
+    :param dim: Hilbert space dimension.
+    :param kraus_rank: The number of Kraus operators in the operator sum description of the channel.
+    :param rs: Optional numpy random Generator.
+    :return: Returns an array of shape (num, dim^2, dim^2).
+    """
+    X = ginibre_matrices_complex(num, dim ** 2, kraus_rank, rs)
+    rho = X @ X.conj().transpose(0, 2, 1)
+    # keep the first tensor factor, as partial_trace(rho, [0], [dim, dim])
+    rho_red = np.einsum('niaja->nij', rho.reshape(num, dim, dim, dim, dim))
+    evals, evecs = np.linalg.eigh(rho_red)
+    inv_sqrt = (evecs / np.sqrt(evals)[:, np.newaxis, :]) @ evecs.conj().transpose(0, 2, 1)
+    # Q = kron(inv_sqrt, I) for each channel; see rand_map_with_BCSZ_dist for the convention
+    Q = np.einsum('nij,kl->nikjl', inv_sqrt, np.eye(dim)).reshape(num, dim ** 2, dim ** 2)
+    return (Q @ rho @ Q).astype(np.complex128)
+
+
 def permute_tensor_factors(dims: Union[int, List[int]], perm: List[int]) -> np.ndarray:
     r"""
     Return a permutation matrix that appropriately swaps spaces of the given dimension(s).
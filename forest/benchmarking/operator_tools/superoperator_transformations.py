@@ -259,9 +259,10 @@ def superop2pauli_liouville(superop: np.ndarray) -> np.ndarray:
     :param superop: a dim**2 by dim**2 superoperator
     :return: dim**2 by dim**2 Pauli-Liouville matrix
     """
+    # c2p @ superop @ c2p^dagger = c2p @ (c2p @ superop^dagger)^dagger, computed qubit by qubit
     dim = int(np.sqrt(np.asarray(superop).shape[0]))
-    c2p_basis_transform = computational2pauli_basis_matrix(dim)
-    return c2p_basis_transform @ superop @ c2p_basis_transform.conj().T * dim
+    half = _apply_computational2pauli(np.asarray(superop).conj().T, axis=0)
+    return _apply_computational2pauli(half.conj().T, axis=0) * dim
 
 
 def superop2choi(superop: np.ndarray) -> np.ndarray:
@@ -307,9 +308,10 @@ def pauli_liouville2superop(pl_matrix: np.ndarray) -> np.ndarray:
     :param pl_matrix: a dim**2 by dim**2 Pauli-Liouville matrix
     :return: dim**2 by dim**2 superoperator
     """
+    # p2c @ pl_matrix @ p2c^dagger = p2c @ (p2c @ pl_matrix^dagger)^dagger, computed qubit by qubit
     dim = int(np.sqrt(np.asarray(pl_matrix).shape[0]))
-    p2c_basis_transform = pauli2computational_basis_matrix(dim)
-    return p2c_basis_transform @ pl_matrix @ p2c_basis_transform.conj().T / dim
+    half = _apply_pauli2computational(np.asarray(pl_matrix).conj().T, axis=0)
+    return _apply_pauli2computational(half.conj().T, axis=0) / dim
 
 
 def pauli_liouville2choi(pl_matrix: np.ndarray) -> np.ndarray:
@@ -395,17 +397,7 @@ def pauli2computational_basis_matrix(dim) -> np.ndarray:
     :param dim: dimension of the hilbert space on which the operators act.
     :return: A dim**2 by dim**2 basis transform matrix
     """
-    n_qubits = int(np.log2(dim))
-
-    conversion_mat = np.zeros((dim ** 2, dim ** 2), dtype=complex)
-
-    for i, pauli in enumerate(n_qubit_pauli_basis(n_qubits)):
-        pauli_label = np.zeros((dim ** 2, 1))
-        pauli_label[i] = 1.
-        pauli_mat = pauli[1]
-        conversion_mat += np.kron(vec(pauli_mat), pauli_label.T)
-
-    return conversion_mat
+    return _apply_pauli2computational(np.eye(dim ** 2, dtype=complex), axis=0)
 
 
 def computational2pauli_basis_matrix(dim) -> np.ndarray:
@@ -436,3 +428,101 @@ def computational2pauli_basis_matrix(dim) -> np.ndarray:
     :return: A dim**2 by dim**2 basis transform matrix
     """
     return pauli2computational_basis_matrix(dim).conj().T / dim
+
+
+def operator2pauli_vector(operator: np.ndarray) -> np.ndarray:
+    r"""
+    Expand an operator in the unnormalized Pauli basis.
+
+    The result is the same as `computational2pauli_basis_matrix(dim) @ vec(operator)`, i.e. the
+    coefficients :math:`c_k = Tr[\sigma_k operator] / dim` such that
+    :math:`operator = \sum_k c_k \sigma_k`, with the :math:`\sigma_k` ordered as in
+    :py:func:`~forest.benchmarking.utils.n_qubit_pauli_basis`. However, the basis transform is
+    applied one qubit at a time, in the manner of a fast Walsh-Hadamard transform, which takes
+    O(n 4^n) time for n qubits and never constructs the Pauli basis.
+
+    :param operator: a dim by dim matrix
+    :return: a dim**2 by 1 vector of the coefficients of the operator in the Pauli basis
+    """
+    return _apply_computational2pauli(vec(operator), axis=0)
+
+
+def pauli_vector2operator(pauli_vector: np.ndarray) -> np.ndarray:
+    r"""
+    Sum the unnormalized Pauli basis operators weighted by the given coefficients.
+
+    This is the inverse of :py:func:`operator2pauli_vector` and equivalent to
+    `unvec(pauli2computational_basis_matrix(dim) @ pauli_vector)`, computed in O(n 4^n) time.
+
+    :param pauli_vector: a dim**2 by 1 vector of coefficients :math:`c_k`
+    :return: the dim by dim matrix :math:`\sum_k c_k \sigma_k`
+    """
+    return unvec(_apply_pauli2computational(np.asarray(pauli_vector).reshape((-1, 1)), axis=0))
+
+
+def _one_qubit_pauli2computational() -> np.ndarray:
+    """
+    The single qubit p2c basis transform; each column is the vec of a Pauli.
+    """
+    return np.hstack([vec(pauli) for _, pauli in n_qubit_pauli_basis(1)]).astype(complex)
+
+
+def _num_qubits_of_vec_axis(length: int) -> int:
+    n_qubits = int(round(np.log2(length) / 2))
+    if 4 ** n_qubits != length:
+        raise ValueError(f"Dimension {length} is not that of a vectorized n-qubit operator.")
+    return n_qubits
+
+
+def _apply_one_qubit_transform(array: np.ndarray, transform: np.ndarray,
+                               n_qubits: int) -> np.ndarray:
+    """
+    Apply the n-fold tensor product of a 4 by 4 transform to the first axis of the array, one
+    tensor factor at a time.
+    """
+    rest = array.shape[1:]
+    array = array.reshape((4,) * n_qubits + rest)
+    for qubit in range(n_qubits):
+        array = np.moveaxis(np.tensordot(transform, array, axes=(1, qubit)), 0, qubit)
+    return array.reshape((4 ** n_qubits,) + rest)
+
+
+def _apply_computational2pauli(array: np.ndarray, axis: int = 0) -> np.ndarray:
+    """
+    Compute `computational2pauli_basis_matrix(dim) @ array` along the given axis.
+
+    In the column-stacked computational basis the index of each entry is (col, row), where col
+    and row are each n-bit strings. Regrouping the bits per qubit into (col_1, row_1, ...,
+    col_n, row_n) factors the basis transform into a tensor product of single qubit transforms.
+    """
+    array = np.moveaxis(np.asarray(array), axis, 0)
+    rest = array.shape[1:]
+    n_qubits = _num_qubits_of_vec_axis(array.shape[0])
+
+    # (col_1, ..., col_n, row_1, ..., row_n) -> (col_1, row_1, ..., col_n, row_n)
+    order = [idx for qubit in range(n_qubits) for idx in (qubit, n_qubits + qubit)]
+    array = array.reshape((2,) * (2 * n_qubits) + rest)
+    array = array.transpose(order + list(range(2 * n_qubits, array.ndim)))
+
+    transform = _one_qubit_pauli2computational().conj().T / 2
+    array = _apply_one_qubit_transform(array.reshape((4 ** n_qubits,) + rest), transform,
+                                       n_qubits)
+    return np.moveaxis(array, 0, axis)
+
+
+def _apply_pauli2computational(array: np.ndarray, axis: int = 0) -> np.ndarray:
+    """
+    Compute `pauli2computational_basis_matrix(dim) @ array` along the given axis. This is the
+    inverse of :py:func:`_apply_computational2pauli`.
+    """
+    array = np.moveaxis(np.asarray(array), axis, 0)
+    rest = array.shape[1:]
+    n_qubits = _num_qubits_of_vec_axis(array.shape[0])
+
+    array = _apply_one_qubit_transform(array, _one_qubit_pauli2computational(), n_qubits)
+
+    # (col_1, row_1, ..., col_n, row_n) -> (col_1, ..., col_n, row_1, ..., row_n)
+    order = list(range(0, 2 * n_qubits, 2)) + list(range(1, 2 * n_qubits, 2))
+    array = array.reshape((2,) * (2 * n_qubits) + rest)
+    array = array.transpose(order + list(range(2 * n_qubits, array.ndim)))
+    return np.moveaxis(array.reshape((4 ** n_qubits,) + rest), 0, axis)
@@ -1,8 +1,9 @@
-from typing import List, Sequence, Tuple, Callable, Dict, Iterator
+from typing import Any, List, Sequence, Tuple, Callable, Dict, Iterator, Optional, Union
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from tqdm import tqdm
 import numpy as np
-from statistics import median
 from copy import copy
 
 from pyquil.api import QuantumComputer
@@ -12,11 +13,15 @@ from rpcq.messages import TargetDevice
 from rpcq._utils import RPCErrorError
 from pyquil.external.rpcq import CompilerISA
 
-from forest.benchmarking.operator_tools.random_operators import haar_rand_unitary
-from forest.benchmarking.utils import bit_array_to_int
+from forest.benchmarking.operator_tools.random_operators import haar_rand_unitary, \
+    haar_rand_unitaries
 import logging
 log = logging.getLogger(__name__)
 
+# the number of amplitudes held in each batch of model circuits simulated at once by
+# sample_rand_circuits_for_heavy_out when use_qv_simulator is true (64 MB of complex128)
+QV_SIMULATOR_BATCH_AMPLITUDES = 2 ** 22
+
 
 def _naive_program_generator(qc: QuantumComputer, qubits: Sequence[int],
                              permutations: Sequence[np.ndarray], gates: np.ndarray) -> Program:
@@ -92,7 +97,7 @@ def _naive_program_generator(qc: QuantumComputer, qubits: Sequence[int],
 
 
 def collect_heavy_outputs(wfn_sim: NumpyWavefunctionSimulator, permutations: np.ndarray,
-                          gates: np.ndarray) -> List[int]:
+                          gates: np.ndarray, use_qv_simulator: bool = False) -> List[int]:
     """
     Collects and returns those 'heavy' bitstrings which are output with greater than median
     probability among all possible bitstrings on the given qubits.
@@ -100,30 +105,121 @@ def collect_heavy_outputs(wfn_sim: NumpyWavefunctionSimulator, permutations: np.
     The method uses the provided wfn_sim to calculate the probability of measuring each bitstring
     from the output of the circuit comprised of the given permutations and gates.
 
-    :param wfn_sim: a NumpyWavefunctionSimulator that can simulate the provided program
+    :param wfn_sim: a NumpyWavefunctionSimulator that can simulate the provided program. Unused,
+        and may be None, if use_qv_simulator is true.
     :param permutations: array of depth-many arrays of size n_qubits indicating a qubit permutation
     :param gates: depth by num_gates_per_layer many matrix representations of 2q gates.
             The first row of matrices is the earliest-time layer of 2q gates applied.
+    :param use_qv_simulator: if true, simulate the circuit with
+        :py:func:`simulate_qv_model_circuits` instead of the wfn_sim.
     :return: a list of the heavy outputs of the circuit, represented as ints
     """
+    if use_qv_simulator:
+        probabilities = simulate_qv_model_circuits(np.asarray(permutations)[np.newaxis],
+                                                   np.asarray(gates)[np.newaxis])[0]
+    else:
+        probabilities = _model_circuit_probabilities(wfn_sim, permutations, gates)
+
+    # store the integer indices, which implicitly represent the bitstring outcome.
+    return np.flatnonzero(_heavy_output_mask(probabilities)).tolist()
+
+
+def _model_circuit_probabilities(wfn_sim: NumpyWavefunctionSimulator, permutations: np.ndarray,
+                                 gates: np.ndarray) -> np.ndarray:
+    """
+    Simulate the model circuit with the wfn_sim and return the probability of each outcome,
+    ordered lexicographically with qubit 0 leftmost. See :py:func:`collect_heavy_outputs`.
+    """
     wfn_sim.reset()
 
     for layer_idx, (perm, layer) in enumerate(zip(permutations, gates)):
         for gate_idx, gate in enumerate(layer):
             wfn_sim.do_gate_matrix(gate, (perm[gate_idx], perm[gate_idx + 1]))
 
-    # Note that probabilities are ordered lexicographically with qubit 0 leftmost.
-    probabilities = np.abs(wfn_sim.wf.reshape(-1)) ** 2
+    return np.abs(wfn_sim.wf.reshape(-1)) ** 2
 
-    median_prob = median(probabilities)
 
-    # store the integer indices, which implicitly represent the bitstring outcome.
-    heavy_outputs = [idx for idx, prob in enumerate(probabilities) if prob > median_prob]
+def _heavy_output_mask(probabilities: np.ndarray) -> np.ndarray:
+    """
+    A boolean mask over all outcomes that is true for the heavy outputs, i.e. the outcomes whose
+    probability is greater than the median.
+    """
+    return probabilities > np.median(probabilities)
 
-    return heavy_outputs
+
+def _bit_arrays_to_ints(bit_arrays: np.ndarray) -> np.ndarray:
+    """
+    Apply :py:func:`~forest.benchmarking.utils.bit_array_to_int` to each row of a 2D array of
+    bits, e.g. the shots returned by qc.run, by a dot product with the powers of two.
+    """
+    bit_arrays = np.asarray(bit_arrays, dtype=np.int64)
+    num_bits = bit_arrays.shape[1]
+    return bit_arrays @ (1 << np.arange(num_bits - 1, -1, -1, dtype=np.int64))
 
 
-def generate_abstract_qv_circuit(depth: int) -> Tuple[List[np.ndarray], np.ndarray]:
+def _count_heavy_outputs(results: np.ndarray, heavy_mask: np.ndarray) -> int:
+    """
+    Count the shots in results, each a row of bits, whose outcome is heavy according to the
+    boolean mask over all outcomes.
+    """
+    if len(results) == 0:
+        return 0
+    return int(np.count_nonzero(heavy_mask[_bit_arrays_to_ints(results)]))
+
+
+def simulate_qv_model_circuits(permutations: np.ndarray, gates: np.ndarray) -> np.ndarray:
+    """
+    Simulate a batch of model circuits of the same width and return the probability of each
+    outcome of each circuit.
+
+    This gives the same probabilities as :py:func:`collect_heavy_outputs` simulating each circuit
+    with a NumpyWavefunctionSimulator, but exploits the fixed structure of the model circuits.
+    The state of every circuit is held in one array with a leading batch dimension. For each layer
+    the axes of each state are transposed so that the qubits acted on by each 2q gate are
+    adjacent, after which each gate is applied to all circuits at once by a batched matrix
+    product. The permutations therefore cost one transposition per layer rather than one per
+    gate, and the two state buffers are reused throughout.
+
+    :param permutations: an array of shape (num_circuits, depth, num_qubits) holding the
+        permutations of each circuit, as returned by :py:func:`generate_abstract_qv_circuit`.
+    :param gates: an array of shape (num_circuits, depth, num_qubits // 2, 4, 4) holding the 2q
+        gates of each circuit, as returned by :py:func:`generate_abstract_qv_circuit`.
+    :return: an array of shape (num_circuits, 2**num_qubits) with the probability of each
+        outcome, ordered lexicographically with qubit 0 leftmost.
+    """
+    permutations = np.asarray(permutations)
+    gates = np.asarray(gates)
+    num_circuits, depth, num_qubits = permutations.shape
+
+    state = np.zeros((num_circuits,) + (2,) * num_qubits, dtype=complex)
+    state[(slice(None),) + (0,) * num_qubits] = 1
+    buffer = np.empty_like(state)
+    # the qubit held by each axis of the state of each circuit
+    layouts = np.tile(np.arange(num_qubits), (num_circuits, 1))
+
+    for layer in range(depth):
+        # move the qubits into the positions given by the permutation, so that the gate at
+        # index j acts on the adjacent axes j, j+1
+        for circuit in range(num_circuits):
+            perm = permutations[circuit, layer]
+            np.copyto(buffer[circuit], state[circuit].transpose(np.argsort(layouts[circuit])[perm]))
+            layouts[circuit] = perm
+        state, buffer = buffer, state
+
+        for gate_idx in range(num_qubits // 2):
+            shape = (num_circuits, 2 ** gate_idx, 4, 2 ** (num_qubits - gate_idx - 2))
+            np.matmul(gates[:, layer, gate_idx, np.newaxis], state.reshape(shape),
+                      out=buffer.reshape(shape))
+            state, buffer = buffer, state
+
+    # restore the order of the qubits
+    for circuit in range(num_circuits):
+        np.copyto(buffer[circuit], state[circuit].transpose(np.argsort(layouts[circuit])))
+
+    return np.abs(buffer.reshape(num_circuits, -1)) ** 2
+
+
+def generate_abstract_qv_circuit(depth: int, rs=None) -> Tuple[List[np.ndarray], np.ndarray]:
     """
     Produces an abstract description of the square model circuit of given depth=width used in a
     quantum volume measurement.
@@ -137,27 +233,154 @@ def generate_abstract_qv_circuit(depth: int) -> Tuple[List[np.ndarray], np.ndarr
     positions 2j, 2j+1 after the i^th permutation has occurred.
 
     :param depth: the depth, and also width, of the model circuit
+    :param rs: Optional random state. Defaults to the global np.random. If a numpy Generator is
+        given all of the gates are drawn with one call to
+        :py:func:`~forest.benchmarking.operator_tools.random_operators.haar_rand_unitaries`.
     :return: the random depth-many permutations and depth by depth//2 many 2q-gates which comprise
         the model quantum circuit of [QVol]_ for a given depth.
     """
+    if rs is None:
+        rs = np.random
+
     # generate a simple list representation for each permutation of the depth many qubits
-    permutations = [np.random.permutation(range(depth)) for _ in range(depth)]
+    permutations = [rs.permutation(range(depth)) for _ in range(depth)]
 
     # generate a matrix representation of each 2q gate in the circuit
     num_gates_per_layer = depth // 2  # if odd number of qubits, don't do anything to last qubit
-    gates = np.asarray([[haar_rand_unitary(4) for _ in range(num_gates_per_layer)]
-                        for _ in range(depth)])
+    if isinstance(rs, np.random.Generator):
+        gates = haar_rand_unitaries(depth * num_gates_per_layer, 4, rs).reshape(
+            depth, num_gates_per_layer, 4, 4)
+    else:
+        gates = np.asarray([[haar_rand_unitary(4, rs) for _ in range(num_gates_per_layer)]
+                            for _ in range(depth)])
 
     return permutations, gates
 
 
+def _serial_qv_circuits(depth: int, num_circuits: int, use_qv_simulator: bool) \
+        -> Iterator[Tuple[List[np.ndarray], np.ndarray, np.ndarray]]:
+    """
+    Generate num_circuits model circuits from the global np.random and yield each with the mask of
+    its heavy outputs. See :py:func:`sample_rand_circuits_for_heavy_out`.
+    """
+    if not use_qv_simulator:
+        wfn_sim = NumpyWavefunctionSimulator(depth)
+        for _ in range(num_circuits):
+            permutations, gates = generate_abstract_qv_circuit(depth)
+            probabilities = _model_circuit_probabilities(wfn_sim, permutations, gates)
+            yield permutations, gates, _heavy_output_mask(probabilities)
+        return
+
+    batch_size = max(1, QV_SIMULATOR_BATCH_AMPLITUDES // 2 ** depth)
+    for start in range(0, num_circuits, batch_size):
+        # generate the next batch of model circuits and simulate them all at once
+        batch = [generate_abstract_qv_circuit(depth)
+                 for _ in range(min(batch_size, num_circuits - start))]
+        batch_probabilities = simulate_qv_model_circuits(np.asarray([perms for perms, _ in batch]),
+                                                         np.asarray([gates for _, gates in batch]))
+        for (permutations, gates), probabilities in zip(batch, batch_probabilities):
+            yield permutations, gates, _heavy_output_mask(probabilities)
+
+
+def _seeded_qv_circuit(depth: int, seed: np.random.SeedSequence, use_qv_simulator: bool) \
+        -> Tuple[List[np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Generate a model circuit from its own random stream and return it with the mask of its heavy
+    outputs. This is the unit of work of :py:func:`_parallel_qv_circuits`.
+    """
+    permutations, gates = generate_abstract_qv_circuit(depth, np.random.default_rng(seed))
+    if use_qv_simulator:
+        probabilities = simulate_qv_model_circuits(np.asarray(permutations)[np.newaxis],
+                                                   gates[np.newaxis])[0]
+    else:
+        probabilities = _model_circuit_probabilities(NumpyWavefunctionSimulator(depth),
+                                                     permutations, gates)
+    return permutations, gates, _heavy_output_mask(probabilities)
+
+
+def _parallel_qv_circuits(depth: int, num_circuits: int, use_qv_simulator: bool, num_workers: int,
+                          random_seed: Union[None, int, np.random.SeedSequence]) \
+        -> Iterator[Tuple[List[np.ndarray], np.ndarray, np.ndarray]]:
+    """
+    Generate and simulate num_circuits model circuits in a pool of num_workers processes, each
+    from its own random stream spawned from random_seed, and yield them in order as they are
+    ready. See :py:func:`sample_rand_circuits_for_heavy_out`.
+    """
+    if not isinstance(random_seed, np.random.SeedSequence):
+        random_seed = np.random.SeedSequence(random_seed)
+    seeds = random_seed.spawn(num_circuits)
+    prepare = partial(_seeded_qv_circuit, depth, use_qv_simulator=use_qv_simulator)
+
+    if num_workers <= 1:
+        yield from map(prepare, seeds)
+        return
+
+    # the pool works through all of the circuits ahead of the consumer, which takes them in order
+    chunksize = max(1, num_circuits // (4 * num_workers))
+    pool = ProcessPoolExecutor(max_workers=num_workers)
+    futures = [pool.submit(_map_chunk, prepare, seeds[start:start + chunksize])
+               for start in range(0, num_circuits, chunksize)]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        # drop any circuits not yet generated if the consumer stops early; shutdown only accepts
+        # cancel_futures from python 3.9
+        for future in futures:
+            future.cancel()
+        pool.shutdown()
+
+
+def _map_chunk(func: Callable, args: Sequence[Any]) -> List[Any]:
+    """
+    Apply func to each of a chunk of args in a worker process of :py:func:`_parallel_qv_circuits`.
+    """
+    return [func(arg) for arg in args]
+
+
+def _heavy_output_counts(qc: QuantumComputer, qubits: Sequence[int], depth: int,
+                         program_generator: Callable[[QuantumComputer, Sequence[int],
+                                                      Sequence[np.ndarray], np.ndarray], Program],
+                         num_circuits: int, num_shots: int, use_qv_simulator: bool,
+                         num_workers: int, random_seed: Union[None, int, np.random.SeedSequence]) \
+        -> Iterator[int]:
+    """
+    Run up to num_circuits random model circuits of the given depth on the qc, yielding the number
+    of heavy outputs sampled from each as it is run. See
+    :py:func:`sample_rand_circuits_for_heavy_out` for the parameters.
+    """
+    if num_workers > 1 or random_seed is not None:
+        circuits = _parallel_qv_circuits(depth, num_circuits, use_qv_simulator, num_workers,
+                                         random_seed)
+    else:
+        circuits = _serial_qv_circuits(depth, num_circuits, use_qv_simulator)
+
+    for permutations, gates, heavy_mask in circuits:
+
+        # generate a PyQuil program in native quil that implements the model circuit
+        # The program should measure the output qubits in the order that is consistent with the
+        # comparison of the bitstring results to the heavy outputs given by collect_heavy_outputs
+        program = program_generator(qc, qubits, permutations, gates)
+
+        # run the program num_shots many times
+        program.wrap_in_numshots_loop(num_shots)
+        executable = qc.compiler.native_quil_to_executable(program)
+        results = qc.run(executable).get_register_map().get('ro')
+
+        # determine if each result bitstring is a heavy output, as determined from simulation
+        yield _count_heavy_outputs(results, heavy_mask)
+
+
 def sample_rand_circuits_for_heavy_out(qc: QuantumComputer,
                                        qubits: Sequence[int], depth: int,
                                        program_generator: Callable[[QuantumComputer, Sequence[int],
                                                                     Sequence[np.ndarray],
                                                                     np.ndarray], Program],
                                        num_circuits: int = 100, num_shots: int = 1000,
-                                       show_progress_bar: bool = False) -> int:
+                                       show_progress_bar: bool = False,
+                                       use_qv_simulator: bool = False, num_workers: int = 1,
+                                       random_seed: Union[None, int, np.random.SeedSequence]
+                                       = None) -> int:
     """
     This method performs the bulk of the work in the quantum volume measurement.
 
@@ -166,6 +389,12 @@ def sample_rand_circuits_for_heavy_out(qc: QuantumComputer,
     implementation of the model circuit output by the program generator is run on the qc. The total
     number of sampled heavy outputs is returned.
 
+    The generation and classical simulation of the model circuits do not depend on the qc. If
+    num_workers > 1 they are done in a pool of processes which works ahead of the qc, while the
+    circuits that are ready are run in order. In this mode, and whenever a random_seed is given,
+    each circuit is generated from its own random stream spawned from random_seed rather than
+    from the global np.random, so the circuits do not depend on num_workers.
+
     :param qc: the quantum resource that will implement the PyQuil program for each model circuit
     :param qubits: the qubits available in the qc for the program_generator to use.
     :param depth: the depth (and width in num of qubits) of the model circuits
@@ -175,35 +404,19 @@ def sample_rand_circuits_for_heavy_out(qc: QuantumComputer,
     :param num_circuits: the number of random model circuits to sample at this depth; should be >100
     :param num_shots: the number of shots to sample from each model circuit
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param use_qv_simulator: if true, the model circuits are simulated with
+        :py:func:`simulate_qv_model_circuits` rather than with a NumpyWavefunctionSimulator.
+    :param num_workers: the number of processes in which to generate and simulate the circuits.
+    :param random_seed: a seed, or numpy SeedSequence, from which the random stream of each
+        circuit is spawned.
     :return: the number of heavy outputs sampled among all circuits generated for this depth
     """
-    wfn_sim = NumpyWavefunctionSimulator(depth)
-
     num_heavy = 0
     # display progress bar using tqdm
-    for _ in tqdm(range(num_circuits), disable=not show_progress_bar):
-
-        permutations, gates = generate_abstract_qv_circuit(depth)
-
-        # generate a PyQuil program in native quil that implements the model circuit
-        # The program should measure the output qubits in the order that is consistent with the
-        # comparison of the bitstring results to the heavy outputs given by collect_heavy_outputs
-        program = program_generator(qc, qubits, permutations, gates)
-
-        # run the program num_shots many times
-        program.wrap_in_numshots_loop(num_shots)
-        executable = qc.compiler.native_quil_to_executable(program)
-        results = qc.run(executable).get_register_map().get('ro')
-
-        # classically simulate model circuit represented by the perms and gates for heavy outputs
-        heavy_outputs = collect_heavy_outputs(wfn_sim, permutations, gates)
-
-        # determine if each result bitstring is a heavy output, as determined from simulation
-        for result in results:
-            # convert result to int for comparison with heavy outputs.
-            output = bit_array_to_int(result)
-            if output in heavy_outputs:
-                num_heavy += 1
+    for count in tqdm(_heavy_output_counts(qc, qubits, depth, program_generator, num_circuits,
+                                           num_shots, use_qv_simulator, num_workers, random_seed),
+                      total=num_circuits, disable=not show_progress_bar):
+        num_heavy += count
 
     return num_heavy
 
@@ -237,8 +450,9 @@ def measure_quantum_volume(qc: QuantumComputer, qubits: Sequence[int] = None,
                                                        Program] = _naive_program_generator,
                            num_circuits: int = 100, num_shots: int = 1000,
                            depths: np.ndarray = None, achievable_threshold: float = 2 / 3,
-                           stop_when_fail: bool = True, show_progress_bar: bool = False) \
-        -> Dict[int, Tuple[float, float]]:
+                           stop_when_fail: bool = True, show_progress_bar: bool = False,
+                           use_qv_simulator: bool = False, num_workers: int = 1,
+                           random_seed: Optional[int] = None) -> Dict[int, Tuple[float, float]]:
     """
     Measures the quantum volume of a quantum resource, as described in [QVol]_.
 
@@ -280,6 +494,12 @@ def measure_quantum_volume(qc: QuantumComputer, qubits: Sequence[int] = None,
         the one-sided confidence interval of this estimate is greater than the given threshold.
     :param stop_when_fail: if true, the measurement will stop after the first un-achievable depth
     :param show_progress_bar: displays a progress bar for each depth if true.
+    :param use_qv_simulator: if true, the model circuits are simulated in batches with
+        :py:func:`simulate_qv_model_circuits`.
+    :param num_workers: the number of processes in which to generate and simulate the circuits
+        ahead of running them on the qc; see :py:func:`sample_rand_circuits_for_heavy_out`.
+    :param random_seed: a seed from which the random stream of each circuit at each depth is
+        spawned.
     :return: dict with key depth: (prob_sample_heavy, ons_sided_conf_interval) gives both the
         estimated probability of sampling a heavy output at each depth and the 2-sigma lower
         bound on this estimate; a depth qualifies as being achievable only if this lower bound
@@ -294,14 +514,20 @@ def measure_quantum_volume(qc: QuantumComputer, qubits: Sequence[int] = None,
     if depths is None:
         depths = np.arange(2, len(qubits) + 1)
 
+    if num_workers > 1 or random_seed is not None:
+        depth_seeds = np.random.SeedSequence(random_seed).spawn(len(depths))
+    else:
+        depth_seeds = [None] * len(depths)
+
     results = {}
-    for depth in depths:
+    for depth, depth_seed in zip(depths, depth_seeds):
         log.info("Starting depth {}".format(depth))
 
         # Use the program generator to implement random model circuits for this depth and compare
         # the outputs to the ideal simulations; get the count of the total number of heavy outputs
         num_heavy = sample_rand_circuits_for_heavy_out(qc, qubits, depth, program_generator,
-                                                       num_circuits, num_shots, show_progress_bar)
+                                                       num_circuits, num_shots, show_progress_bar,
+                                                       use_qv_simulator, num_workers, depth_seed)
 
         prob_sample_heavy, one_sided_conf_intrvl = calculate_prob_est_and_err(num_heavy,
                                                                               num_circuits,
@@ -319,6 +545,96 @@ def measure_quantum_volume(qc: QuantumComputer, qubits: Sequence[int] = None,
     return results
 
 
+def measure_quantum_volume_adaptive(qc: QuantumComputer, qubits: Sequence[int] = None,
+                                    program_generator: Callable[[QuantumComputer, Sequence[int],
+                                                                 Sequence[np.ndarray], np.ndarray],
+                                                                Program] = _naive_program_generator,
+                                    num_circuits: int = 100, num_shots: int = 1000,
+                                    depths: np.ndarray = None, achievable_threshold: float = 2 / 3,
+                                    min_circuits: int = 20, show_progress_bar: bool = False,
+                                    use_qv_simulator: bool = False, num_workers: int = 1,
+                                    random_seed: Optional[int] = None) \
+        -> Tuple[Dict[int, Tuple[float, float]], Dict[int, int]]:
+    """
+    Measures the quantum volume like :py:func:`measure_quantum_volume`, but stops sampling each
+    depth as soon as its outcome is settled and stops ascending depths after the first failure.
+
+    After each circuit at a given depth, beginning with the min_circuits-th, the running estimate
+    and its 2 sigma one-sided confidence interval are recomputed with
+    :py:func:`calculate_prob_est_and_err`. Sampling of the depth stops once the lower bound of
+    this interval exceeds the achievable_threshold, so the depth is achieved, or once the upper
+    bound at the same distance above the estimate is at or below the threshold, so the depth
+    cannot be achieved. Otherwise up to num_circuits circuits are run. Note that [QVol]_ calls for
+    at least 100 circuits at each depth; a depth that is achieved with fewer should be confirmed
+    with a full measurement when the result is reported.
+
+    :param qc: the quantum resource whose volume you wish to measure
+    :param qubits: available qubits on which to act during measurement. Default all qubits in qc.
+    :param program_generator: a method which takes an abstract description of a model circuit and
+        returns a native quil program that implements that circuit. See measure_quantum_volume
+        docstring for specifics.
+    :param num_circuits: the maximum number of random circuits that will be sampled at each depth.
+    :param num_shots: number of shots for each circuit sampled.
+    :param depths: the circuit depths to scan over. Defaults to all depths from 2 to len(qubits)
+    :param achievable_threshold: threshold at which a depth is considered 'achieved'.
+    :param min_circuits: the number of circuits to sample at each depth before sampling may stop.
+    :param show_progress_bar: displays a progress bar for each depth if true.
+    :param use_qv_simulator: if true, the model circuits are simulated with
+        :py:func:`simulate_qv_model_circuits`.
+    :param num_workers: the number of processes in which to generate and simulate the circuits
+        ahead of running them on the qc; see :py:func:`sample_rand_circuits_for_heavy_out`.
+    :param random_seed: a seed from which the random stream of each circuit at each depth is
+        spawned.
+    :return: the results dict of :py:func:`measure_quantum_volume` for each depth measured, and a
+        dict from each depth measured to the number of circuits that were run. Each circuit was
+        run num_shots times.
+    """
+    if num_circuits < max(1, min_circuits):
+        raise ValueError("num_circuits must be at least 1 and at least min_circuits.")
+
+    if qubits is None:
+        qubits = qc.qubits()
+
+    if depths is None:
+        depths = np.arange(2, len(qubits) + 1)
+
+    if num_workers > 1 or random_seed is not None:
+        depth_seeds = np.random.SeedSequence(random_seed).spawn(len(depths))
+    else:
+        depth_seeds = [None] * len(depths)
+
+    results = {}
+    circuits_used = {}
+    for depth, depth_seed in zip(depths, depth_seeds):
+        log.info("Starting depth {}".format(depth))
+
+        num_heavy = 0
+        num_run = 0
+        counts = _heavy_output_counts(qc, qubits, depth, program_generator, num_circuits,
+                                      num_shots, use_qv_simulator, num_workers, depth_seed)
+        for count in tqdm(counts, total=num_circuits, disable=not show_progress_bar):
+            num_heavy += count
+            num_run += 1
+            prob_sample_heavy, one_sided_conf_intrvl = calculate_prob_est_and_err(num_heavy,
+                                                                                  num_run,
+                                                                                  num_shots)
+            upper_bound = 2 * prob_sample_heavy - one_sided_conf_intrvl
+            if num_run >= min_circuits and (one_sided_conf_intrvl > achievable_threshold
+                                            or upper_bound <= achievable_threshold):
+                break
+        # stop generating and simulating any circuits for this depth that will not be run
+        counts.close()
+
+        results[depth] = (prob_sample_heavy, one_sided_conf_intrvl)
+        circuits_used[depth] = num_run
+        log.info("Depth {} used {} circuits".format(depth, num_run))
+
+        if one_sided_conf_intrvl <= achievable_threshold:
+            break
+
+    return results, circuits_used
+
+
 def count_heavy_hitters_sampled(qc_results: Iterator[np.ndarray],
                                 heavy_hitters: Iterator[List[int]]) -> Iterator[int]:
     """
@@ -331,14 +647,14 @@ def count_heavy_hitters_sampled(qc_results: Iterator[np.ndarray],
     :return: the number of samples which were heavy for each circuit.
     """
     for results, hh_list in zip(qc_results, heavy_hitters):
-        num_heavy = 0
+        results = np.asarray(results)
+        if len(results) == 0:
+            yield 0
+            continue
         # determine if each result bitstring is a heavy output, as determined from simulation
-        for result in results:
-            # convert result to int for comparison with heavy outputs.
-            output = bit_array_to_int(result)
-            if output in hh_list:
-                num_heavy += 1
-        yield num_heavy
+        heavy_mask = np.zeros(2 ** results.shape[1], dtype=bool)
+        heavy_mask[list(hh_list)] = True
+        yield _count_heavy_outputs(results, heavy_mask)
 
 
 def get_prob_sample_heavy_by_depth(depths: Iterator[int], num_hh_sampled: Iterator[int],
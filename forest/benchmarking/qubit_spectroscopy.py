@@ -3,7 +3,6 @@ from typing import Sequence, List, Dict, Tuple
 import numpy as np
 from numpy import pi
 from lmfit.model import ModelResult
-from tqdm import tqdm
 
 from pyquil.api import QuantumComputer
 from pyquil.gates import RX, RY, RZ, CZ
@@ -11,11 +10,12 @@ from pyquil.quil import Program
 from pyquil.quilbase import Delay
 from pyquil.paulis import PauliTerm
 
+from forest.benchmarking.compilation import ExecutableCache
 from forest.benchmarking.utils import transform_pauli_moments_to_bit
 from forest.benchmarking.analysis.fitting import fit_decay_time_param_decay, \
     fit_decaying_cosine, fit_shifted_cosine
 from forest.benchmarking.observable_estimation import ObservablesExperiment, ExperimentResult, \
-    ExperimentSetting, estimate_observables, minusZ, plusZ, minusY
+    ExperimentSetting, minusZ, plusZ, minusY, estimate_observables_of_experiments
 
 MICROSECOND = 1e-6  # A microsecond (us) is an SI unit of time
 
@@ -25,7 +25,9 @@ MHZ = 1e6  # MHz, megahertz
 
 def acquire_qubit_spectroscopy_data(qc: QuantumComputer,
                                     experiments: Sequence[ObservablesExperiment],
-                                    num_shots: int = 500, show_progress_bar: bool = False) \
+                                    num_shots: int = 500, show_progress_bar: bool = False,
+                                    max_in_flight: int = 0,
+                                    executable_cache: ExecutableCache = None) \
         -> List[List[ExperimentResult]]:
     """
     A standard data acquisition method for all experiments in this module.
@@ -37,13 +39,18 @@ def acquire_qubit_spectroscopy_data(qc: QuantumComputer,
     :param experiments: the ObservablesExperiments to run on the given qc
     :param num_shots: the number of shots to collect for each experiment.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param max_in_flight: if positive, programs are compiled up to this many programs ahead of
+        the one running on the qc; see
+        :py:func:`~forest.benchmarking.observable_estimation.estimate_observables_of_experiments`
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
     :return: a list of ExperimentResults for each ObservablesExperiment, returned in order of the
         input sequence of experiments.
     """
-    results = []
-    for expt in tqdm(experiments, disable=not show_progress_bar):
-        results.append(list(estimate_observables(qc, expt, num_shots)))
-    return results
+    return estimate_observables_of_experiments(qc, experiments, num_shots,
+                                               show_progress_bar=show_progress_bar,
+                                               max_in_flight=max_in_flight,
+                                               executable_cache=executable_cache)
 
 
 def get_stats_by_qubit(expt_results: List[List[ExperimentResult]]) \
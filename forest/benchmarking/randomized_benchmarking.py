@@ -4,7 +4,6 @@ from typing import Iterable, List, Sequence, Tuple, Dict, Optional
 import numpy as np
 from lmfit.model import ModelResult
 from numpy import pi
-from tqdm import tqdm
 
 from pyquil.api import BenchmarkConnection, QuantumComputer
 from pyquil.gates import CZ, RX, RZ
@@ -15,9 +14,11 @@ from pyquil import Program
 from forest.benchmarking.tomography import _state_tomo_settings
 from forest.benchmarking.utils import all_traceless_pauli_z_terms, is_pos_pow_two
 from forest.benchmarking.analysis.fitting import fit_base_param_decay
+from forest.benchmarking.cliffords import generate_local_rb_sequence
+from forest.benchmarking.compilation import ExecutableCache
 from forest.benchmarking.observable_estimation import ExperimentSetting, ExperimentResult, \
-    zeros_state, estimate_observables, ObservablesExperiment, group_settings, \
-    get_results_by_qubit_groups
+    zeros_state, ObservablesExperiment, group_settings, get_results_by_qubit_groups, \
+    estimate_observables_of_experiments
 
 
 def get_stats_by_qubit_group(qubit_groups: Sequence[Sequence[int]],
@@ -102,14 +103,19 @@ def merge_sequences(sequences: List[List[Program]]) -> List[Program]:
     return [merge_programs([seq[idx] for seq in sequences]) for idx in range(depth)]
 
 
-def generate_rb_sequence(benchmarker: BenchmarkConnection, qubits: Sequence[int], depth: int,
-                         interleaved_gate: Optional[Program] = None,
+def generate_rb_sequence(benchmarker: Optional[BenchmarkConnection], qubits: Sequence[int],
+                         depth: int, interleaved_gate: Optional[Program] = None,
                          random_seed: Optional[int] = None) \
         -> List[Program]:
     """
     Generate a complete randomized benchmarking sequence.
 
+    Sequences on one or two qubits are generated locally with
+    :py:func:`~forest.benchmarking.cliffords.generate_local_rb_sequence`. The benchmarker is only
+    called if this is not possible, e.g. if the interleaved_gate is not a program of gates.
+
     :param benchmarker: object returned from get_benchmarker() used to generate clifford sequences
+        that cannot be generated locally; may be None if they all can be.
     :param qubits: qubits on which the sequence will act
     :param depth: The total number of Cliffords in the sequence (including inverse)
     :param random_seed: Random seed passed to the benchmarker to seed sequence generation.
@@ -120,6 +126,12 @@ def generate_rb_sequence(benchmarker: BenchmarkConnection, qubits: Sequence[int]
         raise ValueError("Sequence depth must be at least 2 for rb sequences, or at least 1 for "
                          "unitarity sequences.")
     gateset = get_rb_gateset(qubits)
+    try:
+        return generate_local_rb_sequence(qubits, depth, interleaved_gate, random_seed)
+    except ValueError:
+        if benchmarker is None:
+            raise
+
     programs = benchmarker.generate_rb_sequence(depth=depth, gateset=gateset,
                                                 interleaver=interleaved_gate, seed=random_seed)
     # return a sequence composed of depth-many Cliffords.
@@ -286,7 +298,8 @@ def generate_rb_experiments(benchmarker: BenchmarkConnection, qubit_groups: Sequ
 
 def acquire_rb_data(qc: QuantumComputer, experiments: Iterable[ObservablesExperiment],
                     num_shots: int = 500, active_reset: bool = False,
-                    show_progress_bar: bool = False) \
+                    show_progress_bar: bool = False, max_in_flight: int = 0,
+                    executable_cache: ExecutableCache = None) \
         -> List[List[ExperimentResult]]:
     """
     Runs each ObservablesExperiment and returns each group of resulting ExperimentResults
@@ -297,12 +310,18 @@ def acquire_rb_data(qc: QuantumComputer, experiments: Iterable[ObservablesExperi
     :param active_reset: Boolean flag indicating whether experiments should begin with an
         active reset instruction (this can make the collection of experiments run a lot faster).
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param max_in_flight: if positive, the sequences are compiled up to this many programs ahead
+        of the one running on the qc; see
+        :py:func:`~forest.benchmarking.observable_estimation.estimate_observables_of_experiments`
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
     :return: a list of ExperimentResults for each ObservablesExperiment
     """
-    results = []
-    for expt in tqdm(experiments, disable=not show_progress_bar):
-        results.append(list(estimate_observables(qc, expt, num_shots, active_reset=active_reset)))
-    return results
+    return estimate_observables_of_experiments(qc, experiments, num_shots,
+                                               active_reset=active_reset,
+                                               show_progress_bar=show_progress_bar,
+                                               max_in_flight=max_in_flight,
+                                               executable_cache=executable_cache)
 
 
 def covariances_of_all_iz_obs(expectations: Sequence[float], num_shots: int):
@@ -670,6 +689,176 @@ def do_rb(qc: QuantumComputer, benchmarker: BenchmarkConnection,
     return decays, expts, results
 
 
+def _rb_param_values(fit: ModelResult) -> Tuple[float, float, float]:
+    """
+    The fitted (amplitude, decay, baseline) of a fit returned by :py:func:`fit_rb_results`.
+    """
+    return tuple(fit.params[name].value for name in ['amplitude', 'decay', 'baseline'])
+
+
+def _decay_rel_std_err(fit: ModelResult) -> float:
+    """
+    The std_err of the fitted decay relative to its value; infinite if it could not be estimated.
+    """
+    decay = fit.params['decay']
+    if decay.stderr is None or not np.isfinite(decay.stderr) or decay.value == 0:
+        return np.inf
+    return decay.stderr / abs(decay.value)
+
+
+def _predicted_survival_variances(fit: ModelResult, candidate_depths: Sequence[int],
+                                  num_shots: int) -> np.ndarray:
+    """
+    Predict the variance of the survival estimated from num_shots at each candidate depth, from
+    the fitted survival. As in fit_rb_results, the variance is floored at the smallest variance
+    already fit, i.e. at the square of the inverse of the largest weight. If the fit is
+    unweighted, every variance is 1, as for the existing survivals.
+    """
+    if fit.weights is None:
+        return np.ones(len(candidate_depths))
+    amplitude, decay, baseline = _rb_param_values(fit)
+    survivals = np.clip(amplitude * decay ** np.asarray(candidate_depths) + baseline, 0, 1)
+    return np.maximum(survivals * (1 - survivals) / num_shots, np.max(fit.weights) ** -2)
+
+
+def _predicted_decay_std_errs(fit: ModelResult, depths: Sequence[int],
+                              candidate_depths: Sequence[int], num_shots: int,
+                              num_new_sequences: np.ndarray) -> np.ndarray:
+    """
+    Predict the std_err of the fitted decay if num_new sequences were added at a candidate depth,
+    for each number in num_new_sequences and each candidate depth.
+
+    The prediction linearizes the model about the current fit, as lmfit does to estimate the
+    covariance: the information of the existing sequences, weighted as in the fit, is added to that
+    of the new sequences, whose survival variance is predicted from the fitted survival and
+    num_shots, and the inverse is scaled by the reduced chi-square of the fit.
+
+    :return: an array of shape (len(num_new_sequences), len(candidate_depths))
+    """
+    amplitude, decay, baseline = _rb_param_values(fit)
+
+    def jacobian(ms):
+        ms = np.asarray(ms, dtype=float)
+        return np.stack([decay ** ms, amplitude * ms * decay ** (ms - 1), np.ones_like(ms)],
+                        axis=-1)
+
+    jac = jacobian(depths)
+    candidate_jac = jacobian(candidate_depths)
+    weights = np.ones(len(depths)) if fit.weights is None else np.asarray(fit.weights)
+    new_vars = _predicted_survival_variances(fit, candidate_depths, num_shots)
+
+    info = (jac * weights[:, np.newaxis] ** 2).T @ jac
+    candidate_info = np.einsum('ci,cj->cij', candidate_jac, candidate_jac) / new_vars[:, None, None]
+    total_info = info + np.asarray(num_new_sequences)[:, None, None, None] * candidate_info
+    covariance = np.linalg.pinv(total_info) * fit.redchi
+    return np.sqrt(np.abs(covariance[..., 1, 1]))
+
+
+def _next_rb_batch(fits: Dict[Tuple[int, ...], ModelResult], depths: Sequence[int],
+                   candidate_depths: Sequence[int], num_shots: int, target_rel_std_err: float,
+                   max_batch_size: int) -> List[int]:
+    """
+    Choose the depths of the next batch of sequences of :py:func:`do_adaptive_rb`.
+
+    The batch is at the single candidate depth which, at max_batch_size sequences, minimizes the
+    largest predicted relative std_err of the decay of any group. The batch is only as large as
+    needed for every group to reach target_rel_std_err, if fewer sequences are predicted to
+    suffice.
+    """
+    num_new_sequences = np.arange(1, max_batch_size + 1)
+    rel_std_errs = np.max([_predicted_decay_std_errs(fit, depths, candidate_depths, num_shots,
+                                                     num_new_sequences)
+                           / abs(fit.params['decay'].value) for fit in fits.values()], axis=0)
+
+    depth_idx = int(np.argmin(rel_std_errs[-1]))
+    reached = np.flatnonzero(rel_std_errs[:, depth_idx] <= target_rel_std_err)
+    batch_size = num_new_sequences[reached[0]] if len(reached) > 0 else max_batch_size
+    return [candidate_depths[depth_idx]] * int(batch_size)
+
+
+def do_adaptive_rb(qc: QuantumComputer, benchmarker: BenchmarkConnection,
+                   qubit_groups: Sequence[Sequence[int]], candidate_depths: Sequence[int],
+                   target_rel_std_err: float = .01, num_sequences_per_batch: int = 10,
+                   max_num_sequences: int = 500, interleaved_gate: Optional[Program] = None,
+                   num_shots: int = 1_000, active_reset: bool = False,
+                   show_progress_bar: bool = False, random_seed: Optional[int] = None) \
+        -> Tuple[Dict[Tuple[int, ...], ModelResult], List[int],
+                 List[ObservablesExperiment], List[List[ExperimentResult]]]:
+    """
+    Runs a RB experiment on the qubit_groups in batches of sequences, refitting the decay of each
+    group after each batch, until the std_err of every decay relative to its value is at most
+    target_rel_std_err.
+
+    The first batch has num_sequences_per_batch sequences at each of the smallest, middle and
+    largest candidate depths. Each fit is warm started from the parameters of the previous fit of
+    its group. Each later batch is at the candidate depth predicted to most reduce the largest
+    relative std_err of the decays, and has at most num_sequences_per_batch sequences; fewer are
+    run if they are predicted to reach the target.
+
+    :param qc: A quantum computer object on which the experiment will run.
+    :param benchmarker: object returned from pyquil.api.get_benchmarker() used to generate
+        sequences of Clifford elements decomposed into native gates.
+    :param qubit_groups: The partition of qubits into groups. For each group we will estimate an
+        rb decay, as in :py:func:`do_rb`.
+    :param candidate_depths: the depths from which the depth of each batch is chosen.
+    :param target_rel_std_err: the std_err of each decay relative to its value at which to stop.
+    :param num_sequences_per_batch: the largest number of sequences run between fits.
+    :param max_num_sequences: the total number of sequences after which to stop regardless of the
+        std_errs.
+    :param interleaved_gate: optional gate to interleave throughout the sequence, see [IRB]
+    :param num_shots: The number of shots collected for each experiment setting on each sequence.
+    :param active_reset: Boolean flag indicating whether experiments should begin with an
+        active reset instruction (this can make the collection of experiments run a lot faster).
+    :param show_progress_bar: displays a progress bar via tqdm for each batch if true.
+    :param random_seed: Random seed passed to benchmarker to seed sequence generation.
+    :return: The final fit of each group of qubits, whose rb decay is fit.params['decay'], along
+        with the depth of each sequence run and the experiments and corresponding results.
+    """
+    candidate_depths = sorted(candidate_depths)
+    initial_depths = [candidate_depths[idx] for idx in
+                      sorted({0, len(candidate_depths) // 2, len(candidate_depths) - 1})]
+    batch_depths = [depth for depth in initial_depths for _ in range(num_sequences_per_batch)]
+
+    groups = [tuple(group) for group in qubit_groups]
+    stats_by_group = {group: {'expectation': [], 'std_err': []} for group in groups}
+    fits = {}
+    depths = []
+    expts = []
+    results = []
+    while True:
+        batch_expts = generate_rb_experiments(benchmarker, groups, batch_depths,
+                                              interleaved_gate=interleaved_gate,
+                                              random_seed=random_seed)
+        if random_seed is not None:
+            # move past every seed used for this batch
+            random_seed += (len(groups) + 1) * len(batch_depths)
+
+        batch_results = list(acquire_rb_data(qc, batch_expts, num_shots,
+                                             active_reset=active_reset,
+                                             show_progress_bar=show_progress_bar))
+        for group, stats in get_stats_by_qubit_group(groups, batch_results).items():
+            stats_by_group[group]['expectation'] += stats['expectation']
+            stats_by_group[group]['std_err'] += stats['std_err']
+        depths += batch_depths
+        expts += batch_expts
+        results += batch_results
+
+        for group, stats in stats_by_group.items():
+            param_guesses = _rb_param_values(fits[group]) if group in fits else None
+            fits[group] = fit_rb_results(depths, stats['expectation'], stats['std_err'],
+                                         num_shots, param_guesses=param_guesses)
+
+        if all(_decay_rel_std_err(fit) <= target_rel_std_err for fit in fits.values()) \
+                or len(depths) >= max_num_sequences:
+            break
+
+        batch_depths = _next_rb_batch(fits, depths, candidate_depths, num_shots,
+                                      target_rel_std_err,
+                                      min(num_sequences_per_batch, max_num_sequences - len(depths)))
+
+    return fits, depths, expts, results
+
+
 ########
 # Interleaved RB Analysis
 ########
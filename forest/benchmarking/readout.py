@@ -9,6 +9,8 @@ from pyquil.api import QuantumComputer
 from pyquil.gates import RX, RZ, RESET, MEASURE
 from pyquil.quilbase import Measurement, Pragma
 
+from forest.benchmarking.compilation import ExecutableCache
+from forest.benchmarking.observable_estimation import ShotStore
 from forest.benchmarking.utils import bitstring_prep, parameterized_bitstring_prep
 
 
@@ -69,7 +71,9 @@ def estimate_confusion_matrix(qc: QuantumComputer, qubit: int, num_shots: int =
 def estimate_joint_confusion_in_set(qc: QuantumComputer, qubits: Sequence[int] = None,
                                     num_shots: int = 1000, joint_group_size: int = 1,
                                     use_param_program: bool = True, use_active_reset=False,
-                                    show_progress_bar: bool = False) \
+                                    show_progress_bar: bool = False,
+                                    executable_cache: ExecutableCache = None,
+                                    shot_store: ShotStore = None) \
                                     -> Dict[Tuple[int, ...], np.ndarray]:
     """
     Measures the joint readout confusion matrix for all groups of size group_size among the qubits.
@@ -113,6 +117,11 @@ def estimate_joint_confusion_in_set(qc: QuantumComputer, qubits: Sequence[int] =
         matrices. The method estimate_joint_active_reset_confusion separately characterizes
         active reset.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
+    :param shot_store: if provided, the raw shots measured for each bitstring on each group are
+        appended to this :py:class:`~forest.benchmarking.observable_estimation.ShotStore`, with
+        the prepared bitstring stored as metadata.
     :return: a dictionary whose keys are all possible joint_group_sized tuples that can be
         formed from the qubits. Each value is an estimated 2^group_size square confusion matrix
         for the corresponding tuple of qubits. Each key is listed in order of increasing qubit
@@ -147,7 +156,7 @@ def estimate_joint_confusion_in_set(qc: QuantumComputer, qubits: Sequence[int] =
                 prep_and_meas = parameterized_bitstring_prep(group, reg_name, append_measure=True)
                 param_program = program_start + prep_and_meas
                 param_program.wrap_in_numshots_loop(shots=num_shots)
-                executable = qc.compiler.native_quil_to_executable(param_program)
+                executable = _native_quil_to_executable(qc, param_program, executable_cache)
 
             matrix = np.zeros((2 ** joint_group_size, 2 ** joint_group_size))
             for row, bitstring in enumerate(itertools.product([0, 1], repeat=joint_group_size)):
@@ -162,10 +171,13 @@ def estimate_joint_confusion_in_set(qc: QuantumComputer, qubits: Sequence[int] =
                     bitstring_program = program_start + bitstring_prep(group, bitstring,
                                                                        append_measure=True)
                     bitstring_program.wrap_in_numshots_loop(shots=num_shots)
-                    executable = qc.compiler.native_quil_to_executable(bitstring_program)
+                    executable = _native_quil_to_executable(qc, bitstring_program,
+                                                            executable_cache)
 
                 # update confusion matrix
                 results = qc.run(executable, memory_map=memory_map).get_register_map().get('ro')
+                if shot_store is not None:
+                    shot_store.append(results, group, bitstring=list(bitstring))
                 for result in results:
                     base = np.array([2 ** i for i in reversed(range(joint_group_size))])
                     observed = np.sum(base * result)
@@ -180,6 +192,14 @@ def estimate_joint_confusion_in_set(qc: QuantumComputer, qubits: Sequence[int] =
     return confusion_matrices
 
 
+def _native_quil_to_executable(qc: QuantumComputer, program: Program,
+                               executable_cache: ExecutableCache = None):
+    """Compile the native quil program, using the executable_cache if one is provided."""
+    if executable_cache is None:
+        return qc.compiler.native_quil_to_executable(program)
+    return executable_cache.compile(qc, program, to_native_quil=False)
+
+
 def marginalize_confusion_matrix(confusion_matrix: np.ndarray, all_qubits: Sequence[int],
                                  marginal_subset: Tuple[int, ...]) -> np.ndarray:
     """
@@ -233,6 +253,101 @@ def marginalize_confusion_matrix(confusion_matrix: np.ndarray, all_qubits: Seque
     return marginal.reshape(dimension, dimension) / renormalization_factor
 
 
+def readout_parity_fidelities(confusion_matrices: Dict[Tuple[int, ...], np.ndarray],
+                              num_shots: int, symmetrized: bool = True) \
+        -> Dict[Tuple[int, ...], Tuple[float, float]]:
+    """
+    Find the expected parity of the readout of each subset of qubits of each confusion matrix.
+
+    For a subset T of the qubits of a group, a bitstring b is prepared on the group and the
+    parity of the bits of T that are read out is multiplied by the parity of the bits of T in b.
+    Ideally this is always 1. With symmetrized readout the expectation is averaged over all b,
+    and without it only b = 0 is prepared. This expectation is exactly the calibration
+    expectation that :py:func:`~forest.benchmarking.observable_estimation.
+    calibrate_observable_estimates` measures for an observable acting on T, excluding the error
+    of the basis change rotations, so that the calibration of every observable can be derived
+    from the confusion matrices returned by :py:func:`estimate_joint_confusion_in_set`.
+
+    The expectations for all subsets of a group are found at once by a Walsh-Hadamard transform
+    of its confusion matrix. Subsets contained in several groups, e.g. single qubits when the
+    groups are pairs, are averaged over the groups.
+
+    :param confusion_matrices: a dictionary of joint confusion matrices keyed by groups of qubits,
+        as returned by :py:func:`estimate_joint_confusion_in_set`. The bits of the rows and
+        columns of each matrix label the qubits in the order of its group, which need not be
+        sorted.
+    :param num_shots: the number of shots in the measurement of each bitstring of each group,
+        used to estimate the variance of each expectation.
+    :param symmetrized: if true the expectation is averaged over all prepared bitstrings.
+    :return: a dictionary keyed by each non-empty subset of each group, listed in increasing
+        order, whose values are the (mean, variance) of its expected parity.
+    """
+    estimates = {}
+    for group, matrix in confusion_matrices.items():
+        group_size = len(group)
+        # bit i of each index labels the i-th qubit of the group, with the first most significant
+        bits = (np.arange(2 ** group_size)[:, np.newaxis]
+                >> np.arange(group_size)[::-1]) & 1
+        signs = (-1) ** (bits @ bits.T)
+        # entry (b, T) is the expected parity of subset T for the prepared bitstring b
+        parities = (matrix @ signs) * signs
+        parity_vars = (1 - parities ** 2) / num_shots
+        if symmetrized:
+            means = np.mean(parities, axis=0)
+            variances = np.sum(parity_vars, axis=0) / 4 ** group_size
+        else:
+            means, variances = parities[0], parity_vars[0]
+
+        for subset_idx in range(1, 2 ** group_size):
+            # the parity does not depend on the order of the qubits, so the key is sorted
+            subset = tuple(sorted(q for q, bit in zip(group, bits[subset_idx]) if bit))
+            estimates.setdefault(subset, []).append((means[subset_idx], variances[subset_idx]))
+
+    return {subset: (float(np.mean([mean for mean, _ in values])),
+                     float(np.mean([var for _, var in values])) / len(values))
+            for subset, values in estimates.items()}
+
+
+def product_readout_calibration(parity_fidelities: Dict[Tuple[int, ...], Tuple[float, float]],
+                                qubits: Sequence[int]) -> Tuple[float, float]:
+    """
+    Derive the calibration expectation of an observable on the given qubits from the parity
+    fidelities of :py:func:`readout_parity_fidelities`.
+
+    If the qubits were characterized jointly their fidelity is returned directly. Otherwise the
+    readout of each qubit is taken to be independent, so that the calibration is the product of
+    the single qubit fidelities, corrected by the ratio f_ab / (f_a f_b) for each pair of qubits
+    whose joint fidelity is known. The variance follows by propagating the variance of each
+    fidelity through the product.
+
+    :param parity_fidelities: the (mean, variance) of the expected parity of subsets of qubits.
+    :param qubits: the qubits the observable acts on.
+    :return: the (mean, variance) of the calibration expectation.
+    """
+    qubits = tuple(sorted(qubits))
+    if len(qubits) == 0:
+        return 1., 0.
+    if qubits in parity_fidelities:
+        return parity_fidelities[qubits]
+
+    # the power of each fidelity in the product
+    powers = {}
+    for qubit in qubits:
+        if (qubit,) not in parity_fidelities:
+            raise ValueError(f"The readout of qubit {qubit} has not been characterized.")
+        powers[(qubit,)] = 1
+    for pair in itertools.combinations(qubits, 2):
+        if pair in parity_fidelities:
+            powers[pair] = 1
+            for qubit in pair:
+                powers[(qubit,)] -= 1
+
+    mean = np.prod([parity_fidelities[subset][0] ** power for subset, power in powers.items()])
+    rel_var = np.sum([power ** 2 * parity_fidelities[subset][1] / parity_fidelities[subset][0] ** 2
+                      for subset, power in powers.items()])
+    return float(mean), float(mean ** 2 * rel_var)
+
+
 def estimate_joint_reset_confusion(qc: QuantumComputer, qubits: Sequence[int] = None,
                                    num_trials: int = 10, joint_group_size: int = 1,
                                    use_active_reset: bool = True, show_progress_bar: bool = False) \
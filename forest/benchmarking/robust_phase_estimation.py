@@ -11,11 +11,12 @@ from pyquil.quil import Program, merge_programs, DefGate, Pragma
 from pyquil.quilbase import Gate
 from pyquil.api import QuantumComputer
 from pyquil.paulis import PauliTerm
+from forest.benchmarking.compilation import ExecutableCache
 from forest.benchmarking.utils import bloch_vector_to_standard_basis, is_pos_pow_two
 from forest.benchmarking.observable_estimation import ExperimentSetting, plusZ, minusZ, \
     ObservablesExperiment, ExperimentResult, estimate_observables, plusX, _OneQState, \
     TensorProductState, group_settings, get_results_by_qubit_groups, \
-    calibrate_observable_estimates
+    calibrate_observable_estimates, CalibrationCache
 
 import matplotlib.pyplot as plt
 
@@ -261,7 +262,9 @@ def acquire_rpe_data(qc: QuantumComputer,
                      experiments: Sequence[ObservablesExperiment],
                      multiplicative_factor: float = 1.0, additive_error: Optional[float] = None,
                      min_shots: int = 500, active_reset: bool = False,
-                     mitigate_readout_errors: bool = False, show_progress_bar: bool = False) \
+                     mitigate_readout_errors: bool = False, show_progress_bar: bool = False,
+                     executable_cache: ExecutableCache = None,
+                     calibration_cache: CalibrationCache = None) \
         -> List[List[ExperimentResult]]:
     """
     Run each experiment in the sequence of experiments.
@@ -283,6 +286,11 @@ def acquire_rpe_data(qc: QuantumComputer,
     :param mitigate_readout_errors: Boolean flag indicating whether bias due to imperfect
         readout should be corrected
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
+    :param calibration_cache: an optional cache of calibrations, shared across calls, from which
+        unexpired calibrations are reused when mitigate_readout_errors is true. See
+        :py:class:`~forest.benchmarking.observable_estimation.CalibrationCache`
     :return: a copy of the input experiments populated with results in each layer.
     """
     depths = [2**idx for idx in range(len(experiments))]
@@ -297,12 +305,15 @@ def acquire_rpe_data(qc: QuantumComputer,
         if mitigate_readout_errors:
             res = list(
                 estimate_observables(qc, expt, num_shots=num_shots, active_reset=active_reset,
-                                     symm_type=-1))
+                                     symm_type=-1, executable_cache=executable_cache))
 
-            results.append(list(calibrate_observable_estimates(qc, res, num_shots=num_shots)))
+            results.append(list(calibrate_observable_estimates(
+                qc, res, num_shots=num_shots, executable_cache=executable_cache,
+                calibration_cache=calibration_cache)))
         else:
             results.append(list(
-                estimate_observables(qc, expt, num_shots=num_shots, active_reset=active_reset)))
+                estimate_observables(qc, expt, num_shots=num_shots, active_reset=active_reset,
+                                     executable_cache=executable_cache)))
 
     return results
 
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from pyquil import Program
+from pyquil.gates import CNOT, CZ, H, S, X
+from pyquil.paulis import sX, sY, sZ
+from pyquil.simulation.tools import program_unitary
+
+from forest.benchmarking.cliffords import *
+
+
+def test_clifford_group(tmp_path):
+    for num_qubits, size in [(1, 24), (2, 11520)]:
+        group = get_clifford_group(num_qubits, cache_dir=str(tmp_path))
+        assert len(group) == size
+        # the second time the group is loaded from disk
+        loaded = CliffordGroup.load(str(tmp_path / f'clifford_group_{num_qubits}q_v1.npz'))
+        assert loaded.words == group.words
+
+        qubits = list(range(num_qubits))
+        rs = np.random.RandomState(num_qubits)
+        for first, second in rs.randint(size, size=(20, 2)):
+            assert group.compose(first, group.inverse(first)) == 0
+            unitary = program_unitary(group.program(first, qubits)
+                                      + group.program(second, qubits), num_qubits)
+            assert group.index(tableau_from_unitary(unitary)) == group.compose(first, second)
+
+    # a truncated file is rebuilt, and stored again, rather than raising
+    corrupt_dir = tmp_path / 'corrupt'
+    corrupt_dir.mkdir()
+    filename = corrupt_dir / 'clifford_group_1q_v1.npz'
+    filename.write_bytes((tmp_path / 'clifford_group_1q_v1.npz').read_bytes()[:100])
+    with pytest.warns(UserWarning):
+        group = get_clifford_group(1, cache_dir=str(corrupt_dir))
+    assert len(group) == 24
+    assert CliffordGroup.load(str(filename)).words == group.words
+
+
+def test_apply_clifford_to_pauli():
+    assert apply_clifford_to_pauli(Program(H(0)), 2 * sX(0)) == 2 * sZ(0)
+    assert apply_clifford_to_pauli(Program(S(0)), sY(0)) == -1 * sX(0)
+    assert apply_clifford_to_pauli(Program(CNOT(3, 5)), sX(3) * sZ(5)) == -1 * sY(3) * sY(5)
+
+
+def test_program_tableau():
+    program = Program(H(0), CNOT(0, 2), S(1), CZ(2, 1), S(0).dagger(), X(1).controlled(0))
+    tableau = program_tableau(program, [0, 1, 2])
+    for expected, actual in zip(tableau_from_unitary(program_unitary(program, 3)), tableau):
+        np.testing.assert_array_equal(expected, actual)
+
+    paulis = [sX(0) * sZ(2), 2 * sY(1), sZ(0) * sX(1) * sY(2), sX(4)]
+    assert apply_clifford_to_paulis(program, paulis) == [apply_clifford_to_pauli(program, pauli)
+                                                         for pauli in paulis]
+
+
+def test_local_rb_sequence(tmp_path):
+    sequence = generate_local_rb_sequence([0, 1], 10, interleaved_gate=Program(CZ(0, 1)),
+                                          random_seed=1, cache_dir=str(tmp_path))
+    assert len(sequence) == 10
+    unitary = program_unitary(sum(sequence, Program()), 2)
+    np.testing.assert_allclose(abs(np.trace(unitary)) / 4, 1)
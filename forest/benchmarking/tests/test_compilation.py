@@ -172,3 +172,51 @@ def test_random_progs(n_qubits, prog_length):
         u2 = program_unitary(basic_compile(prog), n_qubits=n_qubits)
 
         assert_all_close_up_to_global_phase(u1, u2, atol=1e-12)
+
+
+def test_executable_cache(tmpdir):
+    from pyquil import get_qc
+    from forest.benchmarking.compilation import ExecutableCache
+
+    qc = get_qc('2q-pyqvm')
+    qc.compiler.quil_to_native_quil = basic_compile
+
+    def measured_program(gate, num_shots=10):
+        prog = Program(gate)
+        ro = prog.declare('ro', 'BIT', 1)
+        prog += MEASURE(0, ro[0])
+        prog.wrap_in_numshots_loop(num_shots)
+        return prog
+
+    cache = ExecutableCache(max_size=2, cache_dir=str(tmpdir), max_disk_entries=3)
+    exe = cache.compile(qc, measured_program(X(0)))
+    assert cache.compile(qc, measured_program(X(0))) is exe
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # the number of shots is part of the key
+    cache.compile(qc, measured_program(X(0), num_shots=20))
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # the least recently used executable is evicted from memory but can be loaded from disk
+    cache.compile(qc, measured_program(H(0)))
+    assert len(cache) == 2
+    assert cache.key(qc, measured_program(X(0))) not in cache
+    assert cache.compile(qc, measured_program(X(0))).out() == exe.out()
+    assert (cache.hits, cache.disk_hits, cache.misses) == (2, 1, 3)
+
+    # a new cache with the same directory reuses the persisted executables
+    new_cache = ExecutableCache(cache_dir=str(tmpdir), max_disk_entries=3)
+    new_cache.compile(qc, measured_program(H(0)))
+    assert (new_cache.hits, new_cache.disk_hits, new_cache.misses) == (1, 1, 0)
+
+    new_cache.compile(qc, measured_program(RZ(pi, 0)))
+    assert len(tmpdir.listdir()) == 3
+    new_cache.clear(include_disk=True)
+    assert len(new_cache) == 0 and len(tmpdir.listdir()) == 0
+
+    # executables are not keyed by the name of the qc alone if its ISA cannot be found
+    def broken_isa():
+        raise ValueError('unsupported gate')
+    qc.compiler.quantum_processor.to_compiler_isa = broken_isa
+    with pytest.raises(ValueError):
+        cache.key(qc, measured_program(X(0)))
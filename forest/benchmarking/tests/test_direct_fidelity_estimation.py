@@ -1,13 +1,16 @@
 from forest.benchmarking.direct_fidelity_estimation import \
     (generate_exhaustive_state_dfe_experiment, generate_exhaustive_process_dfe_experiment,
      generate_monte_carlo_state_dfe_experiment, generate_monte_carlo_process_dfe_experiment,
-     acquire_dfe_data, estimate_dfe, do_dfe)
+     generate_importance_sampled_state_dfe_experiment,
+     generate_importance_sampled_process_dfe_experiment, acquire_dfe_data, estimate_dfe,
+     estimate_dfe_from_arrays, do_dfe)
 
 from pyquil import Program
 from pyquil.api import BenchmarkConnection
 from pyquil.gates import *
 from pyquil.simulation import NumpyWavefunctionSimulator
-from forest.benchmarking.observable_estimation import _one_q_state_prep
+from pyquil.simulation.tools import program_unitary, lifted_pauli, lifted_state_operator
+from forest.benchmarking.observable_estimation import _one_q_state_prep, zeros_state
 
 from numpy.testing import assert_almost_equal, assert_allclose
 import numpy as np
@@ -117,6 +120,80 @@ def test_monte_carlo_state_dfe(benchmarker: BenchmarkConnection):
         assert_almost_equal(expectation, 1., decimal=7)
 
 
+def test_dfe_without_benchmarker():
+    # Clifford programs are conjugated locally, so no BenchmarkConnection is needed
+    program = Program(H(3), CNOT(3, 5), S(1), CZ(1, 5), X(3))
+    qubits = [5, 1, 3]
+    unitary = program_unitary(program, 6)
+    rs = np.random.default_rng(0)
+    for expt in [generate_exhaustive_state_dfe_experiment(None, program, qubits),
+                 generate_exhaustive_process_dfe_experiment(None, program, qubits),
+                 generate_monte_carlo_state_dfe_experiment(None, program, qubits, 20, rs),
+                 generate_monte_carlo_process_dfe_experiment(None, program, qubits, 20, rs)]:
+        for settings in expt:
+            for setting in settings:
+                # the ideal output has expectation 1 for each observable
+                rho = lifted_state_operator(setting.in_state * zeros_state([0, 2, 4]), range(6))
+                observable = lifted_pauli(setting.observable, range(6))
+                assert_allclose(np.trace(observable @ unitary @ rho @ unitary.conj().T), 1.,
+                                atol=1e-12)
+
+
+def test_monte_carlo_dfe_sampling():
+    process = Program(H(3), CNOT(3, 1))
+    rs = np.random.default_rng(0)
+    texpt = generate_monte_carlo_process_dfe_experiment(None, process, [3, 1], 50, rs)
+    assert len(texpt) == 50
+    # all identity Paulis are rejected
+    assert all(len(setting[0].observable) > 0 for setting in texpt)
+
+    wfnsim = NumpyWavefunctionSimulator(n_qubits=4)
+    for setting in texpt:
+        setting = setting[0]
+        prog = Program()
+        for oneq_state in setting.in_state.states:
+            prog += _one_q_state_prep(oneq_state)
+        prog += process
+        expectation = wfnsim.reset().do_program(prog).expectation(setting.observable)
+        assert_almost_equal(expectation, 1., decimal=7)
+
+    assert estimate_dfe_from_arrays(np.ones(50), np.zeros(50), 2, 'process') == (1., 0.)
+
+
+def test_importance_sampled_dfe():
+    qubits = [3, 1]
+    process = Program(RX(0.3, 3), CNOT(3, 1), RY(1.1, 1), T(3))
+    rs = np.random.default_rng(1)
+    wfnsim = NumpyWavefunctionSimulator(n_qubits=4)
+
+    texpt = generate_importance_sampled_state_dfe_experiment(process, qubits, 50, rs)
+    for setting in texpt:
+        setting = setting[0]
+        expectation = wfnsim.reset().do_program(process).expectation(setting.observable)
+        assert_almost_equal(expectation, 1., decimal=7)
+
+    # for processes each expectation is only 1 on average over the random eigenstates
+    texpt = generate_importance_sampled_process_dfe_experiment(process, qubits, 2000, rs)
+    expectations = []
+    for setting in texpt:
+        setting = setting[0]
+        prog = Program()
+        for oneq_state in setting.in_state.states:
+            prog += _one_q_state_prep(oneq_state)
+        prog += process
+        expectations.append(wfnsim.reset().do_program(prog).expectation(setting.observable))
+    assert_allclose(np.mean(expectations), 1., atol=4 * np.std(expectations) / np.sqrt(2000))
+
+    # without rs, seeding numpy's global random state makes the experiments reproducible
+    for generate in [generate_importance_sampled_state_dfe_experiment,
+                     generate_importance_sampled_process_dfe_experiment]:
+        np.random.seed(2)
+        first = [setting for settings in generate(process, qubits, 20) for setting in settings]
+        np.random.seed(2)
+        assert first == [setting for settings in generate(process, qubits, 20)
+                         for setting in settings]
+
+
 def test_acquire_dfe_data(benchmarker: BenchmarkConnection, qvm):
     # pick (Clifford) process that acts as identity on qubits 0 and 1
     process = Program(X(2), X(3))
@@ -1,3 +1,5 @@
+import itertools
+import os
 import random
 random.seed(1)  # seed random number generation for all calls to rand_ops
 
@@ -9,7 +11,8 @@ from pyquil.api import WavefunctionSimulator
 from pyquil.paulis import sX, sY, sZ, PauliSum
 from forest.benchmarking.observable_estimation import *
 from forest.benchmarking.observable_estimation import _OneQState,\
-    _max_tpb_overlap, _max_weight_operator, _max_weight_state, _one_q_sic_prep
+    _max_tpb_overlap, _max_weight_operator, _max_weight_state, _one_q_sic_prep, \
+    _symmetrization_flips
 
 
 def _generate_random_states(n_qubits, n_terms):
@@ -128,6 +131,37 @@ def test_experiment_deser(tmpdir):
     assert suite == suite2
 
 
+def test_experiment_npz(tmpdir):
+    expts = [
+        [ExperimentSetting(plusX(0) * SIC2(3), sX(0) * sZ(3)),
+         ExperimentSetting(plusX(0), 0.5 * sI(1))],
+        [ExperimentSetting(TensorProductState(), sZ(3) * sY(0)),
+         ExperimentSetting(minusZ(2), -1 * sY(2))],
+    ]
+    suite = ObservablesExperiment(settings=expts, program=Program(X(0), Y(1)))
+    fn = to_npz(f'{tmpdir}/suite', suite)
+    assert fn.endswith('.npz')
+    suite2 = read_npz(fn)
+    assert suite == suite2
+
+    results = [ExperimentResult(setting=setting, expectation=.1 * idx, std_err=.01,
+                                total_counts=100)
+               for idx, setting in enumerate(setting for group in expts for setting in group)]
+    results[1] = ExperimentResult(setting=results[1].setting, expectation=.5 + .1j, total_counts=1,
+                                  calibration_expectation=.9, calibration_counts=200)
+    results2 = read_npz(to_npz(f'{tmpdir}/results.npz', results))
+    assert results == results2
+    assert [str(res.setting) for res in results] == [str(res.setting) for res in results2]
+
+    # partial loading gives the same groups as get_results_by_qubit_groups
+    groups = [(0, 3), (2,)]
+    assert read_npz(f'{tmpdir}/results.npz', qubit_groups=groups) == \
+        get_results_by_qubit_groups(results, groups)
+    suite_on_groups = read_npz(fn, qubit_groups=groups)
+    assert [list(group) for group in suite_on_groups[(0, 3)]] == [expts[0], expts[1][:1]]
+    assert [list(group) for group in suite_on_groups[(2,)]] == [expts[0][1:], expts[1][1:]]
+
+
 @pytest.fixture(params=['clique-removal', 'greedy'])
 def grouping_method(request):
     return request.param
@@ -242,6 +276,99 @@ def test_estimate_observables_many_progs():
             np.testing.assert_allclose(wfn_exps[res.setting], res.expectation, atol=3*res.std_err)
 
 
+def test_estimate_observables_pipelined():
+    expts = [
+        ExperimentSetting(TensorProductState(), o1 * o2)
+        for o1, o2 in itertools.product([sI(0), sX(0), sY(0), sZ(0)], [sI(1), sX(1), sY(1), sZ(1)])
+    ]
+    gsuite = group_settings(ObservablesExperiment(expts, program=Program(X(0), CNOT(0, 1))))
+
+    qc = get_qc('2q-qvm')
+    qc.qam.random_seed = 1
+    serial = list(estimate_observables(qc, gsuite, num_shots=1000, symm_type=-1))
+    pipelined = list(estimate_observables(qc, gsuite, num_shots=1000, symm_type=-1,
+                                          max_in_flight=2))
+    assert [res.setting for res in serial] == [res.setting for res in pipelined]
+    for res_s, res_p in zip(serial, pipelined):
+        assert res_s.total_counts == res_p.total_counts
+        np.testing.assert_allclose(res_s.expectation, res_p.expectation, atol=.15)
+
+    results = estimate_observables_of_experiments(qc, [gsuite, gsuite], num_shots=100,
+                                                  max_in_flight=3)
+    assert [len(res) for res in results] == [len(expts), len(expts)]
+
+
+def test_pipelined_order():
+    import threading
+    import time
+    from forest.benchmarking.observable_estimation import _pipelined
+    main_thread = threading.get_ident()
+
+    def prepare(item):
+        time.sleep(.01 * (item % 3))
+        return 10 * item
+
+    def execute(item, prepared):
+        assert threading.get_ident() == main_thread
+        return prepared + 1
+
+    def post_process(item, executed):
+        time.sleep(.01 * (item % 2))
+        return item, executed
+
+    outputs = list(_pipelined(range(10), prepare, execute, post_process, max_in_flight=3))
+    assert outputs == [(item, 10 * item + 1) for item in range(10)]
+
+    with pytest.raises(ValueError):
+        list(_pipelined(range(10), prepare, execute, post_process, max_in_flight=0))
+
+
+def test_parametric_prep_and_meas_angles():
+    from pyquil.simulation.tools import program_unitary
+    from forest.benchmarking.compilation import _RY
+    from forest.benchmarking.observable_estimation import _one_q_state_prep, \
+        _one_q_state_prep_angles, _local_pauli_eig_meas, _local_pauli_eig_meas_angles
+
+    def unitary(program):
+        return program_unitary(Program(I(0)) + program, n_qubits=1)
+
+    for state in [SIC0, SIC1, SIC2, SIC3, plusX, minusX, plusY, minusY, plusZ, minusZ]:
+        oneq_state = state(0).states[0]
+        polar, azimuthal = _one_q_state_prep_angles(oneq_state)
+        expected = unitary(_one_q_state_prep(oneq_state))[:, 0]
+        actual = unitary(_RY(polar, 0) + RZ(azimuthal, 0))[:, 0]
+        np.testing.assert_allclose(abs(np.vdot(expected, actual)), 1)
+
+    z = np.diag([1, -1])
+    for op in ['X', 'Y', 'Z']:
+        azimuthal, polar = _local_pauli_eig_meas_angles(op)
+        expected = unitary(_local_pauli_eig_meas(op, 0))
+        actual = unitary(Program(RZ(azimuthal, 0)) + _RY(polar, 0))
+        np.testing.assert_allclose(expected.conj().T @ z @ expected, actual.conj().T @ z @ actual,
+                                   atol=1e-12)
+
+
+def test_estimate_observables_parametric():
+    settings = [ExperimentSetting(in_state, o1 * o2)
+                for in_state in [plusZ(0) * plusZ(1), minusX(0) * plusY(1), SIC2(0)]
+                for o1, o2 in itertools.product([sI(0), sX(0), sY(0), sZ(0)],
+                                                [sI(1), sX(1), sY(1), sZ(1)])]
+    gsuite = group_settings(ObservablesExperiment(settings, program=Program(CNOT(0, 1))))
+
+    program, meas_qubits, memory_maps = generate_parametric_experiment_program(gsuite)
+    assert meas_qubits == [0, 1]
+    assert len(memory_maps) == len(gsuite)
+
+    qc = get_qc('2q-qvm')
+    qc.qam.random_seed = 1
+    separate = list(estimate_observables(qc, gsuite, num_shots=1000))
+    parametric = list(estimate_observables(qc, gsuite, num_shots=1000,
+                                           use_parametric_program=True))
+    assert [res.setting for res in separate] == [res.setting for res in parametric]
+    for res_s, res_p in zip(separate, parametric):
+        np.testing.assert_allclose(res_s.expectation, res_p.expectation, atol=.15)
+
+
 def test_append():
     expts = [
         [ExperimentSetting(TensorProductState(), sX(0) * sI(1)), ExperimentSetting(TensorProductState(), sI(0) * sX(1))],
@@ -413,6 +540,40 @@ def test_group_experiments_greedy():
     assert grouped_obs_expt == expected_grouped_obs_expt
 
 
+def test_max_tpb_overlap_random_settings():
+    def _reference_max_tpb_overlap(settings):
+        # straightforward greedy grouping on the PauliTerm / TensorProductState objects
+        diagonal_sets = {}
+        for setting in settings:
+            for es, es_list in diagonal_sets.items():
+                trial_es_list = es_list + [setting]
+                diag_in = _max_weight_state(expst.in_state for expst in trial_es_list)
+                diag_out = _max_weight_operator(expst.observable for expst in trial_es_list)
+                if diag_in is not None and diag_out is not None:
+                    if len(diag_in) > len(es.in_state) or len(diag_out) > len(es.observable):
+                        del diagonal_sets[es]
+                        diagonal_sets[ExperimentSetting(diag_in, diag_out)] = trial_es_list
+                    else:
+                        diagonal_sets[es] = trial_es_list
+                    break
+            else:
+                diagonal_sets[setting] = [setting]
+        return diagonal_sets
+
+    np.random.seed(7)
+    for n_qubits, n_terms in [(1, 10), (2, 30), (4, 50), (12, 40)]:
+        states = _generate_random_states(n_qubits, n_terms)
+        # drop some qubits so that settings have a range of weights
+        states = [TensorProductState(s for s in state if np.random.rand() < .6)
+                  for state in states]
+        settings = [ExperimentSetting(st, op)
+                    for st, op in zip(states, _generate_random_paulis(n_qubits, n_terms))]
+        expected = _reference_max_tpb_overlap(settings)
+        actual = _max_tpb_overlap(ObservablesExperiment(settings, Program()))
+        assert list(expected.keys()) == list(actual.keys())
+        assert list(expected.values()) == list(actual.values())
+
+
 def test_expt_settings_diagonal_in_tpb():
     def _expt_settings_diagonal_in_tpb(es1: ExperimentSetting, es2: ExperimentSetting):
         """
@@ -529,6 +690,88 @@ def test_shots_to_obs_moments():
     assert obs_var == 0.0
 
 
+def test_shots_to_obs_moments_batch():
+    np.random.seed(3)
+    num_shots = 1000
+    qubits = [0, 3, 1, 2, 4, 5, 6, 7, 8, 9]
+    # correlate the first two columns so that some covariances are appreciably non-zero
+    bs_results = np.random.randint(2, size=(num_shots, len(qubits)))
+    bs_results[:, 1] = bs_results[:, 0] ^ (np.random.rand(num_shots) < .1)
+    observables = [sZ(0), sZ(3), sZ(0) * sZ(3), 0.5 * sI(0), sX(9) * sY(1), -2 * sZ(1) * sZ(8)]
+
+    for prior in [False, True]:
+        means, variances, covariance = shots_to_obs_moments_batch(bs_results, qubits,
+                                                                  observables, prior)
+        for idx, obs in enumerate(observables):
+            mean, var = shots_to_obs_moments(bs_results, qubits, obs, prior)
+            np.testing.assert_allclose(means[idx], mean)
+            np.testing.assert_allclose(variances[idx], var)
+            assert covariance[idx, idx] == variances[idx]
+
+    obs_vals = np.array([1 - 2 * bs_results[:, 0], 1 - 2 * bs_results[:, 1]])
+    np.testing.assert_allclose(covariance[0, 1], np.cov(obs_vals, bias=True)[0, 1] / num_shots)
+    assert covariance[0, 1] > .5 / num_shots
+    assert np.all(covariance[3] == 0)
+    np.testing.assert_allclose(covariance, covariance.T)
+
+
+def test_shot_store(tmp_path):
+    np.random.seed(3)
+    path = str(tmp_path / 'expt')
+    store = ShotStore(path)
+    qubits = [0, 3, 1, 2, 4, 5, 6, 7, 8, 9]
+    settings = [ExperimentSetting(zeros_state(qubits), sZ(0) * sZ(3)),
+                ExperimentSetting(zeros_state(qubits), sX(9) * sY(1))]
+    wide = np.random.randint(2, size=(100, len(qubits)))
+    narrow = np.random.randint(2, size=(50, 2))
+    assert store.append(wide, qubits, settings) == 0
+    assert store.append(narrow, [4, 2], bitstring=[1, 0]) == 1
+
+    # records are read back from disk, also by a store opened later
+    for reopened in [store, ShotStore(path)]:
+        assert len(reopened) == 2
+        first, second = reopened
+        np.testing.assert_array_equal(first.bitarray, wide)
+        assert first.qubits == tuple(qubits) and first.settings == tuple(settings)
+        np.testing.assert_array_equal(second.bitarray, narrow)
+        assert second.settings == () and second.metadata == {'bitstring': [1, 0]}
+
+    for prior in [False, True]:
+        results = store.results(use_beta_dist_unbiased_prior=prior)
+        assert [res.setting for res in results] == settings
+        for res in results:
+            mean, var = shots_to_obs_moments(wide, qubits, res.setting.observable, prior)
+            np.testing.assert_allclose(res.expectation, mean)
+            np.testing.assert_allclose(res.std_err, np.sqrt(var))
+        # the covariance of the estimates of settings estimated from the same shots is kept
+        _, _, covariance = shots_to_obs_moments_batch(
+            wide, qubits, [setting.observable for setting in settings], prior)
+        for res, cov_row in zip(results, covariance):
+            np.testing.assert_allclose(res.covariance, cov_row)
+
+    # appending after reading extends the memory map
+    store.append(narrow[::-1], [4, 2])
+    np.testing.assert_array_equal(store[2].bitarray, narrow[::-1])
+    with pytest.raises(ValueError):
+        store.append(narrow, [4, 2, 1])
+
+
+def test_symmetrization_flips():
+    for num_qubits in [1, 3, 5, 8]:
+        flips, min_trials = _symmetrization_flips(num_qubits, -1)
+        assert len(np.unique(flips, axis=0)) == 2 ** num_qubits == min_trials
+        # every combination of flips of any symm_type qubits is made equally often
+        for symm_type in [1, 2, 3]:
+            flips, min_trials = _symmetrization_flips(num_qubits, symm_type)
+            assert flips.shape[1] == num_qubits and len(flips) >= min_trials
+            for cols in itertools.combinations(range(num_qubits), symm_type):
+                _, counts = np.unique(flips[:, cols], axis=0, return_counts=True)
+                assert len(counts) == 2 ** symm_type and np.all(counts == counts[0])
+    assert not _symmetrization_flips(4, 0)[0].any()
+    with pytest.raises(ValueError):
+        _symmetrization_flips(4, 4)
+
+
 def test_ratio_variance_float():
     a, b, var_a, var_b = 1.0, 2.0, 0.1, 0.05
     ab_ratio_var = ratio_variance(a, var_a, b, var_b)
@@ -1963,3 +2206,67 @@ def test_results_by_qubit_groups():
     res_by_group = get_results_by_qubit_groups([er1, er2, er3, er4], groups)
 
     assert res_by_group == {(0,): [er1], (1,): [er2], (0, 2): [er1, er4]}
+
+
+def test_product_calibration_mode():
+    confusion_matrices = {(0,): np.array([[.98, .02], [.05, .95]]),
+                          (1,): np.array([[.97, .03], [.08, .92]])}
+    results = [ExperimentResult(ExperimentSetting(zeros_state([0, 1]), obs), expectation=.5,
+                                std_err=.01, total_counts=1000)
+               for obs in [sZ(0), -1 * sX(1), sY(0) * sZ(1)]]
+    # no calibration programs are run, so no qc is needed
+    calibrated = list(calibrate_observable_estimates(None, results, num_shots=1000,
+                                                     calibration_mode='product',
+                                                     confusion_matrices=confusion_matrices))
+    for res, calibration in zip(calibrated, [.93, .89, .93 * .89]):
+        assert np.isclose(res.calibration_expectation, calibration)
+        assert np.isclose(res.expectation, .5 / calibration)
+        assert res.calibration_counts == 2000
+
+
+def test_calibration_cache(qvm, tmp_path):
+    confusion_matrices = {(0,): np.array([[.98, .02], [.05, .95]]),
+                          (1,): np.array([[.97, .03], [.08, .92]])}
+    observables = [sZ(0), sY(0) * sZ(1)]
+    results = [ExperimentResult(ExperimentSetting(zeros_state([0, 1]), obs), expectation=.5,
+                                std_err=.01, total_counts=1000) for obs in observables]
+    path = str(tmp_path / 'calibrations.json')
+    cache = CalibrationCache(path=path)
+    for obs in observables:
+        cache.put(cache.key(qvm, obs, -1, 'product'), (.8, 1e-4, 1000))
+    # calibrations are only written by save
+    assert len(cache) == 2 and not os.path.exists(path)
+    cache.save()
+
+    # cached calibrations are used, also in a new session
+    for cache in [cache, CalibrationCache(path=path)]:
+        cached = list(calibrate_observable_estimates(qvm, results, calibration_mode='product',
+                                                     calibration_cache=cache))
+        assert cache.hits == 2
+        assert [res.calibration_expectation for res in cached] == [.8, .8]
+
+    # but not when confusion matrices are given, from which nothing is cached either
+    calibrated = list(calibrate_observable_estimates(qvm, results, calibration_mode='product',
+                                                     confusion_matrices=confusion_matrices,
+                                                     calibration_cache=cache))
+    assert all(res.calibration_expectation != .8 for res in calibrated)
+    assert cache.hits == 2 and cache.misses == 0 and len(cache) == 2
+
+    # the key distinguishes the joint group size of product and the noise of direct calibrations
+    noisy_program = Program(Pragma('READOUT-POVM', [0], '(0.9 0.2 0.1 0.8)'))
+    keys = {cache.key(qvm, sZ(0), -1, 'product', joint_group_size=2),
+            cache.key(qvm, sZ(0), -1, 'product', noisy_program, 1),
+            cache.key(qvm, sZ(0), -1, 'direct', noisy_program, 1),
+            cache.key(qvm, sZ(0), -1, 'direct', noisy_program, 2),
+            cache.key(qvm, sZ(0), -1, 'direct')}
+    assert len(keys) == 4 and cache.key(qvm, 2 * sZ(0), -1, 'product') in cache
+
+    # new calibrations are saved once they are all made
+    new_path = str(tmp_path / 'new_calibrations.json')
+    list(calibrate_observable_estimates(qvm, results, calibration_mode='product',
+                                        calibration_cache=CalibrationCache(path=new_path)))
+    assert len(CalibrationCache(path=new_path)) == 2
+
+    # expired calibrations are missing
+    cache = CalibrationCache(ttl=0, path=path)
+    assert cache.get(cache.key(qvm, 2 * sZ(0), -1, 'product')) is None
@@ -4,7 +4,9 @@ import pytest
 from forest.benchmarking.operator_tools.random_operators import haar_rand_unitary
 from forest.benchmarking.operator_tools.superoperator_transformations import kraus2choi
 from forest.benchmarking.tomography import generate_process_tomography_experiment, \
-    pgdb_process_estimate, linear_inv_process_estimate, do_tomography
+    pgdb_process_estimate, linear_inv_process_estimate, do_tomography, \
+    accelerated_pgdb_process_estimate, linear_inv_process_estimates, _extract_from_results, _cost, \
+    _bytes_lru_cache
 from forest.benchmarking.observable_estimation import estimate_observables, ExperimentResult, \
     ObservablesExperiment, \
     _one_q_state_prep
@@ -112,6 +114,73 @@ def test_two_q(two_q_tomo_fixture):
     np.testing.assert_allclose(process_choi_true, process_choi_est, atol=0.05)
 
 
+def test_linear_inv_process_estimates():
+    qubits = [0, 1]
+    tomo_expt = generate_process_tomography_experiment(Program(CNOT(0, 1)), qubits, in_basis='sic')
+    settings = [setting for settings in tomo_expt for setting in settings]
+    expectations = np.random.RandomState(52).uniform(-1, 1, size=(3, len(settings)))
+
+    estimates = linear_inv_process_estimates(settings, expectations, qubits)
+    assert estimates.shape == (3, 16, 16)
+    for exps, estimate in zip(expectations, estimates):
+        results = [ExperimentResult(setting=setting, expectation=exp, std_err=0., total_counts=1)
+                   for setting, exp in zip(settings, exps)]
+        np.testing.assert_allclose(linear_inv_process_estimate(results, qubits), estimate,
+                                   atol=1e-12)
+
+    # the estimate of exact data is the true process
+    results = list(wfn_estimate_observables(n_qubits=2, tomo_expt=tomo_expt))
+    np.testing.assert_allclose(linear_inv_process_estimate(results, qubits), kraus2choi(mat.CNOT),
+                               atol=1e-12)
+
+
+def test_accelerated_pgdb():
+    qubits = [0, 1]
+    tomo_expt = generate_process_tomography_experiment(Program(H(0), CNOT(0, 1)), qubits,
+                                                       in_basis='sic')
+    # sample 500 shots of each exact expectation
+    rs = np.random.RandomState(52)
+    results = [ExperimentResult(setting=res.setting,
+                                expectation=rs.binomial(500, (1 + res.expectation) / 2) / 250 - 1,
+                                std_err=0., total_counts=500)
+               for res in wfn_estimate_observables(n_qubits=2, tomo_expt=tomo_expt)]
+    process_choi_true = kraus2choi(mat.CNOT @ np.kron(mat.H, np.eye(2)))
+
+    est, trace = accelerated_pgdb_process_estimate(results, qubits)
+    np.testing.assert_allclose(process_choi_true, est, atol=.05)
+    assert trace['iterations'] == len(trace['cost']) - 1
+    assert np.all(np.diff(trace['cost']) <= 1e-12)
+    assert set(trace['time']) == {'setup', 'gradient', 'projection', 'line_search'}
+
+    # the estimate is at least as likely as that of the unaccelerated descent
+    A, n = _extract_from_results(results, qubits[::-1])
+    assert trace['cost'][-1] <= np.real(_cost(A, n, pgdb_process_estimate(results, qubits))) + 1e-8
+
+    # a warm start from the estimate converges immediately
+    warm_est, warm_trace = accelerated_pgdb_process_estimate(results, qubits, initial_estimate=est)
+    assert warm_trace['iterations'] < trace['iterations']
+    np.testing.assert_allclose(est, warm_est, atol=1e-3)
+
+
+def test_bytes_lru_cache():
+    calls = []
+
+    @_bytes_lru_cache(max_bytes=3 * 8 * 10)
+    def zeros(length):
+        calls.append(length)
+        return np.zeros(length)
+
+    for length in [10, 20, 10, 5, 10, 100]:
+        zeros(length)
+    # the array of 20 floats was evicted to fit that of 5, and that of 100 is too large to cache
+    assert calls == [10, 20, 5, 100]
+    zeros(10), zeros(5), zeros(20), zeros(100)
+    assert calls == [10, 20, 5, 100, 20, 100]
+    zeros.cache_clear()
+    zeros(10)
+    assert calls[-1] == 10 and len(calls) == 7
+
+
 def test_do_tomography(qvm):
     qubit = 1
     process = Program(H(qubit))
@@ -1,8 +1,10 @@
 import numpy as np
+import pytest
 import warnings
 from pyquil.simulation import NumpyWavefunctionSimulator
 from forest.benchmarking.quantum_volume import *
-from forest.benchmarking.quantum_volume import _naive_program_generator
+from forest.benchmarking.quantum_volume import _naive_program_generator, _parallel_qv_circuits
+from forest.benchmarking.utils import bit_array_to_int
 
 np.random.seed(1)
 
@@ -22,11 +24,48 @@ def test_ideal_sim_heavy_probs(qvm):
     np.testing.assert_allclose(probs, target_probs, atol=.05)
 
 
+def test_adaptive_quantum_volume(qvm):
+    qvm.qam.random_seed = 1
+    outcomes, circuits_used = measure_quantum_volume_adaptive(qvm, num_circuits=100,
+                                                              num_shots=20, qubits=[0, 1, 2],
+                                                              min_circuits=10, random_seed=1)
+
+    # the ideal qvm achieves each depth well before all 100 circuits are run
+    assert list(outcomes.keys()) == [2, 3]
+    assert all(10 <= circuits_used[depth] < 100 for depth in [2, 3])
+    assert extract_quantum_volume_from_results(outcomes) == 8
+
+
+def test_adaptive_quantum_volume_num_circuits():
+    # the numbers of circuits are validated before the qc is used
+    for num_circuits, min_circuits in [(0, 0), (10, 20)]:
+        with pytest.raises(ValueError):
+            measure_quantum_volume_adaptive(None, qubits=[0, 1], num_circuits=num_circuits,
+                                            min_circuits=min_circuits)
+
+
 def test_extraction():
     outcomes = {2: (.72, .68), 3: (.7, .67), 4: (.69, .66)}
     assert extract_quantum_volume_from_results(outcomes) == 8
 
 
+def test_heavy_output_counting():
+    rs = np.random.RandomState(2)
+    depth = 4
+    wfn_sim = NumpyWavefunctionSimulator(depth)
+    permutations, gates = generate_abstract_qv_circuit(depth)
+    heavy_outputs = collect_heavy_outputs(wfn_sim, permutations, gates)
+
+    probabilities = np.abs(wfn_sim.wf.reshape(-1)) ** 2
+    assert heavy_outputs == [idx for idx, prob in enumerate(probabilities)
+                             if prob > np.median(probabilities)]
+
+    ckt_results = [rs.randint(2, size=(50, depth)), np.zeros((0, depth), dtype=int)]
+    num_hh_sampled = list(count_heavy_hitters_sampled(ckt_results, [heavy_outputs] * 2))
+    assert num_hh_sampled == [sum(bit_array_to_int(result) in heavy_outputs
+                                  for result in ckt_results[0]), 0]
+
+
 def test_qv_get_results_by_depth(qvm):
     depths = [2, 3]
     n_ckts = 10
@@ -54,3 +93,29 @@ def test_qv_get_results_by_depth(qvm):
 
     assert len(probs_by_depth.keys()) == len(depths)
     assert [0 <= probs_by_depth[d][1] <= probs_by_depth[d][0] <= 1 for d in depths]
+
+
+def test_qv_simulator():
+    depth = 5
+    wfn_sim = NumpyWavefunctionSimulator(depth)
+    circuits = [generate_abstract_qv_circuit(depth) for _ in range(3)]
+    probabilities = simulate_qv_model_circuits(np.asarray([perms for perms, _ in circuits]),
+                                               np.asarray([gates for _, gates in circuits]))
+
+    for (permutations, gates), probs in zip(circuits, probabilities):
+        heavy_outputs = collect_heavy_outputs(wfn_sim, permutations, gates)
+        np.testing.assert_allclose(probs, np.abs(wfn_sim.wf.reshape(-1)) ** 2, atol=1e-12)
+        assert collect_heavy_outputs(None, permutations, gates,
+                                     use_qv_simulator=True) == heavy_outputs
+
+
+def test_parallel_circuit_generation():
+    serial = list(_parallel_qv_circuits(4, 5, use_qv_simulator=False, num_workers=1,
+                                        random_seed=3))
+    parallel = list(_parallel_qv_circuits(4, 5, use_qv_simulator=True, num_workers=2,
+                                          random_seed=3))
+    assert len(parallel) == 5
+    for (perms, gates, heavy_mask), (par_perms, par_gates, par_heavy_mask) in zip(serial, parallel):
+        np.testing.assert_array_equal(perms, par_perms)
+        np.testing.assert_array_equal(gates, par_gates)
+        np.testing.assert_array_equal(heavy_mask, par_heavy_mask)
@@ -219,6 +219,19 @@ def test_random_unitaries_first_moment():
     #   for dimensions 2 and 3
 
 
+def test_batched_random_unitaries_first_moment():
+    N_avg = 50000
+    D3 = 3
+    D3_SWAP = rand_ops.permute_tensor_factors(D3, [1, 0])
+    U3 = rand_ops.haar_rand_unitaries(N_avg, D3, np.random.default_rng(1))
+    assert U3.shape == (N_avg, D3, D3)
+    np.testing.assert_allclose(U3 @ np.conjugate(U3.transpose(0, 2, 1)),
+                               np.broadcast_to(np.eye(D3), U3.shape), atol=1e-12)
+
+    D3_avg = np.einsum('nij,nlk->ikjl', U3, np.conjugate(U3)).reshape(D3 ** 2, D3 ** 2) / N_avg
+    assert np.real(la.norm((D3_avg - D3_SWAP / D3), 'fro')) <= 0.02
+
+
 # ~ 12 sec; passed 2019/06/11
 @pytest.mark.slow
 def test_random_unitaries_second_moment():
@@ -434,3 +447,16 @@ def test_BCSZ_dist_is_trace_preserving():
     K = 2
     choi = rand_ops.rand_map_with_BCSZ_dist(D, K)
     assert choi_is_trace_preserving(choi)
+
+
+def test_batched_states_and_BCSZ_dist():
+    rs = np.random.default_rng(2)
+    for states in [rand_ops.ginibre_state_matrices(10, 4, 2, rs),
+                   rand_ops.bures_measure_state_matrices(10, 4, rs)]:
+        assert states.shape == (10, 4, 4)
+        np.testing.assert_allclose(np.trace(states, axis1=1, axis2=2), 1)
+        assert np.all(la.eigvalsh(states) > -1e-12)
+
+    for choi in rand_ops.rand_maps_with_BCSZ_dist(10, 2, 2, rs):
+        assert choi_is_completely_positive(choi)
+        assert choi_is_trace_preserving(choi)
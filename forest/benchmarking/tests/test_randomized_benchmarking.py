@@ -4,6 +4,8 @@ from pyquil import Program
 from forest.benchmarking.observable_estimation import (ExperimentSetting, ExperimentResult,
                                                        zeros_state)
 from forest.benchmarking.randomized_benchmarking import *
+from forest.benchmarking.randomized_benchmarking import _next_rb_batch, _rb_param_values, \
+    _predicted_survival_variances
 from forest.benchmarking.utils import all_traceless_pauli_z_terms
 
 
@@ -222,3 +224,54 @@ def test_do_rb(qvm, benchmarker):
     # just test that this is some reasonable number.
     assert .5 < rb_decays[(0,)] < 1.1
     assert .5 < rb_decays[(1,)] < 1.1
+
+
+def test_predicted_survival_variances():
+    depths = [1, 20, 50, 100]
+    amplitude, decay, baseline = .5, .97, .5
+    expectations = [[2 * (amplitude * decay ** depth + baseline) - 1] for depth in depths]
+    # heteroscedastic errors: the first survival is estimated far more precisely than the rest
+    std_errs = [[.001], [.05], [.05], [.05]]
+    fit = fit_rb_results(depths, expectations, std_errs)
+
+    candidate_depths = [1, 30, 200]
+    num_shots = 500
+    amplitude, decay, baseline = _rb_param_values(fit)
+    survivals = amplitude * decay ** np.asarray(candidate_depths) + baseline
+    expected = survivals * (1 - survivals) / num_shots
+    # the floor is the smallest variance already fit, which is well below p(1-p)/N
+    assert np.max(fit.weights) ** -2 < np.min(expected) < np.min(fit.weights) ** -2
+    np.testing.assert_allclose(_predicted_survival_variances(fit, candidate_depths, num_shots),
+                               expected)
+
+
+def test_adaptive_rb_batches():
+    rs = np.random.RandomState(0)
+    amplitude, expected_decay, baseline = .5, .97, .5
+    num_shots = 500
+    candidate_depths = list(range(1, 200, 4))
+    target_rel_std_err = .001
+
+    def sample_z_stats(depths):
+        survivals = rs.binomial(num_shots, amplitude * expected_decay ** np.asarray(depths)
+                                + baseline) / num_shots
+        std_errs = 2 * np.sqrt(survivals * (1 - survivals) / num_shots)
+        return [[2 * s - 1] for s in survivals], [[err] for err in std_errs]
+
+    depths = [depth for depth in [1, 101, 197] for _ in range(10)]
+    expectations, std_errs = sample_z_stats(depths)
+    fit = fit_rb_results(depths, expectations, std_errs, num_shots)
+    while fit.params['decay'].stderr / fit.params['decay'].value > target_rel_std_err:
+        batch_depths = _next_rb_batch({(0,): fit}, depths, candidate_depths, num_shots,
+                                      target_rel_std_err, max_batch_size=10)
+        assert 1 <= len(batch_depths) <= 10 and batch_depths[0] in candidate_depths
+        batch_expectations, batch_std_errs = sample_z_stats(batch_depths)
+        depths += batch_depths
+        expectations += batch_expectations
+        std_errs += batch_std_errs
+        fit = fit_rb_results(depths, expectations, std_errs, num_shots,
+                             param_guesses=_rb_param_values(fit))
+        assert len(depths) < 200
+
+    np.testing.assert_allclose(fit.params['decay'].value, expected_decay,
+                               atol=2.5 * fit.params['decay'].stderr)
@@ -6,7 +6,8 @@ from pyquil.gates import I, RX, CNOT, MEASURE
 from pyquil.noise import decoherence_noise_with_asymmetric_ro
 
 from forest.benchmarking.readout import get_flipped_program, estimate_confusion_matrix, \
-    estimate_joint_confusion_in_set, marginalize_confusion_matrix, estimate_joint_reset_confusion
+    estimate_joint_confusion_in_set, marginalize_confusion_matrix, estimate_joint_reset_confusion, \
+    readout_parity_fidelities, product_readout_calibration
 
 
 def test_get_flipped_program():
@@ -84,3 +85,36 @@ def test_reset_confusion_consistency(qvm):
 
     atol = .1
     np.testing.assert_allclose(passive_reset[:, 0], np.ones(4).T, atol=atol)
+
+
+def test_product_readout_calibration():
+    confusions = {q: np.array([[1 - p0, p0], [p1, 1 - p1]])
+                  for q, (p0, p1) in enumerate([(.02, .05), (.03, .08), (.01, .1)])}
+    singles = readout_parity_fidelities({(q,): m for q, m in confusions.items()}, num_shots=1000)
+    pairs = readout_parity_fidelities({(0, 1): np.kron(confusions[0], confusions[1]),
+                                       (1, 2): np.kron(confusions[1], confusions[2])},
+                                      num_shots=1000)
+    np.testing.assert_allclose(singles[(0,)][0], 1 - .02 - .05)
+    np.testing.assert_allclose(pairs[(1,)][0], 1 - .03 - .08)
+    unsymmetrized = readout_parity_fidelities({(2,): confusions[2]}, 1000, symmetrized=False)
+    np.testing.assert_allclose(unsymmetrized[(2,)][0], 1 - 2 * .01)
+
+    # uncorrelated readout gives the same calibration under either model
+    expected = np.prod([1 - p0 - p1 for p0, p1 in [(.02, .05), (.03, .08), (.01, .1)]])
+    np.testing.assert_allclose(product_readout_calibration(singles, [2, 0, 1])[0], expected)
+    np.testing.assert_allclose(product_readout_calibration(pairs, [0, 1, 2])[0], expected)
+    assert product_readout_calibration(singles, []) == (1., 0.)
+
+    # a group need not be sorted; its matrix labels the qubits in the order of the group
+    rs = np.random.RandomState(3)
+    joint = np.eye(4) + rs.uniform(0, .1, size=(4, 4))
+    joint /= np.sum(joint, axis=1, keepdims=True)
+    swap = [0, 2, 1, 3]
+    in_order = readout_parity_fidelities({(1, 3): joint, (5,): confusions[0]}, 1000)
+    reversed_order = readout_parity_fidelities({(3, 1): joint[swap][:, swap],
+                                                (5,): confusions[0]}, 1000)
+    assert set(reversed_order) == {(1,), (3,), (1, 3), (5,)}
+    for subset, (mean, var) in in_order.items():
+        np.testing.assert_allclose(reversed_order[subset], (mean, var))
+    np.testing.assert_allclose(product_readout_calibration(reversed_order, [5, 3, 1]),
+                               product_readout_calibration(in_order, [1, 3, 5]))
@@ -3,7 +3,8 @@ import pytest
 from functools import partial
 from forest.benchmarking.operator_tools.random_operators import haar_rand_unitary
 from forest.benchmarking.tomography import generate_state_tomography_experiment, _R, \
-    iterative_mle_state_estimate, estimate_variance, linear_inv_state_estimate, do_tomography
+    iterative_mle_state_estimate, estimate_variance, linear_inv_state_estimate, do_tomography, \
+    accelerated_mle_state_estimate, bootstrap_samples, linear_inv_state_estimates
 from pyquil.gates import I, H, CZ
 from pyquil.simulation import NumpyWavefunctionSimulator
 from forest.benchmarking.observable_estimation import estimate_observables, ExperimentResult, \
@@ -115,6 +116,97 @@ def test_R_operator_fixed_point_2_qubit():
     np.testing.assert_allclose(actual, P00, atol=1e-12)
 
 
+def test_linear_inv_matches_pseudo_inverse():
+    from forest.benchmarking.operator_tools import vec
+    from pyquil.simulation.tools import lifted_pauli
+    from scipy.linalg import pinv
+    qubits = [0, 1]
+    expt = generate_state_tomography_experiment(Program(H(0), CZ(0, 1)), qubits)
+    wfn = NumpyWavefunctionSimulator(len(qubits)).do_program(expt.program)
+    # drop one observable and repeat another to exercise the least squares fit
+    settings = [setting for settings in expt for setting in settings][1:] + [expt[3][0]]
+    results = [ExperimentResult(setting=setting,
+                                expectation=wfn.expectation(setting.observable) + .1 * idx % .3,
+                                total_counts=1) for idx, setting in enumerate(settings)]
+
+    measurement_matrix = np.vstack([vec(lifted_pauli(res.setting.observable, qubits[::-1])).T.conj()
+                                    for res in results])
+    expected = pinv(measurement_matrix) @ np.array([res.expectation for res in results])
+    expected = expected.reshape(4, 4).T + np.eye(4) / 4
+    np.testing.assert_allclose(linear_inv_state_estimate(results, qubits), expected, atol=1e-12)
+
+
+def test_linear_inv_state_estimates():
+    qubits = [0, 1]
+    expt = generate_state_tomography_experiment(Program(H(0), CZ(0, 1)), qubits)
+    settings = [setting for settings in expt for setting in settings]
+    expectations = np.random.RandomState(52).uniform(-1, 1, size=(3, len(settings)))
+
+    estimates = linear_inv_state_estimates(settings, expectations, qubits)
+    assert estimates.shape == (3, 4, 4)
+    for exps, estimate in zip(expectations, estimates):
+        results = [ExperimentResult(setting=setting, expectation=exp, total_counts=1)
+                   for setting, exp in zip(settings, exps)]
+        np.testing.assert_allclose(linear_inv_state_estimate(results, qubits), estimate, atol=1e-12)
+
+
+def test_accelerated_mle():
+    qubits = [0, 1]
+    expt = generate_state_tomography_experiment(Program(H(0), CZ(0, 1)), qubits)
+    wfn = NumpyWavefunctionSimulator(len(qubits)).do_program(expt.program)
+    rho_true = np.outer(wfn.wf, wfn.wf.conj())
+    results = [ExperimentResult(setting=setting,
+                                expectation=.9 * wfn.expectation(setting.observable),
+                                total_counts=1000) for settings in expt for setting in settings]
+
+    rho_mle = iterative_mle_state_estimate(results, qubits, tol=1e-10)
+    rho_acc, trace = accelerated_mle_state_estimate(results, qubits, tol=1e-10)
+    np.testing.assert_allclose(rho_acc, rho_mle, atol=1e-5)
+    np.testing.assert_allclose(dm.fidelity(rho_true, rho_acc), .925, atol=1e-3)
+    assert np.all(np.diff(trace['log_likelihood']) >= 0)
+    assert len(trace['log_likelihood']) == len(trace['epsilon']) == len(trace['step_norm'])
+
+
+def test_bootstrap_samples():
+    qubits = [0, 1]
+    expt = generate_state_tomography_experiment(Program(H(0), CZ(0, 1)), qubits)
+    wfn = NumpyWavefunctionSimulator(len(qubits)).do_program(expt.program)
+    rho_true = np.outer(wfn.wf, wfn.wf.conj())
+    results = [ExperimentResult(setting=setting,
+                                expectation=.9 * wfn.expectation(setting.observable),
+                                total_counts=1000) for settings in expt for setting in settings]
+
+    samples = bootstrap_samples(results, qubits, linear_inv_state_estimate, dm.fidelity,
+                                target_state=rho_true, n_resamples=20, random_seed=52)
+    assert samples.shape == (20,)
+    assert len(np.unique(samples)) == 20
+    np.testing.assert_allclose(np.mean(samples), dm.fidelity(rho_true, linear_inv_state_estimate(
+        results, qubits)), atol=.01)
+
+    # the samples depend only on the seed, not on how the estimates are distributed
+    parallel_samples = bootstrap_samples(results, qubits, linear_inv_state_estimate, dm.fidelity,
+                                         target_state=rho_true, n_resamples=20, random_seed=52,
+                                         num_workers=2)
+    np.testing.assert_allclose(samples, parallel_samples)
+
+    mean, var = estimate_variance(results, qubits, linear_inv_state_estimate, dm.fidelity,
+                                  target_state=rho_true, n_resamples=20, random_seed=52)
+    assert mean == np.mean(samples) and var == np.var(samples)
+
+    # without a seed, the data are re-sampled from numpy's global random state
+    np.random.seed(52)
+    global_samples = bootstrap_samples(results, qubits, linear_inv_state_estimate, dm.fidelity,
+                                       target_state=rho_true, n_resamples=20)
+    np.random.seed(52)
+    np.testing.assert_allclose(global_samples, bootstrap_samples(
+        results, qubits, linear_inv_state_estimate, dm.fidelity, target_state=rho_true,
+        n_resamples=20, num_workers=2))
+
+    with pytest.raises(ValueError):
+        bootstrap_samples(results, qubits, linear_inv_state_estimate, dm.fidelity,
+                          target_state=rho_true, n_resamples=0, num_workers=2)
+
+
 @pytest.fixture(scope='module')
 def single_q_tomo_fixture(test_qc):
     qubits = [0]
@@ -285,3 +285,23 @@ def test_choi_pl_bijectivity():
     h_superop = kraus2superop(H)
     assert np.allclose(choi2superop(choi2superop(h_choi)), h_choi)
     assert np.allclose(superop2choi(superop2choi(h_superop)), h_superop)
+
+
+def test_fast_pauli_transforms():
+    dim = 8
+    p2c = np.zeros((dim ** 2, dim ** 2), dtype=complex)
+    for i, (_, pauli) in enumerate(n_qubit_pauli_basis(3)):
+        p2c[:, i] = vec(pauli)[:, 0]
+    np.testing.assert_allclose(pauli2computational_basis_matrix(dim), p2c)
+    np.testing.assert_allclose(computational2pauli_basis_matrix(dim), p2c.conj().T / dim)
+
+    rs = np.random.RandomState(0)
+    operator = rs.randn(dim, dim) + 1j * rs.randn(dim, dim)
+    pauli_vector = operator2pauli_vector(operator)
+    np.testing.assert_allclose(pauli_vector, p2c.conj().T @ vec(operator) / dim)
+    np.testing.assert_allclose(pauli_vector2operator(pauli_vector), operator)
+
+    superop = rs.randn(dim ** 2, dim ** 2) + 1j * rs.randn(dim ** 2, dim ** 2)
+    pl_matrix = superop2pauli_liouville(superop)
+    np.testing.assert_allclose(pl_matrix, p2c.conj().T @ superop @ p2c / dim)
+    np.testing.assert_allclose(pauli_liouville2superop(pl_matrix), superop)
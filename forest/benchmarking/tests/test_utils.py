@@ -78,3 +78,27 @@ def test_bitstring_prep():
                                             f'RX({np.pi}) 3',
                                             f'RX({np.pi}) 4',
                                             f'RX({np.pi}) 5']
+
+
+def test_lazy_operator_basis():
+    basis = n_qubit_pauli_basis(3)
+    # each call returns a new basis, so modifying one does not affect later callers
+    basis.ops[0] = None
+    assert n_qubit_pauli_basis(3) is not basis
+    np.testing.assert_array_equal(n_qubit_pauli_basis(3).ops[0], np.eye(8))
+    basis = n_qubit_pauli_basis(3)
+    assert len(basis) == basis.dim == 64
+    assert basis.labels[:5] == ['III', 'IIX', 'IIY', 'IIZ', 'IXI']
+
+    paulis = dict(pauli_label_ops)
+    for index, (label, op) in enumerate(basis):
+        expected = np.kron(np.kron(paulis[label[0]], paulis[label[1]]), paulis[label[2]])
+        np.testing.assert_array_equal(op, expected)
+        assert basis[index][0] == label
+        np.testing.assert_array_equal(basis[index][1], expected)
+        np.testing.assert_array_equal(basis.sparse_op(index).toarray(), expected)
+
+    mixed = PAULI_BASIS.product(COMPUTATIONAL_BASIS)
+    assert mixed.labels == [p + c for p in 'IXYZ' for c in '01']
+    np.testing.assert_array_equal(mixed.ops_by_label['Y1'],
+                                  np.kron(paulis['Y'], np.array([[0], [1]])))
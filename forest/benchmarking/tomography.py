@@ -1,7 +1,12 @@
 import functools
 import itertools
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from operator import mul
-from typing import Callable, Tuple, List, Sequence, Iterator
+import time
+from typing import Callable, Tuple, List, Sequence, Iterator, Optional
 import warnings
 
 import numpy as np
@@ -9,21 +14,104 @@ from scipy.linalg import logm, pinv
 
 from pyquil import Program
 from pyquil.api import QuantumComputer
+from pyquil.paulis import PauliTerm
 from pyquil.simulation.tools import lifted_pauli as pauli2matrix, lifted_state_operator as state2matrix
 
 import forest.benchmarking.distance_measures as dm
+from forest.benchmarking.compilation import ExecutableCache
 from forest.benchmarking.utils import all_traceless_pauli_terms
-from forest.benchmarking.operator_tools import vec, unvec, proj_choi_to_physical
+from forest.benchmarking.operator_tools import vec, unvec, proj_choi_to_physical, \
+    operator2pauli_vector, pauli_vector2operator
 from forest.benchmarking.operator_tools.project_state_matrix import project_state_matrix_to_physical
+from forest.benchmarking.operator_tools.superoperator_transformations import \
+    _apply_pauli2computational
 from forest.benchmarking.observable_estimation import ExperimentSetting, ObservablesExperiment, \
     ExperimentResult, SIC0, SIC1, SIC2, SIC3, plusX, minusX, plusY, minusY, plusZ, minusZ, \
-    TensorProductState, zeros_state, group_settings
+    TensorProductState, zeros_state, group_settings, CalibrationCache
 from forest.benchmarking.direct_fidelity_estimation import acquire_dfe_data
 
 MAXITER = "maxiter"
 OPTIMAL = "optimal"
 FRO = 'fro'
 
+# the total number of bytes of lifted operator matrices, and of design matrices, kept in memory
+OPERATOR_CACHE_BYTES = 2 ** 27
+DESIGN_MATRIX_CACHE_BYTES = 2 ** 30
+
+
+def _nbytes(value) -> int:
+    """
+    The number of bytes of the arrays held by a value, which may be a nested tuple of arrays.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _bytes_lru_cache(max_bytes: int) -> Callable:
+    """
+    Like functools.lru_cache, but bounded by the total number of bytes of the cached return
+    values rather than by their number, since the size of an operator or design matrix grows
+    exponentially with the number of qubits. A value larger than max_bytes is not cached.
+
+    The decorated function should only be called with positional, hashable arguments. Like
+    functools.lru_cache, the wrapper has a cache_clear method.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = OrderedDict()
+        lock = threading.Lock()
+        total_bytes = 0
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            nonlocal total_bytes
+            with lock:
+                if args in cache:
+                    cache.move_to_end(args)
+                    return cache[args][0]
+            value = func(*args)
+            nbytes = _nbytes(value)
+            with lock:
+                if nbytes <= max_bytes and args not in cache:
+                    cache[args] = (value, nbytes)
+                    total_bytes += nbytes
+                    while total_bytes > max_bytes:
+                        _, (_, evicted_bytes) = cache.popitem(last=False)
+                        total_bytes -= evicted_bytes
+            return value
+
+        def cache_clear():
+            nonlocal total_bytes
+            with lock:
+                cache.clear()
+                total_bytes = 0
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+@_bytes_lru_cache(OPERATOR_CACHE_BYTES)
+def _pauli_matrix(observable: PauliTerm, qubits: Tuple[int, ...]) -> np.ndarray:
+    """
+    A memoized version of pauli2matrix. The returned matrix is shared and should not be modified.
+    """
+    matrix = pauli2matrix(observable, qubits=list(qubits))
+    matrix.setflags(write=False)
+    return matrix
+
+
+@_bytes_lru_cache(OPERATOR_CACHE_BYTES)
+def _state_matrix(in_state: TensorProductState, qubits: Tuple[int, ...]) -> np.ndarray:
+    """
+    A memoized version of state2matrix. The returned matrix is shared and should not be modified.
+    """
+    matrix = state2matrix(in_state, qubits=list(qubits))
+    matrix.setflags(write=False)
+    return matrix
+
 
 # ==================================================================================================
 # Generate state and process tomography experiments
@@ -151,18 +239,87 @@ def linear_inv_state_estimate(results: List[ExperimentResult],
         tensor factor.
     :return: A point estimate of the quantum state rho.
     """
+    settings = [result.setting for result in results]
+    expectations = np.array([result.expectation for result in results])
+    return linear_inv_state_estimates(settings, expectations[np.newaxis], qubits)[0]
+
+
+def linear_inv_state_estimates(settings: Sequence[ExperimentSetting], expectations: np.ndarray,
+                               qubits: List[int]) -> np.ndarray:
+    """
+    Estimate many quantum states at once using linear inversion.
+
+    This is :py:func:`linear_inv_state_estimate` for a stack of datasets that share the same
+    settings, e.g. repeated runs of the same experiment. The linear map from the expectations to
+    the estimate depends only on the settings, so it is cached and applied to all datasets at
+    once.
+
+    The estimate depends on the settings only through the measured Paulis relative to the order
+    of ``qubits``. To estimate the states of several qubit groups, e.g. from
+    :py:func:`~forest.benchmarking.observable_estimation.get_results_by_qubit_groups`, pass the
+    settings and qubits of one group together with the expectations of every group, provided the
+    results of each group are in corresponding order.
+
+    :param settings: the settings of a tomographically complete experiment.
+    :param expectations: an array of shape (num_datasets, len(settings)) where each row holds
+        the measured expectations of the settings.
+    :param qubits: All qubits that were tomographized. This specifies the order in
+        which qubits will be kron'ed together; the first qubit in the list is the left-most
+        tensor factor.
+    :return: an array of shape (num_datasets, dim, dim) of point estimates of the states.
+    """
     # state2matrix and pauli2matrix use pyquil tensor factor ordering where the least significant
     # qubit, e.g. qubit 0, is the right-most tensor factor. We stick with the standard convention
     # here that the first qubit in the list is the left-most tensor factor, so we have to reverse
     # the qubits before passing to state2matrix and pauli2matrix
-    qs = qubits[::-1]
-    measurement_matrix = np.vstack([
-        vec(pauli2matrix(result.setting.observable, qubits=qs)).T.conj() for result in results])
-    expectations = np.array([result.expectation for result in results])
-    rho = pinv(measurement_matrix) @ expectations
-    # add in the traceful identity term
+    qs = tuple(qubits[::-1])
+    indices, weights = _state_linear_inv_weights(tuple(settings), qs)
+    expectations = np.atleast_2d(expectations)
+
     dim = 2**len(qubits)
-    return unvec(rho) + np.eye(dim) / dim
+    pauli_traces = np.zeros((len(expectations), dim**2), dtype=complex)
+    np.add.at(pauli_traces, (slice(None), indices), weights * expectations)
+
+    # add in the traceful identity term
+    pauli_traces[:, 0] += 1
+    return _pauli_vectors2operators(pauli_traces / dim)
+
+
+@_bytes_lru_cache(DESIGN_MATRIX_CACHE_BYTES)
+def _state_linear_inv_weights(settings: Tuple[ExperimentSetting, ...], qubits: Tuple[int, ...]) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The pseudo-inverse of the measurement matrix used by :py:func:`linear_inv_state_estimates`,
+    which depends only on the settings. The cached arrays are read-only.
+
+    The rows vec(c_j P_j)^dagger of the measurement matrix for distinct Paulis are orthogonal,
+    so its pseudo-inverse is solved Pauli by Pauli: Tr[P_k rho] is the least squares fit
+    sum_j c_j e_j / sum_j |c_j|^2 over the results j measuring P_k, and zero if P_k is unmeasured.
+    The fit is returned as the index k of each result and its weight c_j / sum_j |c_j|^2.
+
+    :param settings: the settings of the results.
+    :param qubits: the qubits, in pyquil order.
+    :return: the index of each setting's Pauli, and the weight of its expectation in the fit.
+    """
+    indices, coeffs = _pauli_indices([setting.observable for setting in settings], qubits)
+    denominators = np.zeros(4**len(qubits))
+    np.add.at(denominators, indices, np.abs(coeffs) ** 2)
+    weights = coeffs / denominators[indices]
+    indices.setflags(write=False)
+    weights.setflags(write=False)
+    return indices, weights
+
+
+def _pauli_vectors2operators(pauli_vectors: np.ndarray) -> np.ndarray:
+    """
+    Apply :py:func:`~forest.benchmarking.operator_tools.pauli_vector2operator` to each row of an
+    array, returning a stack of operators.
+    """
+    num_vectors, dim_squared = pauli_vectors.shape
+    dim = int(round(np.sqrt(dim_squared)))
+    # each column of the transform is vec(operator), which stacks the columns of the operator
+    vecs = _apply_pauli2computational(pauli_vectors.T, axis=0)
+    return vecs.T.reshape(num_vectors, dim, dim).transpose(0, 2, 1)
 
 
 def iterative_mle_state_estimate(results: List[ExperimentResult], qubits: List[int], epsilon=.1,
@@ -237,6 +394,10 @@ def iterative_mle_state_estimate(results: List[ExperimentResult], qubits: List[i
     IdH = np.eye(dim, dim)  # Identity prop to the size of Hilbert space
     num_meas = sum([res.total_counts for res in results])
 
+    # index the observables in the Pauli basis once, so that each iteration takes O(n 4^n) time
+    indices, coeffs = _pauli_indices([res.setting.observable for res in results], qs)
+    meas_exps = np.array([res.expectation for res in results])
+
     rho = IdH / dim
     iteration = 1
     while True:
@@ -245,7 +406,7 @@ def iterative_mle_state_estimate(results: List[ExperimentResult], qubits: List[i
             warnings.warn('Maximum number of iterations reached before convergence.')
             break
         # Vanilla Iterative MLE
-        R = _R(rho, results, qs)
+        R = _R_from_pauli_indices(rho, indices, coeffs, meas_exps)
         Tk = R - IdH  # Eq 6 of [DIMLE2] with \lambda = 0.
 
         # MaxENT Iterative MLE
@@ -270,6 +431,140 @@ def iterative_mle_state_estimate(results: List[ExperimentResult], qubits: List[i
     return rho
 
 
+def accelerated_mle_state_estimate(results: List[ExperimentResult], qubits: List[int],
+                                   epsilon: float = 1., tol: float = 1e-9,
+                                   maxiter: int = 10_000) -> Tuple[np.ndarray, dict]:
+    """
+    Estimate the state with the diluted iterative MLE algorithm of [DIMLE1]_ where the dilution
+    parameter epsilon is adapted by a simple line search.
+
+    Each iteration tries the update of :py:func:`iterative_mle_state_estimate` with the current
+    epsilon. If the likelihood increases the update is accepted and epsilon is doubled,
+    otherwise epsilon is halved and the update is retried. Large epsilon approaches the
+    undiluted R rho R iteration, which converges quickly when it converges at all, while small
+    epsilon guarantees an increase in likelihood [DIMLE1]_. This typically requires far fewer
+    iterations than a fixed, small epsilon. Only the vanilla MLE is supported; use
+    :py:func:`iterative_mle_state_estimate` for max-entropy or hedged estimates.
+
+    :param results: Measured results from a state tomography experiment
+    :param qubits: All qubits that were tomographized. This specifies the order in
+        which qubits will be kron'ed together; the first qubit in the list is the left-most
+        tensor factor.
+    :param epsilon: the initial dilution parameter.
+    :param tol: The largest difference in the Frobenious norm between update steps that will cause
+         the algorithm to conclude that it has converged.
+    :param maxiter: The maximum number of iterations to perform before aborting the procedure.
+    :return: A point estimate of the quantum state rho, and a convergence trace: a dict holding,
+        for each iteration, the 'log_likelihood' of the estimate, the accepted 'epsilon', and the
+        Frobenius norm of the step, 'step_norm'.
+    """
+    # see iterative_mle_state_estimate for the reversal of the qubits
+    qs = qubits[::-1]
+    dim = 2**len(qubits)
+    IdH = np.eye(dim, dim)
+    indices, coeffs = _pauli_indices([res.setting.observable for res in results], qs)
+    meas_exps = np.array([res.expectation for res in results])
+
+    rho = IdH / dim
+    log_likelihood = _mean_log_likelihood(rho, indices, coeffs, meas_exps)
+    trace = {'log_likelihood': [log_likelihood], 'epsilon': [0.], 'step_norm': [0.]}
+    for _ in range(maxiter):
+        Tk = _R_from_pauli_indices(rho, indices, coeffs, meas_exps) - IdH
+        while True:
+            update_map = IdH + epsilon * Tk
+            new_rho = update_map @ rho @ update_map
+            new_rho /= np.trace(new_rho)
+            new_log_likelihood = _mean_log_likelihood(new_rho, indices, coeffs, meas_exps)
+            if new_log_likelihood >= log_likelihood or epsilon < 1e-12:
+                break
+            epsilon /= 2
+
+        step_norm = np.linalg.norm(new_rho - rho, FRO)
+        rho, log_likelihood = new_rho, new_log_likelihood
+        trace['log_likelihood'].append(log_likelihood)
+        trace['epsilon'].append(epsilon)
+        trace['step_norm'].append(step_norm)
+        if step_norm < tol:
+            break
+        epsilon *= 2
+    else:
+        warnings.warn('Maximum number of iterations reached before convergence.')
+
+    return rho, trace
+
+
+def _pauli_indices(observables: Sequence[PauliTerm], qubits: Sequence[int]) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the index of each observable in the n-qubit Pauli basis, along with its coefficient.
+
+    The qubits are given in the pyquil tensor factor ordering of pauli2matrix, so qubits[0] is
+    the right-most tensor factor; the index refers to the ordering of n_qubit_pauli_basis, whose
+    left-most label acts on the left-most tensor factor.
+
+    :param observables: Pauli terms acting on some subset of the qubits.
+    :param qubits: the qubits, in pyquil order.
+    :return: an array of the indices and an array of the coefficients of the observables.
+    """
+    position = {qubit: idx for idx, qubit in enumerate(qubits)}
+    indices = np.zeros(len(observables), dtype=int)
+    for j, observable in enumerate(observables):
+        for qubit, op in observable:
+            if qubit not in position:
+                raise ValueError(f"Observable {observable} acts on a qubit not in {qubits}.")
+            indices[j] += 'IXYZ'.index(op) * 4 ** position[qubit]
+    coeffs = np.array([complex(observable.coefficient) for observable in observables])
+    return indices, coeffs
+
+
+def _predicted_expectations(state: np.ndarray, indices: np.ndarray,
+                            coeffs: np.ndarray) -> np.ndarray:
+    """
+    Compute Tr[c_k P_k state] for each observable c_k P_k given by indices and coeffs, by
+    transforming the state to the Pauli basis once.
+    """
+    pauli_vector = operator2pauli_vector(state)[:, 0] * state.shape[0]
+    return coeffs * pauli_vector[indices]
+
+
+def _R_from_pauli_indices(state: np.ndarray, indices: np.ndarray, coeffs: np.ndarray,
+                          meas_exps: np.ndarray) -> np.ndarray:
+    """
+    Compute the operator R of :py:func:`_R` for observables c_k P_k, given by their indices in
+    the Pauli basis and coefficients, and the corresponding measured expectations.
+
+    Rather than summing the projectors of each result in turn, the predicted expectations
+    Tr[c_k P_k state] are computed at once and R is formed as a single weighted sum of the P_k,
+    both by fast transforms between the computational and Pauli bases.
+    """
+    # this small number ~ 10^-304 is added so that we don't get divide by zero errors
+    machine_eps = np.finfo(float).tiny
+
+    pred_exps = _predicted_expectations(state, indices, coeffs)
+    plus_weights = (1 + meas_exps) / 2 / ((1 + pred_exps) / 2 + machine_eps)
+    minus_weights = (1 - meas_exps) / 2 / ((1 - pred_exps) / 2 + machine_eps)
+
+    # sum_k w_k^+ (I + c_k P_k) / 2 + w_k^- (I - c_k P_k) / 2
+    update = np.zeros(state.shape[0] ** 2, dtype=complex)
+    np.add.at(update, indices, coeffs * (plus_weights - minus_weights) / 2)
+    update[0] += np.sum(plus_weights + minus_weights) / 2
+    return pauli_vector2operator(update) / len(meas_exps)
+
+
+def _mean_log_likelihood(state: np.ndarray, indices: np.ndarray, coeffs: np.ndarray,
+                         meas_exps: np.ndarray) -> float:
+    """
+    The log likelihood, averaged over results, whose gradient is given by :py:func:`_R`
+    """
+    pred_exps = np.real(_predicted_expectations(state, indices, coeffs))
+    ll = 0
+    for sign in [1, -1]:
+        f_j = (1 + sign * meas_exps) / 2
+        pr_j = np.clip((1 + sign * pred_exps) / 2, np.finfo(float).tiny, None)
+        ll += np.sum(f_j * np.log(pr_j))
+    return ll / len(meas_exps)
+
+
 def _R(state, results, qubits):
     r"""
     This implements Eqn 4 in [DIMLE1]_
@@ -317,25 +612,9 @@ def _R(state, results, qubits):
     :return: the operator of equation 4 in [DIMLE1]_ which fixes rho by left and right
         multiplication
     """
-    # this small number ~ 10^-304 is added so that we don't get divide by zero errors
-    machine_eps = np.finfo(float).tiny
-
-    update = np.zeros_like(state, dtype=complex)
-    IdH = np.eye(update.shape[0])
-
-    for res in results:
-        op_matrix = pauli2matrix(res.setting.observable, qubits)
-        meas_exp = res.expectation
-        pred_exp = np.trace(op_matrix @ state)
-
-        for sign in [1, -1]:
-            f_j_over_n = (1 + sign * meas_exp) / 2
-            pr_j = (1 + sign * pred_exp) / 2
-            pi_j = (IdH + sign * op_matrix) / 2
-
-            update += f_j_over_n / (pr_j + machine_eps) * pi_j
-
-    return update / len(results)
+    indices, coeffs = _pauli_indices([res.setting.observable for res in results], qubits)
+    return _R_from_pauli_indices(state, indices, coeffs,
+                                 np.array([res.expectation for res in results]))
 
 
 def state_log_likelihood(state: np.ndarray, results: Iterator[ExperimentResult],
@@ -357,99 +636,175 @@ def state_log_likelihood(state: np.ndarray, results: Iterator[ExperimentResult],
     # here that the first qubit in the list is the left-most tensor factor, so we have to reverse
     # the qubits before passing to state2matrix and pauli2matrix
     qs = qubits[::-1]
+    results = list(results)
+    indices, coeffs = _pauli_indices([res.setting.observable for res in results], qs)
+    counts = np.array([res.total_counts for res in results])
+    meas_exps = np.array([res.expectation for res in results])
+    pred_exps = np.real(_predicted_expectations(state, indices, coeffs))
 
     ll = 0
-    for res in results:
-        n = res.total_counts
-        op_matrix = pauli2matrix(res.setting.observable, qs)
-        meas_exp = res.expectation
-        pred_exp = np.real(np.trace(op_matrix @ state))
-
-        for sign in [1, -1]:
-            f_j = n * (1 + sign * meas_exp) / 2
-            pr_j = (1 + sign * pred_exp) / 2
-            if pr_j <= 0:
-                continue
-            ll += f_j * np.log10(pr_j)
+    for sign in [1, -1]:
+        f_j = counts * (1 + sign * meas_exps) / 2
+        pr_j = (1 + sign * pred_exps) / 2
+        positive = pr_j > 0
+        ll += np.sum(f_j[positive] * np.log10(pr_j[positive]))
 
     return ll
 
 
-def _resample_expectations_with_beta(results, prior_counts=1):
+def _beta_resampled_expectations(results: List[ExperimentResult], n_resamples: int,
+                                 prior_counts: float = 1,
+                                 random_seed: Optional[int] = None) -> np.ndarray:
     """
-    Resample expectation values by constructing a beta distribution and sampling from it.
+    Resample expectation values by constructing a beta distribution for each result and sampling
+    from it.
 
-    Used by :py:func:`estimate_variance`.
+    Used by :py:func:`bootstrap_samples`.
 
     :param results: A list of ExperimentResults
+    :param n_resamples: The number of times to re-sample.
     :param prior_counts: Number of "counts" to add to alpha and beta for the beta distribution
         from which we sample.
-    :return: A new list of ``results`` where each ExperimentResult's ``expectation`` field
-        contained a re-sampled expectation value
+    :param random_seed: a seed for a new random number generator. If None, numpy's global
+        random state is used, drawing the same values as re-sampling each result in turn.
+    :return: an array of shape (n_resamples, len(results)) of re-sampled expectation values.
     """
-    resampled_results = []
-    for result in results:
-        # reconstruct the raw counts of observations from the pauli observable mean
-        num_plus = ((result.expectation + 1) / 2) * result.total_counts
-        num_minus = result.total_counts - num_plus
-
-        # We resample this data assuming it was from a beta distribution,
-        # with additive smoothing
-        alpha = num_plus + prior_counts
-        beta = num_minus + prior_counts
-
-        # transform bit bias back to pauli expectation value
-        resampled_expect = 2 * np.random.beta(alpha, beta) - 1
-        resampled_results += [ExperimentResult(
-            setting=result.setting,
-            expectation=resampled_expect,
-            std_err=result.std_err,
-            total_counts=result.total_counts,
-        )]
-    return resampled_results
+    expectations = np.real([result.expectation for result in results])
+    total_counts = np.array([result.total_counts for result in results])
 
+    # reconstruct the raw counts of observations from the pauli observable mean
+    num_plus = ((expectations + 1) / 2) * total_counts
+    num_minus = total_counts - num_plus
 
-def estimate_variance(results: List[ExperimentResult],
+    # We resample this data assuming it was from a beta distribution,
+    # with additive smoothing
+    rng = np.random if random_seed is None else np.random.default_rng(random_seed)
+    bit_biases = rng.beta(num_plus + prior_counts, num_minus + prior_counts,
+                          size=(n_resamples, len(results)))
+
+    # transform bit bias back to pauli expectation value
+    return 2 * bit_biases - 1
+
+
+def _functional_of_resampled_estimates(results: List[ExperimentResult], qubits: List[int],
+                                       tomo_estimator: Callable, functional: Callable,
+                                       target_state: Optional[np.ndarray],
+                                       project_to_physical: bool,
+                                       resampled_expectations: np.ndarray) -> np.ndarray:
+    """
+    Estimate the state for each row of re-sampled expectations and evaluate the functional.
+
+    Used by :py:func:`bootstrap_samples`, possibly in a worker process.
+    """
+    samples = []
+    for expectations in resampled_expectations:
+        resampled_results = [ExperimentResult(setting=result.setting,
+                                              expectation=expectation,
+                                              std_err=result.std_err,
+                                              total_counts=result.total_counts)
+                             for result, expectation in zip(results, expectations)]
+        rho = tomo_estimator(resampled_results, qubits)
+
+        if project_to_physical:
+            rho = project_state_matrix_to_physical(rho)
+
+        # Calculate functional of the state
+        if functional == dm.purity:
+            samples.append(np.real(dm.purity(rho, dim_renorm=False)))
+        else:
+            samples.append(np.real(functional(target_state, rho)))
+    return np.array(samples)
+
+
+def bootstrap_samples(results: List[ExperimentResult],
                       qubits: List[int],
                       tomo_estimator: Callable,
                       functional: Callable,
                       target_state=None,
                       n_resamples: int = 40,
-                      project_to_physical: bool = False) -> Tuple[float, float]:
+                      project_to_physical: bool = False,
+                      num_workers: int = 1,
+                      random_seed: Optional[int] = None) -> np.ndarray:
     """
-    Use a simple bootstrap-like method to return an error bar on some functional of the
-    quantum state.
+    Sample some functional of the quantum state over bootstrap-like re-samplings of the data.
+
+    Every result's expectation is re-sampled n_resamples times from a beta distribution at once.
+    The state is then estimated from each re-sampling and the functional evaluated. These
+    estimates are independent, so they may be distributed over ``num_workers`` processes. Each
+    worker is handed a contiguous block of re-samplings, so any matrices the estimator caches for
+    the settings are computed once per worker. All re-samplings are drawn from one generator
+    seeded by ``random_seed`` before they are distributed, so the samples do not depend on the
+    number of workers.
 
     :param results: Measured results from a state tomography experiment
     :param qubits: Qubits that were tomographized.
     :param tomo_estimator: takes in ``results, qubits`` and returns a corresponding
-        estimate of the state rho, e.g. ``linear_inv_state_estimate``
-    :param functional: Which functional to find variance, e.g. ``dm.purity``.
+        estimate of the state rho, e.g. ``linear_inv_state_estimate``. If num_workers > 1 it must
+        be picklable, e.g. a module level function or a ``functools.partial`` of one.
+    :param functional: Which functional to sample, e.g. ``dm.purity``.
     :param target_state: A density matrix of the state with respect to which the distance
         functional is measured. Not applicable if functional is ``dm.purity``.
     :param n_resamples: The number of times to re-sample.
     :param project_to_physical: Whether to project the estimated state to a physical one
         with :py:func:`project_state_matrix_to_physical`.
+    :param num_workers: The number of processes over which to distribute the estimates. If 1,
+        all estimates are computed in this process.
+    :param random_seed: a seed for the random number generator used to re-sample the data. If
+        None, numpy's global random state is used.
+    :return: an array of the n_resamples values of the functional.
     """
+    if n_resamples < 1:
+        raise ValueError("n_resamples must be at least 1.")
     if functional != dm.purity:
         if target_state is None:
             raise ValueError("You're not using the `purity` functional. "
                              "Please specify a target state.")
 
-    sample_estimate = []
-    for _ in range(n_resamples):
-        resampled_results = _resample_expectations_with_beta(results)
-        rho = tomo_estimator(resampled_results, qubits)
+    resampled_expectations = _beta_resampled_expectations(results, n_resamples,
+                                                          random_seed=random_seed)
+    evaluate = functools.partial(_functional_of_resampled_estimates, results, qubits,
+                                 tomo_estimator, functional, target_state, project_to_physical)
+    if num_workers <= 1:
+        return evaluate(resampled_expectations)
 
-        if project_to_physical:
-            rho = project_state_matrix_to_physical(rho)
+    blocks = np.array_split(resampled_expectations, min(num_workers, n_resamples))
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        return np.concatenate(list(pool.map(evaluate, blocks)))
 
-        # Calculate functional of the state
-        if functional == dm.purity:
-            sample_estimate.append(np.real(dm.purity(rho, dim_renorm=False)))
-        else:
-            sample_estimate.append(np.real(functional(target_state, rho)))
 
+def estimate_variance(results: List[ExperimentResult],
+                      qubits: List[int],
+                      tomo_estimator: Callable,
+                      functional: Callable,
+                      target_state=None,
+                      n_resamples: int = 40,
+                      project_to_physical: bool = False,
+                      num_workers: int = 1,
+                      random_seed: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Use a simple bootstrap-like method to return an error bar on some functional of the
+    quantum state.
+
+    This is the mean and variance of the samples of :py:func:`bootstrap_samples`, which can be
+    used directly for the full distribution.
+
+    :param results: Measured results from a state tomography experiment
+    :param qubits: Qubits that were tomographized.
+    :param tomo_estimator: takes in ``results, qubits`` and returns a corresponding
+        estimate of the state rho, e.g. ``linear_inv_state_estimate``
+    :param functional: Which functional to find variance, e.g. ``dm.purity``.
+    :param target_state: A density matrix of the state with respect to which the distance
+        functional is measured. Not applicable if functional is ``dm.purity``.
+    :param n_resamples: The number of times to re-sample.
+    :param project_to_physical: Whether to project the estimated state to a physical one
+        with :py:func:`project_state_matrix_to_physical`.
+    :param num_workers: The number of processes over which to distribute the estimates.
+    :param random_seed: a seed for the random number generator used to re-sample the data. If
+        None, numpy's global random state is used.
+    """
+    sample_estimate = bootstrap_samples(results, qubits, tomo_estimator, functional,
+                                        target_state, n_resamples, project_to_physical,
+                                        num_workers, random_seed)
     return np.mean(sample_estimate), np.var(sample_estimate)
 
 
@@ -478,17 +833,89 @@ def linear_inv_process_estimate(results: List[ExperimentResult], qubits: List[in
     # qubit, e.g. qubit 0, is the right-most tensor factor. We stick with the standard convention
     # here that the first qubit in the list is the left-most tensor factor, so we have to reverse
     # the qubits before passing to state2matrix and pauli2matrix
-    qs = qubits[::-1]
-    measurement_matrix = np.vstack([
-        vec(np.kron(state2matrix(result.setting.in_state, qs).conj(),
-                    pauli2matrix(result.setting.observable, qs))).conj().T
-        for result in results
-    ])
+    settings = [result.setting for result in results]
     expectations = np.array([result.expectation for result in results])
-    rho = pinv(measurement_matrix) @ expectations
+    return linear_inv_process_estimates(settings, expectations[np.newaxis], qubits)[0]
+
+
+def linear_inv_process_estimates(settings: Sequence[ExperimentSetting], expectations: np.ndarray,
+                                 qubits: List[int]) -> np.ndarray:
+    """
+    Estimate many quantum processes at once using linear inversion.
+
+    This is :py:func:`linear_inv_process_estimate` for a stack of datasets that share the same
+    settings, e.g. repeated runs of the same experiment. The pseudo-inverse of the measurement
+    matrix depends only on the settings, so it is cached and applied to all datasets at once.
+
+    :param settings: the settings of a tomographically complete experiment.
+    :param expectations: an array of shape (num_datasets, len(settings)) where each row holds
+        the measured expectations of the settings.
+    :param qubits: All qubits that were tomographized. This specifies the order in
+        which qubits will be kron'ed together; the first qubit in the list is the left-most
+        tensor factor.
+    :return: an array of shape (num_datasets, dim**2, dim**2) of point estimates of the processes,
+        represented by Choi matrices.
+    """
+    # see linear_inv_state_estimates for the reversal of the qubits
+    qs = tuple(qubits[::-1])
+    blocks = _process_linear_inv_blocks(tuple(settings), qs)
+    expectations = np.atleast_2d(expectations)
+
+    dim = 2 ** len(qubits)
+    chi = np.zeros((len(expectations), dim ** 2, dim ** 2), dtype=complex)
+    for k, rows, design_pinv in blocks:
+        chi[:, :, k] = expectations[:, rows] @ design_pinv.T
+
     # add in identity term
+    return _pauli_vectors2operators(chi.reshape(len(expectations), -1)) + np.eye(dim ** 2) / dim
+
+
+@_bytes_lru_cache(DESIGN_MATRIX_CACHE_BYTES)
+def _process_linear_inv_blocks(settings: Tuple[ExperimentSetting, ...],
+                               qubits: Tuple[int, ...]) \
+        -> Tuple[Tuple[int, np.ndarray, np.ndarray], ...]:
+    """
+    The pseudo-inverse of the measurement matrix used by :py:func:`linear_inv_process_estimates`,
+    which depends only on the settings. The cached arrays are read-only.
+
+    Expand the Choi matrix as sum_ab chi_ab sigma_a (x) sigma_b in the Pauli basis. A result
+    measuring c P_k on the input state rho has expectation Tr[(rho^T (x) c^* P_k) Choi]
+    = c^* dim sum_a Tr[sigma_a rho^T] chi_ak, which involves only the column k of chi. The
+    pseudo-inverse therefore decomposes into a least squares fit per column k over the results
+    measuring P_k; the columns usually share the same input states, so the small pseudo-inverse
+    of each distinct design is computed only once.
+
+    :param settings: the settings of the results.
+    :param qubits: the qubits, in pyquil order.
+    :return: for each measured Pauli, its index k, the rows of the settings that measure it, and
+        the pseudo-inverse mapping their expectations to the column k of chi.
+    """
+    indices, coeffs = _pauli_indices([setting.observable for setting in settings], qubits)
     dim = 2 ** len(qubits)
-    return unvec(rho) + np.eye(dim**2) / dim
+    blocks = []
+    design_pinvs = {}
+    for k in np.unique(indices):
+        rows = np.flatnonzero(indices == k)
+        key = (tuple(settings[row].in_state for row in rows), tuple(coeffs[rows]))
+        if key not in design_pinvs:
+            design = np.vstack([_state_pauli_vector(in_state, qubits) for in_state in key[0]])
+            design_pinvs[key] = pinv(coeffs[rows, np.newaxis].conj() * dim * design)
+            design_pinvs[key].setflags(write=False)
+        rows.setflags(write=False)
+        blocks.append((k, rows, design_pinvs[key]))
+    return tuple(blocks)
+
+
+@_bytes_lru_cache(OPERATOR_CACHE_BYTES)
+def _state_pauli_vector(in_state: TensorProductState, qubits: Tuple[int, ...]) -> np.ndarray:
+    """
+    The traces Tr[sigma_a rho^T] of the transposed input state with each element of the Pauli
+    basis, as used by :py:func:`linear_inv_process_estimate`. The cached vector is read-only.
+    """
+    state_t = _state_matrix(in_state, qubits).T
+    vector = operator2pauli_vector(state_t)[:, 0] * state_t.shape[0]
+    vector.setflags(write=False)
+    return vector
 
 
 def _extract_from_results(results: List[ExperimentResult], qubits: List[int]):
@@ -501,18 +928,38 @@ def _extract_from_results(results: List[ExperimentResult], qubits: List[int]):
         p = vec(p_ij) = A x vec(E)
 
     This yields convenient vectorized calculations of the cost and its gradient, in terms of A, n,
-    and E.
+    and E. The matrix A depends only on the settings of the results and is shared between calls
+    with the same settings, so it should not be modified.
     """
-    A = []
+    A = _process_design_matrix(tuple(result.setting for result in results), tuple(qubits))
+
     n = []
     grand_total_shots = 0
-
     for result in results:
-        # 'lift' the result's ExperimentSetting input TensorProductState to the corresponding
+        expected_plus_ones = (1 + result.expectation) / 2
+        n += [
+            result.total_counts * expected_plus_ones,
+            result.total_counts * (1 - expected_plus_ones)
+        ]
+        grand_total_shots += result.total_counts
+
+    n = np.asarray(n)[:, np.newaxis] / grand_total_shots
+    return A, n
+
+
+@_bytes_lru_cache(DESIGN_MATRIX_CACHE_BYTES)
+def _process_design_matrix(settings: Tuple[ExperimentSetting, ...],
+                           qubits: Tuple[int, ...]) -> np.ndarray:
+    """
+    The matrix A of :py:func:`_extract_from_results`, which depends only on the settings.
+    """
+    A = []
+    for setting in settings:
+        # 'lift' the setting's input TensorProductState to the corresponding
         # matrix. This is simply the density matrix of the state that was prepared.
-        in_state_matrix = state2matrix(result.setting.in_state, qubits=qubits)
-        # 'lift' the result's ExperimentSetting output PauliTerm to the corresponding matrix.
-        operator = pauli2matrix(result.setting.observable, qubits=qubits)
+        in_state_matrix = _state_matrix(setting.in_state, qubits)
+        # 'lift' the setting's output PauliTerm to the corresponding matrix.
+        operator = _pauli_matrix(setting.observable, qubits)
         proj_plus = (np.eye(2 ** len(qubits)) + operator) / 2
         proj_minus = (np.eye(2 ** len(qubits)) - operator) / 2
 
@@ -525,18 +972,10 @@ def _extract_from_results(results: List[ExperimentResult], qubits: List[int]):
             vec(np.kron(in_state_matrix, proj_minus.T)).T[0],
         ]
 
-        expected_plus_ones = (1 + result.expectation) / 2
-        n += [
-            result.total_counts * expected_plus_ones,
-            result.total_counts * (1 - expected_plus_ones)
-        ]
-        grand_total_shots += result.total_counts
-
-    n_qubits = len(qubits)
-    dimension = 2 ** n_qubits
+    dimension = 2 ** len(qubits)
     A = np.asarray(A) / dimension ** 2
-    n = np.asarray(n)[:, np.newaxis] / grand_total_shots
-    return A, n
+    A.setflags(write=False)
+    return A
 
 
 def pgdb_process_estimate(results: List[ExperimentResult], qubits: List[int],
@@ -594,6 +1033,116 @@ def pgdb_process_estimate(results: List[ExperimentResult], qubits: List[int],
     return est
 
 
+def accelerated_pgdb_process_estimate(results: List[ExperimentResult], qubits: List[int],
+                                      trace_preserving: bool = True,
+                                      initial_estimate: Optional[np.ndarray] = None,
+                                      tol: float = 1e-10, maxiter: int = 10_000) \
+        -> Tuple[np.ndarray, dict]:
+    """
+    Estimate the process via Projected Gradient Descent with Backtracking [PGD]_, accelerated
+    with momentum and started from a good initial estimate.
+
+    Each iteration takes the projected gradient step of :py:func:`pgdb_process_estimate` from a
+    point extrapolated along the previous step, as in Nesterov's accelerated gradient method.
+    If this fails to decrease the cost the momentum is reset and an ordinary backtracking step
+    is taken from the current estimate, so the cost decreases monotonically. The probabilities
+    ``A @ vec(est)`` are computed once per iteration and shared between the cost, the gradient
+    and the backtracking line search.
+
+    By default the descent starts from the linear inversion estimate projected to a physical
+    process, which is typically already close to the maximum likelihood estimate. A previous
+    estimate, e.g. from an earlier run on the same device, may be passed instead.
+
+    :param results: A tomographically complete list of ExperimentResults
+    :param qubits: A list of qubits giving the tensor order of the resulting Choi matrix.
+    :param trace_preserving: Whether to project the estimate to a trace-preserving process. If
+        set to False, we ensure trace non-increasing.
+    :param initial_estimate: the Choi matrix from which to start the descent; it is projected to
+        a physical process first. If None, the projected :py:func:`linear_inv_process_estimate`
+        is used.
+    :param tol: the descent stops once the decrease in cost is smaller than tol.
+    :param maxiter: The maximum number of iterations to perform before aborting the procedure.
+    :return: an estimate of the process in the Choi matrix representation, and a trace of the
+        descent: a dict holding the 'cost' after each iteration, the number of 'iterations', the
+        number of momentum 'restarts', and the 'time' in seconds spent in the 'setup',
+        'gradient', 'projection' and 'line_search' phases.
+    """
+    timing = {'setup': 0., 'gradient': 0., 'projection': 0., 'line_search': 0.}
+    start = time.perf_counter()
+    A, n = _extract_from_results(results, qubits[::-1])
+    if initial_estimate is None:
+        initial_estimate = linear_inv_process_estimate(results, qubits)
+    est = proj_choi_to_physical(np.asarray(initial_estimate, dtype=complex), trace_preserving)
+    p = A @ vec(est)
+    cost = _cost_from_probabilities(n, p)
+    timing['setup'] += time.perf_counter() - start
+
+    dim = 2 ** len(qubits)
+    mu = 3 / (2 * dim ** 2)  # inverse learning rate, as in pgdb_process_estimate
+    gamma = .3  # tolerance of letting the constrained update deviate from true gradient
+
+    trace = {'cost': [cost], 'iterations': 0, 'restarts': 0, 'time': timing}
+    prev_est, prev_p = est, p
+    momentum = 1
+    for _ in range(maxiter):
+        trace['iterations'] += 1
+
+        # accelerated step from the extrapolated point
+        next_momentum = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+        beta = (momentum - 1) / next_momentum
+        start = time.perf_counter()
+        y = est + beta * (est - prev_est)
+        p_y = p + beta * (p - prev_p)
+        gradient = _grad_from_probabilities(A, n, p_y)
+        timing['gradient'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_est = proj_choi_to_physical(y - gradient / mu, trace_preserving)
+        timing['projection'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_p = A @ vec(new_est)
+        new_cost = _cost_from_probabilities(n, new_p)
+        timing['line_search'] += time.perf_counter() - start
+
+        if new_cost > cost:
+            # the momentum overshot; restart from a backtracking step at the current estimate
+            trace['restarts'] += 1
+            next_momentum = 1
+            start = time.perf_counter()
+            gradient = _grad_from_probabilities(A, n, p)
+            timing['gradient'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            update = proj_choi_to_physical(est - gradient / mu, trace_preserving) - est
+            timing['projection'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            update_p = A @ vec(update)
+            alpha = 1
+            change = gamma * np.real(np.vdot(update, gradient))
+            new_cost = _cost_from_probabilities(n, p + update_p)
+            while new_cost > cost + change and alpha >= 1e-15:
+                alpha = .5 * alpha
+                change = .5 * change
+                new_cost = _cost_from_probabilities(n, p + alpha * update_p)
+            new_est = est + alpha * update
+            new_p = p + alpha * update_p
+            timing['line_search'] += time.perf_counter() - start
+
+        prev_est, prev_p = est, p
+        est, p = new_est, new_p
+        momentum = next_momentum
+        trace['cost'].append(new_cost)
+        if cost - new_cost < tol:
+            break
+        cost = new_cost
+    else:
+        warnings.warn('Maximum number of iterations reached before convergence.')
+
+    return est, trace
+
+
 def _cost(A, n, estimate, eps=1e-6):
     """
     Computes the cost (negative log likelihood) of the estimated process using the vectorized
@@ -633,10 +1182,29 @@ def _grad_cost(A, n, estimate, eps=1e-6):
     return unvec(-A.conj().T @ eta)
 
 
+def _cost_from_probabilities(n, p, eps=1e-6) -> float:
+    """
+    The cost of :py:func:`_cost` given the probabilities ``p = A @ vec(estimate)``.
+    """
+    p = np.clip(np.real(p), a_min=eps, a_max=None)
+    return - (n.T @ np.log(p)).item()
+
+
+def _grad_from_probabilities(A, n, p, eps=1e-6):
+    """
+    The gradient of :py:func:`_grad_cost` given the probabilities ``p = A @ vec(estimate)``.
+    """
+    p = np.clip(np.real(p), a_min=eps, a_max=None)
+    # A.T is a view, whereas A.conj().T would copy the whole design matrix
+    return unvec(-(A.T @ (n / p)).conj())
+
+
 def do_tomography(qc: QuantumComputer, program: Program, qubits: List[int], kind: str,
                   num_shots: int = 1_000, active_reset: bool = False,
                   group_tpb_settings: bool = True, symm_type: int = -1,
-                  calibrate_observables: bool = True, show_progress_bar: bool = False) \
+                  calibrate_observables: bool = True, show_progress_bar: bool = False,
+                  max_in_flight: int = 0, executable_cache: ExecutableCache = None,
+                  calibration_cache: CalibrationCache = None) \
         -> Tuple[np.ndarray, ObservablesExperiment, List[ExperimentResult]]:
     """
     A wrapper around experiment generation, data acquisition, and estimation that runs a tomography
@@ -655,7 +1223,8 @@ def do_tomography(qc: QuantumComputer, program: Program, qubits: List[int], kind
     :param group_tpb_settings: if true, compatible settings will be formed into groups that can
         be estimated concurrently from the same shot data. This will speed up the data
         acquisition time by reducing the total number of runs, but be aware that grouped settings
-        will have non-zero covariance.
+        will have non-zero covariance. This covariance can be estimated from the shot data with
+        :py:func:`~forest.benchmarking.observable_estimation.shots_to_obs_moments_batch`.
     :param symm_type: the type of symmetrization
 
         * -1 -- exhaustive symmetrization uses every possible combination of flips
@@ -669,6 +1238,14 @@ def do_tomography(qc: QuantumComputer, program: Program, qubits: List[int], kind
         Likely, for the best (although slowest) results, symmetrization type should accommodate the
         maximum weight of any observable estimated.
     :param show_progress_bar: displays a progress bar via tqdm if true.
+    :param max_in_flight: if positive, programs are compiled up to this many programs ahead of
+        the one running on the qc; see
+        :py:func:`~forest.benchmarking.observable_estimation.estimate_observables`
+    :param executable_cache: an optional cache of compiled executables; programs found in the
+        cache are not recompiled. See :py:class:`~forest.benchmarking.compilation.ExecutableCache`
+    :param calibration_cache: an optional cache of calibrations, shared across calls, from which
+        unexpired calibrations are reused. See
+        :py:class:`~forest.benchmarking.observable_estimation.CalibrationCache`
     :return: The estimated state prepared by or process represented by the input ``program``,
         as implemented on the provided ``qc``, along with the experiment and corresponding
         results.
@@ -686,7 +1263,10 @@ def do_tomography(qc: QuantumComputer, program: Program, qubits: List[int], kind
     results = list(acquire_dfe_data(qc, expt, num_shots, active_reset=active_reset,
                                     symm_type=symm_type,
                                     calibrate_observables=calibrate_observables,
-                                    show_progress_bar=show_progress_bar))
+                                    show_progress_bar=show_progress_bar,
+                                    max_in_flight=max_in_flight,
+                                    executable_cache=executable_cache,
+                                    calibration_cache=calibration_cache))
 
     if kind.lower() == 'state':
         # estimate the state matrix
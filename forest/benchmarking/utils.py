@@ -1,3 +1,4 @@
+import functools
 import itertools
 from collections import OrderedDict
 from datetime import date, datetime
@@ -8,6 +9,7 @@ import numpy as np
 import pandas as pd
 from git import Repo
 from numpy import pi
+from scipy import sparse
 from pyquil.api import QuantumComputer
 from pyquil.gates import I, RX, RY, RZ, H, MEASURE
 from pyquil.paulis import PauliTerm
@@ -328,6 +330,11 @@ def prepare_all_prod_pauli_eigenstates(pauli_term: PauliTerm):
 class OperatorBasis(object):
     """
     Encapsulate a complete set of basis operators.
+
+    A basis formed as a tensor product of other bases, e.g. by :py:meth:`product` or ``**``,
+    only stores its tensor factors. Its labels and operators are generated on demand, either
+    by index or by iteration, so that e.g. iterating over the labels of an n-qubit Pauli basis
+    does not construct any of its 4^n dense operators.
     """
 
     def __init__(self, labels_ops):
@@ -337,10 +344,56 @@ class OperatorBasis(object):
         :param (list|tuple) labels_ops: Sequence of tuples (label, operator) where label is a string
             and operator is a numpy.ndarray/
         """
-        self.ops_by_label = OrderedDict(labels_ops)
-        self.labels = list(self.ops_by_label.keys())
-        self.ops = list(self.ops_by_label.values())
-        self.dim = len(self.ops)
+        self._ops_by_label = OrderedDict(labels_ops)
+        self._labels = list(self._ops_by_label.keys())
+        self._ops = list(self._ops_by_label.values())
+        self._factors = None
+        self.dim = len(self._ops)
+
+    @classmethod
+    def _from_factors(cls, factors):
+        """
+        Create the tensor product of the given bases without constructing any operators.
+        """
+        basis = cls.__new__(cls)
+        basis._ops_by_label = None
+        basis._labels = None
+        basis._ops = None
+        basis._factors = tuple(factors)
+        basis.dim = int(np.prod([factor.dim for factor in basis._factors]))
+        return basis
+
+    @property
+    def factors(self):
+        """
+        The bases whose tensor product is this basis, in order.
+        """
+        if self._factors is None:
+            return (self,)
+        return self._factors
+
+    @property
+    def labels(self):
+        if self._labels is None:
+            self._labels = [''.join(labels) for labels in
+                            itertools.product(*[factor.labels for factor in self.factors])]
+        return self._labels
+
+    @property
+    def ops(self):
+        """
+        The list of all operators in the basis. For a product basis these are all constructed,
+        and then stored, on first access; prefer indexing or iteration for large bases.
+        """
+        if self._ops is None:
+            self._ops = [op for _, op in self]
+        return self._ops
+
+    @property
+    def ops_by_label(self):
+        if self._ops_by_label is None:
+            self._ops_by_label = OrderedDict(zip(self.labels, self.ops))
+        return self._ops_by_label
 
     def product(self, *bases):
         """
@@ -349,16 +402,56 @@ class OperatorBasis(object):
         :param bases: One or more additional bases to form the product with.
         :return (OperatorBasis): The tensor product basis as an OperatorBasis object.
         """
-        if len(bases) > 1:
-            basis_rest = bases[0].product(*bases[1:])
-        else:
-            assert len(bases) == 1
-            basis_rest = bases[0]
+        if len(bases) == 0:
+            raise ValueError("Need at least one basis to form the product with.")
 
-        labels_ops = [(b1l + b2l, np.kron(b1, b2)) for (b1l, b1), (b2l, b2) in
-                      itertools.product(self, basis_rest)]
+        return OperatorBasis._from_factors(self.factors + tuple(factor for basis in bases
+                                                                for factor in basis.factors))
 
-        return OperatorBasis(labels_ops)
+    def _factor_indices(self, index):
+        """
+        Decompose an index into the indices of each tensor factor; the first factor is the most
+        significant.
+        """
+        if not -self.dim <= index < self.dim:
+            raise IndexError(f"Index {index} out of range for a basis of {self.dim} operators.")
+        index %= self.dim
+        factor_indices = []
+        for factor in reversed(self.factors):
+            index, factor_index = divmod(index, factor.dim)
+            factor_indices.append(factor_index)
+        return factor_indices[::-1]
+
+    def __getitem__(self, index):
+        """
+        Get the label and operator of the basis element at the given index, constructing only
+        that operator.
+
+        :param int index: the index of the basis element.
+        :return: the tuple (label, basis_op)
+        """
+        if self._ops is not None:
+            return self.labels[index], self._ops[index]
+        elements = [factor[idx] for factor, idx in zip(self.factors,
+                                                       self._factor_indices(index))]
+        return ''.join(label for label, _ in elements), \
+            functools.reduce(np.kron, [op for _, op in elements])
+
+    def sparse_op(self, index):
+        """
+        Get the operator at the given index as a scipy sparse matrix, built as a tensor product of
+        sparse factors. Pauli and computational basis operators have at most one non-zero entry
+        per row, so this takes memory linear in the dimension of the operator.
+
+        :param int index: the index of the basis element.
+        :return: the operator as a scipy.sparse.csr_matrix
+        """
+        factor_ops = [sparse.csr_matrix(factor[idx][1]) for factor, idx in
+                      zip(self.factors, self._factor_indices(index))]
+        return functools.reduce(lambda a, b: sparse.kron(a, b, format='csr'), factor_ops)
+
+    def __len__(self):
+        return self.dim
 
     def __iter__(self):
         """
@@ -367,8 +460,24 @@ class OperatorBasis(object):
         :return: Yields the labels and qutip operators corresponding to the vectors in this basis.
         :rtype: tuple (str, qutip.qobj.Qobj)
         """
-        for l, op in zip(self.labels, self.ops):
-            yield l, op
+        if self._ops is not None:
+            yield from zip(self.labels, self._ops)
+            return
+
+        # reuse the partial tensor products shared by consecutive elements
+        factor_elements = [list(factor) for factor in self.factors]
+        prefixes = [('', np.ones((1, 1), dtype=int))]
+        for elements in itertools.product(*factor_elements):
+            depth = len(prefixes) - 1
+            for label, op in elements[depth:]:
+                prev_label, prev_op = prefixes[-1]
+                prefixes.append((prev_label + label, np.kron(prev_op, op)))
+            yield prefixes[-1]
+            # drop the prefixes that change in the next element of the product
+            for factor_elems, (label, _) in zip(reversed(factor_elements), reversed(elements)):
+                prefixes.pop()
+                if label != factor_elems[-1][0]:
+                    break
 
     def __pow__(self, n):
         """
@@ -399,6 +508,9 @@ def n_qubit_pauli_basis(n):
     """
     Construct the tensor product operator basis of `n` PAULI_BASIS's.
 
+    The basis is lazy, see :py:class:`OperatorBasis`, so constructing it is cheap; each call
+    returns a new basis.
+
     :param int n: The number of qubits.
     :return: The product Pauli operator basis of `n` qubits
     :rtype: OperatorBasis